@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asynchronous job queue for long-running analyses (/analyze/jobs).
+
+An /analyze call runs three LLM calls and can take 30+ seconds, long enough
+for HTTP clients and proxies to time out. JobManager accepts the request,
+returns a job id at once and runs the work on a bounded pool of asyncio
+worker tasks:
+
+- Priority: jobs wait in a heap ordered by (priority, submission order), so
+  "high" (interactive) jobs overtake queued "low" (batch) ones.
+- Fairness: a tenant runs at most ANALYSIS_TENANT_CONCURRENCY jobs at a time;
+  a job popped while its tenant is at the limit is parked and re-queued
+  when one of that tenant's jobs finishes. ANALYSIS_TENANT_QUEUE caps the
+  pending jobs per tenant, ANALYSIS_QUEUE_LIMIT the total.
+- Result store: finished jobs (result or error) stay readable for
+  ANALYSIS_JOB_TTL seconds, then are dropped.
+
+Clients poll get(id) or follow events(id), which yields a snapshot on every
+status change (served as SSE by client_app).
+
+Scheduling is per process (the accepting worker runs the job, and the limits
+above apply per serve.py worker), but every status change is written to
+JobStore, a SQLite file (WAL, ANALYSIS_JOB_STORE_PATH) shared by all
+workers. A status request that lands on another worker is answered from the
+store, and that worker's events() polls the store every ANALYSIS_JOB_POLL_S
+seconds. Such a snapshot has no queue_position. If the accepting worker
+exited before finishing, the job is reported as failed.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+ANALYSIS_QUEUE_LIMIT = int(os.getenv("ANALYSIS_QUEUE_LIMIT", "100"))
+ANALYSIS_TENANT_CONCURRENCY = int(os.getenv("ANALYSIS_TENANT_CONCURRENCY", "1"))
+ANALYSIS_TENANT_QUEUE = int(os.getenv("ANALYSIS_TENANT_QUEUE", "10"))
+ANALYSIS_JOB_TTL = float(os.getenv("ANALYSIS_JOB_TTL", "3600"))
+ANALYSIS_JOB_STORE_PATH = os.getenv("ANALYSIS_JOB_STORE_PATH", "analysis_jobs.sqlite")
+ANALYSIS_JOB_POLL_S = float(os.getenv("ANALYSIS_JOB_POLL_S", "0.5"))  # 다른 워커가 받은 작업의 events 폴링 간격
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+TERMINAL = ("done", "failed")
+
+Runner = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    job_id TEXT PRIMARY KEY,
+    owner_pid INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    view TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS analysis_jobs_expires ON analysis_jobs (expires_at);
+"""
+
+
+class JobRejected(Exception):
+    """큐 한도 초과 (status_code: 429 테넌트 한도 / 503 전체 한도)"""
+
+    def __init__(self, detail: str, status_code: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    작업 상태 스냅샷(view) 공유 저장소. SQLite WAL, 호출마다 짧은 연결.
+    serve.py 의 모든 워커가 같은 파일을 보므로 어느 워커로 조회가 가도 작업을 찾는다.
+    """
+
+    def __init__(self, path: str = ANALYSIS_JOB_STORE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put(self, view: Dict[str, Any], version: int, owner_pid: Optional[int] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO analysis_jobs (job_id, owner_pid, version, view, expires_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(job_id) DO UPDATE SET owner_pid = excluded.owner_pid, version = excluded.version,"
+                " view = excluded.view, expires_at = excluded.expires_at",
+                (view["job_id"], owner_pid or os.getpid(), version, json.dumps(view, ensure_ascii=False),
+                 view.get("expires_at")),
+            )
+
+    def get(self, job_id: str) -> Optional[Tuple[int, int, Dict[str, Any]]]:
+        """(owner_pid, version, view) - 만료된 작업은 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT owner_pid, version, view FROM analysis_jobs"
+                " WHERE job_id = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def purge(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM analysis_jobs WHERE expires_at < ?", (time.time(),)).rowcount
+
+
+class JobManager:
+    def __init__(self, runner: Runner, workers: int = ANALYSIS_WORKERS,
+                 queue_limit: int = ANALYSIS_QUEUE_LIMIT,
+                 tenant_concurrency: int = ANALYSIS_TENANT_CONCURRENCY,
+                 tenant_queue: int = ANALYSIS_TENANT_QUEUE, ttl: float = ANALYSIS_JOB_TTL,
+                 store: Optional[JobStore] = None, poll_interval: float = ANALYSIS_JOB_POLL_S):
+        self.runner = runner
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.ttl = ttl
+        self.store = store or JobStore()
+        self.poll_interval = poll_interval
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._ready: List[Tuple[int, int, str]] = []
+        self._parked: Dict[str, Deque[Tuple[int, int, str]]] = {}
+        self._running: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._finished: Deque[Tuple[float, str]] = deque()
+        self._seq = itertools.count()
+        self._changed: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "expired": 0}
+
+    # ---- 내부 ----
+    def _ensure_workers(self):
+        """라우터로 포함되면 startup 이벤트가 없으므로 첫 제출 시 현재 루프에서 워커 시작"""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        for _ in range(self.workers - len(self._tasks)):
+            self._tasks.append(asyncio.ensure_future(self._worker()))
+
+    def _publish(self, job: Dict[str, Any]):
+        """다른 워커의 조회용으로 현재 상태를 공유 저장소에 기록"""
+        self.store.put(self.view(job), job["version"])
+
+    async def _notify(self, job: Optional[Dict[str, Any]] = None):
+        if job is not None:
+            job["version"] += 1
+            self._publish(job)
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _purge(self):
+        deadline = time.time() - self.ttl
+        while self._finished and self._finished[0][0] < deadline:
+            _, job_id = self._finished.popleft()
+            if self._jobs.pop(job_id, None) is not None:
+                self.stats["expired"] += 1
+
+    def _local(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def _stored(self, job_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """다른 워커가 받은 작업의 (version, view). 받은 워커가 끝내지 못하고 종료됐으면 실패로 기록"""
+        found = self.store.get(job_id)
+        if found is None:
+            return None
+        owner_pid, version, view = found
+        if view["status"] not in TERMINAL and not _alive(owner_pid):
+            finished_at = time.time()
+            view.update(status="failed", finished_at=finished_at, expires_at=finished_at + self.ttl,
+                        error={"status_code": 503, "detail": "작업을 받은 워커가 종료되었습니다. 다시 요청해주세요."},
+                        result=None)
+            version += 1
+            self.store.put(view, version, owner_pid)
+        return version, {**view, "queue_position": None}
+
+    async def _next_job(self) -> Dict[str, Any]:
+        async with self._changed:
+            while True:
+                while self._ready:
+                    entry = heapq.heappop(self._ready)
+                    job = self._jobs[entry[2]]
+                    tenant = job["tenant"]
+                    if self._running.get(tenant, 0) >= self.tenant_concurrency:
+                        self._parked.setdefault(tenant, deque()).append(entry)
+                        continue
+                    self._running[tenant] = self._running.get(tenant, 0) + 1
+                    self._pending[tenant] -= 1
+                    return job
+                await self._changed.wait()
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            job.update(status="running", started_at=time.time())
+            await self._notify(job)
+            try:
+                job["result"] = await self.runner(job["request"])
+                job["status"] = "done"
+            except Exception as exc:
+                job["status"] = "failed"
+                job["error"] = {
+                    "status_code": getattr(exc, "status_code", 500),
+                    "detail": getattr(exc, "detail", None) or str(exc),
+                }
+            job["finished_at"] = time.time()
+            self.stats[job["status"]] += 1
+            self._finished.append((job["finished_at"], job["id"]))
+
+            tenant = job["tenant"]
+            self._running[tenant] -= 1
+            parked = self._parked.get(tenant)
+            if parked:
+                heapq.heappush(self._ready, parked.popleft())
+            await self._notify(job)
+
+    def _position(self, job: Dict[str, Any]) -> Optional[int]:
+        if job["status"] != "queued":
+            return None
+        mine = (job["priority"], job["seq"])
+        waiting = self._ready + [entry for parked in self._parked.values() for entry in parked]
+        return sum(1 for priority, seq, _ in waiting if (priority, seq) < mine)
+
+    # ---- 공개 API ----
+    async def submit(self, request: Dict[str, Any], tenant: str, priority: str = "normal") -> Dict[str, Any]:
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {list(PRIORITIES)}")
+        self._ensure_workers()
+        self._purge()
+        if sum(self._pending.values()) >= self.queue_limit:
+            self.stats["rejected"] += 1
+            raise JobRejected("분석 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.", 503)
+        if self._pending.get(tenant, 0) >= self.tenant_queue:
+            self.stats["rejected"] += 1
+            raise JobRejected(f"테넌트 대기 작업 한도({self.tenant_queue}건)를 초과했습니다.", 429)
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "tenant": tenant,
+            "priority": PRIORITIES[priority],
+            "seq": next(self._seq),
+            "status": "queued",
+            "request": request,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "version": 0,
+        }
+        self._jobs[job["id"]] = job
+        self._pending[tenant] = self._pending.get(tenant, 0) + 1
+        heapq.heappush(self._ready, (job["priority"], job["seq"], job["id"]))
+        self.stats["submitted"] += 1
+        self.store.purge()
+        self._publish(job)
+        await self._notify()
+        return self.view(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 view - 이 워커가 받은 작업이면 메모리에서, 아니면 공유 저장소에서"""
+        job = self._local(job_id)
+        if job is not None:
+            return self.view(job)
+        stored = self._stored(job_id)
+        return stored[1] if stored else None
+
+    def view(self, job: Dict[str, Any], include_result: bool = True) -> Dict[str, Any]:
+        priority = next(name for name, value in PRIORITIES.items() if value == job["priority"])
+        view = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "priority": priority,
+            "tenant": job["tenant"],
+            "queue_position": self._position(job),
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+        if job["status"] in TERMINAL:
+            view["expires_at"] = job["finished_at"] + self.ttl
+            view["error"] = job["error"]
+            if include_result:
+                view["result"] = job["result"]
+        return view
+
+    async def events(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """상태가 바뀔 때마다 스냅샷, keepalive 초 동안 변화가 없으면 None. 종료 상태에서 끝"""
+        self._ensure_workers()
+        if self._local(job_id) is None:
+            async for view in self._stored_events(job_id, keepalive):
+                yield view
+            return
+        seen = -1
+        while True:
+            job = self._local(job_id)
+            if job is None:
+                return
+            if job["version"] != seen:
+                seen = job["version"]
+                yield self.view(job)
+                if job["status"] in TERMINAL:
+                    return
+                continue
+            try:
+                async with self._changed:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: job["version"] != seen), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def _stored_events(self, job_id: str, keepalive: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """다른 워커가 받은 작업: poll_interval 마다 공유 저장소를 확인"""
+        seen, idle = -1, 0.0
+        while True:
+            stored = self._stored(job_id)
+            if stored is None:
+                return
+            version, view = stored
+            if version != seen:
+                seen, idle = version, 0.0
+                yield view
+                if view["status"] in TERMINAL:
+                    return
+                continue
+            await asyncio.sleep(self.poll_interval)
+            idle += self.poll_interval
+            if idle >= keepalive:
+                idle = 0.0
+                yield None
+
+    def summary(self) -> Dict[str, Any]:
+        self._purge()
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "queued": sum(self._pending.values()),
+            "running": sum(self._running.values()),
+            "stored": len(self._jobs),
+            "queued_by_tenant": {tenant: n for tenant, n in self._pending.items() if n},
+        }
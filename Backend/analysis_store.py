@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent store of /analyze results keyed by account and data watermark.
+
+Each row holds the latest analysis of one account (fintech_use_num) together
+with the watermark of the data it was computed from (transaction count,
+latest tran_datetime, max id and the balance; see client_app.fetch_watermark).
+/analyze serves the stored result while the account's current watermark
+matches and recomputes otherwise; precompute_analyses.py fills the store in
+a nightly batch after the data load.
+
+SQLite in WAL mode (ANALYSIS_STORE_PATH) so every serve.py worker and the
+batch job share it; one short-lived connection per call.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+ANALYSIS_STORE_PATH = os.getenv("ANALYSIS_STORE_PATH", "analysis_store.sqlite")
+# 0 이면 /analyze 가 항상 실시간 계산 (벤치마크 등)
+ANALYSIS_STORE_ENABLED = os.getenv("ANALYSIS_STORE_ENABLED", "1") not in ("0", "false", "False")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    fintech_use_num TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    result TEXT NOT NULL,
+    computed_at REAL NOT NULL,
+    duration_s REAL,
+    source TEXT
+);
+"""
+
+
+class AnalysisStore:
+    def __init__(self, path: str = ANALYSIS_STORE_PATH):
+        self.path = path
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "writes": 0}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def watermark(self, fintech_use_num: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark FROM analyses WHERE fintech_use_num = ?", (fintech_use_num,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, fintech_use_num: str, watermark: str) -> Optional[Dict[str, Any]]:
+        """watermark 가 같을 때만 저장된 결과 반환 (다르면 None = 재계산 필요)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark, result, computed_at, source FROM analyses WHERE fintech_use_num = ?",
+                (fintech_use_num,),
+            ).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        if row[0] != watermark:
+            self.stats["stale"] += 1
+            return None
+        self.stats["hits"] += 1
+        return {**json.loads(row[1]), "computed_at": row[2], "computed_by": row[3]}
+
+    def put(self, fintech_use_num: str, watermark: str, result: Dict[str, Any],
+            duration_s: Optional[float] = None, source: str = "live"):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO analyses (fintech_use_num, watermark, result, computed_at, duration_s, source)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(fintech_use_num) DO UPDATE SET watermark = excluded.watermark,"
+                " result = excluded.result, computed_at = excluded.computed_at,"
+                " duration_s = excluded.duration_s, source = excluded.source",
+                (fintech_use_num, watermark, json.dumps(result, ensure_ascii=False, default=str),
+                 time.time(), duration_s, source),
+            )
+        self.stats["writes"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = dict(conn.execute("SELECT source, COUNT(*) FROM analyses GROUP BY source").fetchall())
+        return {**self.stats, "stored": rows}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-core throughput benchmark for benefit_alerts.MissedBenefitDetector.
+
+Synthetic users hold 1-2 catalogue cards and emit card payments at merchants
+drawn from every benefit category (plus uncategorised noise). Card lists are
+registered up front so no DB is touched.
+
+A second run feeds events of unregistered users through the /alerts/ingest
+handler from two threads, with a card loader standing in for the DB lookup
+(it sleeps --loader-ms per call; budget tracking is switched off). Every call must return within --deadline seconds;
+otherwise, e.g. when the lookup re-enters the detector lock, the script
+exits with status 1.
+
+Usage:
+    python bench_benefit_alerts.py --events 200000 --users 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# 수집 핸들러를 그대로 부르므로 예산 카운터 파일은 만들지 않는다
+os.environ.setdefault("BUDGET_TRACKING_ENABLED", "0")
+
+import benefit_alerts  # noqa: E402
+from benefit_alerts import IngestRequest, MissedBenefitDetector, ingest_transactions  # noqa: E402
+from benefit_extractor import CATEGORY_KEYWORDS  # noqa: E402
+
+TARGET_EVENTS_PER_S = 10_000
+NOISE_MERCHANTS = ["홍길동", "ATM 출금", "이체", "(주)한빛상사", "월세"]
+
+
+def synthetic_events(n_events: int, n_users: int, seed: int = 7):
+    rng = random.Random(seed)
+    merchants = [f"{kw} {i}호점" for kws in CATEGORY_KEYWORDS.values() for kw in kws for i in range(3)]
+    merchants += NOISE_MERCHANTS
+    for i in range(n_events):
+        day = 1 + (i * 28 // n_events)
+        yield {
+            "fintech_use_num": f"user-{rng.randrange(n_users)}",
+            "tran_date": f"202510{day:02d}",
+            "inout_type": "출금" if rng.random() < 0.9 else "입금",
+            "printed_content": rng.choice(merchants),
+            "tran_amt": rng.choice([4500, 12000, 35000, 58000, 120000]),
+        }
+
+
+def unregistered_run(args, names) -> dict:
+    """카드 미등록 사용자 이벤트를 두 스레드에서 수집 - 카드 조회가 잠금을 막지 않는지 확인"""
+    loads = []
+
+    def loader(fintech_use_num: str):
+        loads.append(fintech_use_num)
+        time.sleep(args.loader_ms / 1000)
+        return random.Random(fintech_use_num).sample(names, 1)
+
+    detector = benefit_alerts.detector = MissedBenefitDetector(cards_loader=loader)
+    events = list(synthetic_events(args.unregistered_events, args.unregistered_users, seed=11))
+
+    def ingest(part):
+        for i in range(0, len(part), 50):
+            ingest_transactions(IngestRequest(transactions=part[i:i + 50]))
+
+    threads = [threading.Thread(target=ingest, args=(part,), daemon=True) for part in (events[0::2], events[1::2])]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=max(0.0, args.deadline - (time.perf_counter() - started)))
+    return {
+        "events": len(events),
+        "returned": not any(thread.is_alive() for thread in threads),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "users": len(detector.users),
+        "card_loads": len(loads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Missed-benefit detector throughput benchmark")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--unregistered-events", type=int, default=2_000)
+    parser.add_argument("--unregistered-users", type=int, default=200)
+    parser.add_argument("--loader-ms", type=float, default=1.0, help="미등록 사용자 카드 조회 지연")
+    parser.add_argument("--deadline", type=float, default=30.0, help="미등록 사용자 처리 제한 시간(초)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    detector = MissedBenefitDetector(cards_loader=None)
+    rng = random.Random(3)
+    names = [detector.sim.cards[cid]["name"] for cid in detector.sim.card_ids]
+    for u in range(args.users):
+        detector.set_user_cards(f"user-{u}", rng.sample(names, rng.choice([1, 2])))
+
+    events = list(synthetic_events(args.events, args.users))
+    started = time.perf_counter()
+    detector.process_many(events)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "events": args.events,
+        "users": args.users,
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(args.events / elapsed),
+        "target_met": args.events / elapsed >= TARGET_EVENTS_PER_S,
+        "alerts": detector.stats["alerts"],
+        "skipped": detector.stats["skipped"],
+        "unregistered": unregistered_run(args, names),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if not result["unregistered"]["returned"]:
+        print(f"❌ 미등록 사용자 처리가 {args.deadline}초 안에 끝나지 않았습니다 (교착 의심)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
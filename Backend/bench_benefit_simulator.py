@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch benchmark for benefit_simulator.
+
+Generates a synthetic users x categories monthly spend matrix (log-normal
+amounts, sparse category usage) and scores it against every card in the
+benefit index, reporting wall time for the savings matrix and top-k.
+
+Usage:
+    python bench_benefit_simulator.py --users 100000 --top-k 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benefit_simulator import DEFAULT_CHUNK_SIZE, BenefitSimulator
+
+
+def synthetic_spend(n_users: int, n_categories: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    spend = rng.lognormal(mean=11.0, sigma=1.0, size=(n_users, n_categories)).astype(np.float32)
+    # 사용자마다 일부 카테고리만 사용
+    spend *= rng.random((n_users, n_categories)) < 0.35
+    return spend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benefit simulator batch benchmark")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    sim = BenefitSimulator.from_card_data()
+    spend = synthetic_spend(args.users, len(sim.categories))
+
+    simulate_times, topk_times = [], []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        savings = sim.simulate(spend, chunk_size=args.chunk_size)
+        simulate_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        sim.top_k(savings, args.top_k)
+        topk_times.append(time.perf_counter() - started)
+
+    result = {
+        "users": args.users,
+        "cards": len(sim.card_ids),
+        "categories": len(sim.categories),
+        "chunk_size": args.chunk_size,
+        "simulate_best_s": round(min(simulate_times), 4),
+        "top_k_best_s": round(min(topk_times), 4),
+        "pairs_per_s": round(args.users * len(sim.card_ids) / min(simulate_times)),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test for category_budgets: many users' transactions written concurrently.
+
+--writers processes (like serve.py workers / the tailer) each push
+--batches batches of --batch-size synthetic withdrawals for random users
+(synthetic_db merchants) into one BudgetStore via record_many. Meanwhile
+--readers threads keep asking remaining() for random users (one query
+per --read-interval-ms each). Every user has
+targets, so the over-budget crossing check runs on every write.
+
+Reports write throughput and batch latency, read latency, the number of
+budget crossings and, once the writers are done, whether every counter equals
+the sum of what was written (lost updates -> mismatches > 0). Every batch is
+then recorded a second time, the way the tailer re-reads a batch after a
+crash or reads rows already posted to /alerts/ingest. The counters must not
+move (replay_mismatches 0, replay_counted 0). As a baseline
+it also times the same "remaining" check answered by recomputing the user's
+month from a transactions table that holds the same rows, next to the
+counter read on an idle store (the recompute cost grows with the user's
+rows in the month, the counter read does not).
+
+Usage:
+    python bench_category_budgets.py --users 1000 --writers 4 --batches 300 --batch-size 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from benefit_extractor import spend_category
+from category_budgets import TOTAL_CATEGORY, BudgetStore
+from synthetic_db import MERCHANTS, fintech_use_num
+
+MONTH = "202510"
+
+
+def writer_batches(writer: int, args) -> List[List[Dict[str, Any]]]:
+    """writer 별 결정적 거래 묶음 (검증·기준선에서 다시 생성)"""
+    rng = random.Random(1000 + writer)
+    batches = []
+    for _ in range(args.batches):
+        batch = []
+        for _ in range(args.batch_size):
+            content, low, high = rng.choice(MERCHANTS)
+            batch.append({
+                "fintech_use_num": fintech_use_num(rng.randrange(args.users)),
+                "tran_date": f"{MONTH}{rng.randint(1, 28):02d}",
+                "tran_time": f"{rng.randrange(24):02d}{rng.randrange(60):02d}{rng.randrange(60):02d}",
+                "inout_type": "출금",
+                "printed_content": content,
+                "tran_amt": rng.randint(low, high) // 100 * 100,
+            })
+        batches.append(batch)
+    return batches
+
+
+def run_writer(job: Tuple[int, str, Any]) -> Dict[str, Any]:
+    writer, path, args = job
+    store = BudgetStore(path)
+    latencies, crossed = [], 0
+    for batch in writer_batches(writer, args):
+        started = time.perf_counter()
+        crossed += len(store.record_many(batch))
+        latencies.append(time.perf_counter() - started)
+    return {"latencies": latencies, "crossed": crossed}
+
+
+def percentiles(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None}
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(values, 95)) * 1000, 3),
+    }
+
+
+def idle_reads(store: BudgetStore, args, samples: int) -> Dict[str, Any]:
+    """쓰기가 끝난 뒤 카운터 조회 지연 (기준선과 같은 조건)"""
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        store.remaining(fintech_use_num(rng.randrange(args.users)), "카페", MONTH)
+        latencies.append(time.perf_counter() - started)
+    return percentiles(latencies)
+
+
+def recompute_baseline(tmp: str, args, rows: List[Dict[str, Any]], samples: int) -> Dict[str, Any]:
+    """카운터 없이 매번 transactions 에서 그 달 카테고리 지출을 다시 집계하는 경우"""
+    conn = sqlite3.connect(os.path.join(tmp, "transactions.sqlite"))
+    conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, fintech_use_num TEXT, tran_date TEXT,"
+                 " inout_type TEXT, printed_content TEXT, tran_amt INTEGER)")
+    conn.execute("CREATE INDEX idx_tx_user_date ON transactions (fintech_use_num, tran_date)")
+    conn.executemany(
+        "INSERT INTO transactions (fintech_use_num, tran_date, inout_type, printed_content, tran_amt)"
+        " VALUES (:fintech_use_num, :tran_date, :inout_type, :printed_content, :tran_amt)", rows)
+    conn.commit()
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(samples):
+        fin = fintech_use_num(rng.randrange(args.users))
+        started = time.perf_counter()
+        spent = 0
+        for content, total in conn.execute(
+                "SELECT printed_content, SUM(tran_amt) FROM transactions WHERE fintech_use_num = ?"
+                " AND tran_date BETWEEN ? AND ? AND inout_type = ? GROUP BY printed_content",
+                (fin, f"{MONTH}01", f"{MONTH}31", "출금")):
+            if spend_category(content) == "카페":
+                spent += total
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return percentiles(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Category budget concurrent load test")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--writers", type=int, default=4, help="동시 쓰기 프로세스 수")
+    parser.add_argument("--batches", type=int, default=300, help="writer 당 묶음 수")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=2, help="동시 조회 스레드 수")
+    parser.add_argument("--read-interval-ms", type=float, default=1.0, help="조회 스레드의 조회 간격")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "budgets.sqlite")
+        store = BudgetStore(path)
+        for u in range(args.users):
+            store.set_targets(fintech_use_num(u), {"카페": 50_000, "배달앱": 100_000, TOTAL_CATEGORY: 1_500_000})
+
+        read_latencies: List[float] = []
+        done = threading.Event()
+
+        def reader(seed_value: int):
+            rng = random.Random(seed_value)
+            while not done.is_set():
+                started = time.perf_counter()
+                store.remaining(fintech_use_num(rng.randrange(args.users)), "카페", MONTH)
+                read_latencies.append(time.perf_counter() - started)
+                done.wait(args.read_interval_ms / 1000)
+
+        threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        # spawn: 조회 스레드가 돌고 있는 프로세스를 fork 하면 잠금 상태까지 복제된다
+        with multiprocessing.get_context("spawn").Pool(args.writers) as pool:
+            results = pool.map(run_writer, [(w, path, args) for w in range(args.writers)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        # 검증: 카운터 == 쓴 거래(같은 거래 키는 한 번)의 합
+        expected: Dict[Tuple[str, str], int] = {}
+        batches = [batch for w in range(args.writers) for batch in writer_batches(w, args)]
+        rows = [tx for batch in batches for tx in batch]
+        applied = set()
+        for batch in batches:
+            for key, fin, _, category, amount in BudgetStore.keyed(batch)[0]:
+                if key in applied:
+                    continue
+                applied.add(key)
+                for name in (category, TOTAL_CATEGORY):
+                    expected[(fin, name)] = expected.get((fin, name), 0) + amount
+
+        def counters() -> Dict[Tuple[str, str], int]:
+            conn = sqlite3.connect(path)
+            try:
+                return {(fin, category): spent for fin, category, spent in conn.execute(
+                    "SELECT fintech_use_num, category, spent FROM budget_spend WHERE month = ?", (MONTH,))}
+            finally:
+                conn.close()
+
+        actual = counters()
+        mismatches = sum(1 for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
+
+        # 재반영: 같은 묶음을 다시 기록해도 카운터가 움직이지 않아야 한다
+        counted_before = store.stats["counted"]
+        replay_crossed = sum(len(store.record_many(batch)) for batch in batches)
+        replayed = counters()
+        replay_mismatches = sum(1 for key in actual.keys() | replayed.keys() if actual.get(key) != replayed.get(key))
+
+        write_latencies = [value for result in results for value in result["latencies"]]
+        report = {
+            "users": args.users,
+            "writers": args.writers,
+            "transactions": len(rows),
+            "elapsed_s": round(elapsed, 2),
+            "tx_per_s": round(len(rows) / elapsed),
+            "write_batch": percentiles(write_latencies),
+            "reads": len(read_latencies),
+            "read": percentiles(read_latencies),
+            "crossed": sum(result["crossed"] for result in results),
+            "counters": len(actual),
+            "mismatches": mismatches,
+            "duplicates_in_input": len(rows) - len(applied),
+            "replay_counted": store.stats["counted"] - counted_before,
+            "replay_crossed": replay_crossed,
+            "replay_mismatches": replay_mismatches,
+            "idle_read": idle_reads(store, args, samples=500),
+            "recompute_read": recompute_baseline(tmp, args, rows, samples=500),
+        }
+    print(json.dumps(report, ensure_ascii=False))
+    failed = report["mismatches"] or report["replay_mismatches"] or report["replay_counted"]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if failed:
+        print("❌ 카운터가 기록한 거래 합과 다르거나 재반영으로 바뀌었습니다")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
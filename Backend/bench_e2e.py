@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline end-to-end benchmark for main_api (/analyze, /search, /chat).
+
+Boots `uvicorn main_api:app` in a subprocess against deterministic
+stand-ins for every external dependency:
+
+- DB: a SQLite file seeded by synthetic_db.py, served through the same
+  mcp_server tools (DB_BACKEND=sqlite, forwarded to the MCP subprocess).
+- LLM: llm_provider.FakeChatModel (LLM_PROVIDER=fake) with a fixed
+  FAKE_LLM_LATENCY_MS per call.
+- Vector store: Milvus Lite on a local file (--milvus-uri; the first run
+  ingests the catalogue, later runs reuse it). The embedding model is the
+  configured local backend (EMBEDDING_BACKEND / EMBEDDING_SERVER_URL).
+
+Each endpoint is driven at each concurrency level for a fixed duration with
+the /search response cache disabled. The report (one JSON document) holds
+throughput, p50/p95/p99, errors and server RSS per level plus the git
+commit, so runs can be diffed across commits.
+
+Usage:
+    python bench_e2e.py --concurrency 1 4 16 --duration 15 --output bench_e2e.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from bench_workers import QUERIES, free_port, tree_rss_mb, wait_ready
+from synthetic_db import seed
+
+HERE = Path(__file__).resolve().parent
+ENDPOINTS = ("analyze", "search", "chat")
+CHAT_MESSAGES = ["이번 달 카페 지출이 많았어?", "교통비 줄이는 방법 알려줘", "지난번에 추천한 카드 기억해?"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def payload_factory(endpoint: str, users: List[str]) -> Callable[[int], Dict]:
+    if endpoint == "analyze":
+        return lambda n: {"fintech_use_num": users[n % len(users)]}
+    if endpoint == "search":
+        return lambda n: {"query": QUERIES[n % len(QUERIES)], "top_k": 5}
+    return lambda n: {"thread_id": f"bench-{n % 64}", "message": CHAT_MESSAGES[n % len(CHAT_MESSAGES)]}
+
+
+async def drive(base_url: str, endpoint: str, make_payload: Callable[[int], Dict],
+                concurrency: int, duration: float):
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def client_loop(i: int):
+            nonlocal errors
+            n = i
+            while time.perf_counter() < deadline:
+                payload = make_payload(n)
+                n += concurrency
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post(f"/{endpoint}", json=payload)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def summarize(endpoint: str, concurrency: int, latencies: List[float], errors: int,
+              elapsed: float, rss: float) -> Dict:
+    report = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / elapsed, 2),
+        "rss_mb": round(rss, 1),
+    }
+    for q in (50, 95, 99):
+        report[f"p{q}_ms"] = round(float(np.percentile(latencies, q)) * 1000, 2) if latencies else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for main_api")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tx-per-user", type=int, default=300)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--milvus-uri", default=str(HERE / "bench_card_benefits.db"))
+    parser.add_argument("--startup-timeout", type=float, default=900.0)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_e2e_") as tmp:
+        db_path = os.path.join(tmp, "transactions.sqlite")
+        users = seed(db_path, args.users, args.tx_per_user)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = dict(
+            os.environ,
+            DB_BACKEND="sqlite",
+            SQLITE_DB_PATH=db_path,
+            LLM_PROVIDER="fake",
+            FAKE_LLM_LATENCY_MS=str(args.llm_latency_ms),
+            MILVUS_URI=args.milvus_uri,
+            SEARCH_BACKEND=os.getenv("SEARCH_BACKEND", "milvus"),
+            SEARCH_CACHE_SIZE="0",
+            ANALYSIS_STORE_ENABLED="0",
+            LONG_TERM_MEMORY_PATH=os.path.join(tmp, "long_term_memory.json"),
+            CHAT_CHECKPOINTER="memory",
+        )
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main_api:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=HERE, env=env, start_new_session=True,
+        )
+        results = []
+        try:
+            started = time.perf_counter()
+            wait_ready(base_url, proc, args.startup_timeout)
+            startup_s = time.perf_counter() - started
+            for endpoint in args.endpoints:
+                make_payload = payload_factory(endpoint, users)
+                asyncio.run(drive(base_url, endpoint, make_payload, 1, args.warmup))
+                for concurrency in args.concurrency:
+                    latencies, errors, elapsed = asyncio.run(
+                        drive(base_url, endpoint, make_payload, concurrency, args.duration))
+                    report = summarize(endpoint, concurrency, latencies, errors, elapsed, tree_rss_mb(proc.pid))
+                    results.append(report)
+                    print(json.dumps(report, ensure_ascii=False))
+        finally:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=60)
+
+    document = {
+        "commit": git_commit(),
+        "config": {
+            "users": args.users,
+            "tx_per_user": args.tx_per_user,
+            "llm_latency_ms": args.llm_latency_ms,
+            "duration_s": args.duration,
+            "search_backend": env["SEARCH_BACKEND"],
+            "embedding_backend": os.getenv("EMBEDDING_BACKEND", "bge-m3"),
+        },
+        "startup_s": round(startup_s, 2),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(document, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
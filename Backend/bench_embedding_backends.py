@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding backend benchmark: PyTorch BGE-M3 vs ONNX Runtime int8.
+
+Each backend runs in its own subprocess so RSS is measured in isolation.
+Workers embed every card's benefits_text (documents) and a fixed query set
+drawn from cardgorilla_top100_detailed.json (one benefit line from every
+5th card), time single-query latency, and dump the vectors. The parent
+compares them against the reference backend:
+
+- latency p50/p95 per query, document throughput
+- RSS after loading the model and after encoding
+- dense cosine similarity to the reference vectors
+- recall@5 parity: overlap of top-5 cards (dense IP + sparse, RRF-fused)
+
+Usage:
+    python bench_embedding_backends.py --backends bge-m3 onnx-int8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from scipy import sparse as sp
+
+from embedding_backends import EMBEDDING_BACKENDS, create_embedding_function
+
+CARD_JSON = Path("card_data/cardgorilla_top100_detailed.json")
+QUERY_STRIDE = 5
+RRF_K = 60
+TOP_K = 5
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_corpus():
+    cards = json.loads(CARD_JSON.read_text(encoding="utf-8"))
+    documents, queries = [], []
+    for i, card in enumerate(cards):
+        benefits = card.get("description_text", {}).get("benefits_text", []) or []
+        documents.append("; ".join(benefits))
+        if i % QUERY_STRIDE == 0 and benefits:
+            queries.append(benefits[0])
+    return documents, queries
+
+
+def run_worker(backend: str, output: str):
+    documents, queries = load_corpus()
+    base_rss = rss_mb()
+    started = time.perf_counter()
+    embedding_fn = create_embedding_function(backend, server_url="")
+    load_s = time.perf_counter() - started
+    loaded_rss = rss_mb()
+
+    started = time.perf_counter()
+    docs = embedding_fn.encode_documents(documents)
+    docs_s = time.perf_counter() - started
+
+    embedding_fn.encode_queries(queries[:1])  # warm-up
+    latencies, query_dense, query_sparse = [], [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        emb = embedding_fn.encode_queries([query])
+        latencies.append(time.perf_counter() - t0)
+        query_dense.append(np.asarray(emb["dense"][0], dtype=np.float32))
+        query_sparse.append(emb["sparse"].tocsr())
+
+    doc_sparse = docs["sparse"].tocsr()
+    qs = sp.vstack(query_sparse).tocsr()
+    np.savez(
+        output,
+        doc_dense=np.vstack(docs["dense"]).astype(np.float32),
+        doc_sparse_data=doc_sparse.data, doc_sparse_indices=doc_sparse.indices,
+        doc_sparse_indptr=doc_sparse.indptr, doc_sparse_shape=np.array(doc_sparse.shape),
+        q_dense=np.vstack(query_dense),
+        q_sparse_data=qs.data, q_sparse_indices=qs.indices,
+        q_sparse_indptr=qs.indptr, q_sparse_shape=np.array(qs.shape),
+        stats=np.array(json.dumps({
+            "backend": backend,
+            "load_s": round(load_s, 2),
+            "docs_per_s": round(len(documents) / docs_s, 1),
+            "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "query_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+            "rss_model_mb": round(loaded_rss - base_rss, 1),
+            "rss_peak_mb": round(rss_mb(), 1),
+        })),
+    )
+
+
+def _csr(data, prefix: str) -> sp.csr_matrix:
+    return sp.csr_matrix(
+        (data[f"{prefix}_data"], data[f"{prefix}_indices"], data[f"{prefix}_indptr"]),
+        shape=tuple(data[f"{prefix}_shape"]),
+    )
+
+
+def hybrid_top_k(data) -> List[List[int]]:
+    dense_scores = data["q_dense"] @ data["doc_dense"].T
+    sparse_scores = (_csr(data, "q_sparse") @ _csr(data, "doc_sparse").T).toarray()
+    results = []
+    for dense_row, sparse_row in zip(dense_scores, sparse_scores):
+        fused = np.zeros(dense_row.shape[0])
+        for scores, valid in ((dense_row, np.ones_like(dense_row, bool)), (sparse_row, sparse_row > 0)):
+            candidates = np.flatnonzero(valid)
+            ordered = candidates[np.argsort(-scores[candidates], kind="stable")][:TOP_K * 2]
+            fused[ordered] += 1.0 / (RRF_K + np.arange(1, ordered.size + 1))
+        results.append(list(np.argsort(-fused, kind="stable")[:TOP_K]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--threads", type=int, default=None, help="ONNX_INTRA_OP_THREADS")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--dump", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.dump)
+        return
+
+    env = dict(os.environ)
+    if args.threads:
+        env["ONNX_INTRA_OP_THREADS"] = str(args.threads)
+
+    dumps: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            dump = os.path.join(tmp, f"{backend}.npz")
+            subprocess.run(
+                [sys.executable, __file__, "--worker", backend, "--dump", dump],
+                check=True, env=env,
+            )
+            with np.load(dump) as data:
+                dumps[backend] = {key: data[key] for key in data.files}
+
+    reference = args.backends[0]
+    ref_top = hybrid_top_k(dumps[reference])
+    reports = []
+    for backend in args.backends:
+        data = dumps[backend]
+        report = json.loads(str(data["stats"]))
+        top = hybrid_top_k(data)
+        report["recall@5_vs_" + reference] = round(float(np.mean(
+            [len(set(a) & set(b)) / TOP_K for a, b in zip(top, ref_top)]
+        )), 3)
+        report["dense_cosine_vs_" + reference] = round(float(np.mean(
+            np.sum(data["doc_dense"] * dumps[reference]["doc_dense"], axis=1)
+        )), 4)
+        reports.append(report)
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
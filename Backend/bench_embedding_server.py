@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark for embedding_server.py micro-batching.
+
+Sends single-text query requests from N concurrent clients to a running
+embedding server and reports requests/s, latency percentiles and the
+average batch size the server actually formed (from /info).
+
+Usage:
+    python embedding_server.py &
+    python bench_embedding_server.py --url http://127.0.0.1:9700 --concurrency 1 8 32
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from embedding_backends import EMBEDDING_SERVER_URL, RemoteEmbeddingFunction
+
+QUERIES = [
+    "대중교통 할인 카드 추천", "편의점 10% 할인", "주유 리터당 할인", "카페 할인",
+    "해외 결제 수수료 면제", "구독 서비스 할인", "온라인 쇼핑 적립", "통신비 할인",
+]
+
+
+def run_level(url: str, concurrency: int, requests: int):
+    clients = [RemoteEmbeddingFunction(url) for _ in range(concurrency)]
+    before = clients[0].client.get("/info").json()["stats"]
+
+    def worker(i: int):
+        latencies = []
+        for j in range(i, requests, concurrency):
+            t0 = time.perf_counter()
+            clients[i].encode_queries([QUERIES[j % len(QUERIES)]])
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = [lat for chunk in pool.map(worker, range(concurrency)) for lat in chunk]
+    elapsed = time.perf_counter() - started
+    after = clients[0].client.get("/info").json()["stats"]
+
+    batches = after["batches"] - before["batches"]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "req_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+        "avg_server_batch": round((after["texts"] - before["texts"]) / max(batches, 1), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding server throughput benchmark")
+    parser.add_argument("--url", default=EMBEDDING_SERVER_URL or "http://127.0.0.1:9700")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    reports = [run_level(args.url, c, args.requests) for c in args.concurrency]
+    for report in reports:
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
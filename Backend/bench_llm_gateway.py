@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate-limit simulation for llm_gateway against a fake provider.
+
+The fake provider (llm_gateway.FakeProviderQuota) allows --provider-limit
+requests per --window seconds and answers anything beyond that with a 429
+(FakeRateLimitError with Retry-After). Interactive callers (chat: one call,
+then think time) and batch callers (analysis: back-to-back calls) run for
+--duration seconds in two modes:
+
+- naive: every caller hits the provider directly and retries 429s like the
+  SDK default (2 retries, short exponential backoff), i.e. the old setup.
+- gateway: every call goes through one LLMGateway (its RPM deliberately set
+  to --gateway-rpm, above the real limit, so the adaptive backoff has to
+  find the limit).
+
+Reports completed / failed calls per lane, latency percentiles (queueing
+included), how many 429s the provider returned and the most calls the
+provider saw in flight at once.
+
+The gateway run is also a regression check. The script exits with status 1
+when any of these fails:
+- an interactive call failed;
+- the provider returned more than --max-429-per-s 429s per second;
+- more than --max-concurrency calls were in flight at the provider.
+
+Usage:
+    python bench_llm_gateway.py --duration 20 --interactive 4 --batch 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from llm_gateway import FakeProviderQuota, LLMGateway, is_rate_limit, retry_after
+
+
+class FakeProvider:
+    def __init__(self, limit: int, window: float, latency: float, tokens: int):
+        self.quota = FakeProviderQuota(rpm=limit, window=window)
+        self.latency = latency
+        self.tokens = tokens
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self) -> int:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            try:
+                self.quota.check(self.tokens)
+            except Exception:
+                self.rejected += 1
+                await asyncio.sleep(0.005)  # 429 응답 왕복
+                raise
+            await asyncio.sleep(self.latency * random.uniform(0.8, 1.2))
+            return self.tokens
+        finally:
+            self.in_flight -= 1
+
+
+async def naive_call(provider: FakeProvider, retries: int = 2):
+    for attempt in range(retries + 1):
+        try:
+            return await provider.complete()
+        except Exception as exc:
+            if not is_rate_limit(exc) or attempt == retries:
+                raise
+            await asyncio.sleep(min(retry_after(exc) or 0.5, 0.5 * 2 ** attempt))
+
+
+async def run_mode(mode: str, args) -> Dict:
+    provider = FakeProvider(args.provider_limit, args.window, args.latency_ms / 1000, args.tokens)
+    gateway = LLMGateway(max_concurrency=args.max_concurrency, rpm=args.gateway_rpm, tpm=args.gateway_tpm,
+                         max_retries=3, backoff_base=0.25, backoff_max=5.0)
+    latencies: Dict[str, List[float]] = {"interactive": [], "batch": []}
+    failed = {"interactive": 0, "batch": 0}
+    started_at = time.perf_counter()
+    deadline = started_at + args.duration
+
+    async def one_call(lane: str):
+        started = time.perf_counter()
+        try:
+            if mode == "gateway":
+                await gateway.acall(provider.complete, lane, args.tokens)
+            else:
+                await naive_call(provider)
+            latencies[lane].append(time.perf_counter() - started)
+        except Exception:
+            failed[lane] += 1
+
+    async def caller(lane: str):
+        while time.perf_counter() < deadline:
+            await one_call(lane)
+            if lane == "interactive":
+                await asyncio.sleep(args.think_ms / 1000)
+
+    await asyncio.gather(*([caller("interactive") for _ in range(args.interactive)]
+                           + [caller("batch") for _ in range(args.batch)]))
+
+    elapsed = time.perf_counter() - started_at
+    report = {"mode": mode, "provider_429": provider.rejected,
+              "provider_429_per_s": round(provider.rejected / elapsed, 2),
+              "max_in_flight": provider.max_in_flight}
+    for lane, values in latencies.items():
+        report[lane] = {
+            "completed": len(values),
+            "failed": failed[lane],
+            "p50_ms": round(float(np.percentile(values, 50)) * 1000, 1) if values else None,
+            "p95_ms": round(float(np.percentile(values, 95)) * 1000, 1) if values else None,
+        }
+    if mode == "gateway":
+        summary = gateway.summary()
+        report["gateway"] = {key: summary[key] for key in ("rate_limited", "retries", "gave_up", "rate_scale")}
+    return report
+
+
+def regressions(report: Dict, args) -> List[str]:
+    """게이트웨이 실행이 지켜야 할 조건 - 어긴 항목 설명 목록 (비어 있으면 통과)"""
+    problems = []
+    if report["interactive"]["failed"]:
+        problems.append(f"interactive 호출 실패 {report['interactive']['failed']}건")
+    if report["provider_429_per_s"] > args.max_429_per_s:
+        problems.append(f"provider 429 초당 {report['provider_429_per_s']}회 > {args.max_429_per_s}")
+    if report["max_in_flight"] > args.max_concurrency:
+        problems.append(f"동시 호출 {report['max_in_flight']} > 상한 {args.max_concurrency}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM gateway rate-limit simulation")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interactive", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--think-ms", type=float, default=500.0)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--tokens", type=int, default=1500)
+    parser.add_argument("--provider-limit", type=int, default=10, help="window 당 허용 요청 수")
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--gateway-rpm", type=float, default=900.0)
+    parser.add_argument("--gateway-tpm", type=float, default=2_000_000.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-429-per-s", type=float, default=5.0, help="게이트웨이 실행에서 허용할 초당 429 수")
+    parser.add_argument("--modes", nargs="+", choices=("naive", "gateway"), default=["naive", "gateway"])
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    reports, problems = [], []
+    for mode in args.modes:
+        report = asyncio.run(run_mode(mode, args))
+        if mode == "gateway":
+            report["regressions"] = regressions(report, args)
+            problems += report["regressions"]
+        reports.append(report)
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+    if problems:
+        print("❌ 게이트웨이 회귀: " + "; ".join(problems))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental summary benchmark: cost of a monthly story input, cold vs warm.
+
+Seeds a one-user synthetic SQLite DB (synthetic_db.py) and builds the month
+summaries of its last --months months through period_summaries exactly like
+the /story endpoints do (the MCP tools' SQL, run directly against SQLite).
+For every month it then reports:
+
+- cold: first build (every day summarised, days -> weeks -> month);
+- warm: the same request again (nothing rebuilt, no day rows read);
+- append: after --append new transactions land on one day of the month
+  (one day, one week and the month rebuilt);
+
+with the DB rows read and the latency of each step, plus the tokens of the
+story prompt (render_summary) next to the month's raw rows in the compact
+pipe-table encoding that a direct "send every transaction" story would need.
+
+Usage:
+    python bench_period_summaries.py --transactions 20000 --months 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+from period_summaries import (
+    PeriodSummarizer,
+    SummaryStore,
+    daily_group_query,
+    daily_mark_query,
+    month_days,
+    render_summary,
+)
+from prompt_encoding import TransactionPrompt, count_tokens
+from synthetic_db import seed
+
+
+def query(conn: sqlite3.Connection, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+    return [dict(row) for row in conn.execute(sql.replace("%s", "?"), tuple(params))]
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "transactions.sqlite")
+        fin = seed(db_path, users=1, tx_per_user=args.transactions)[0]
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        account = query(conn, "SELECT * FROM account_balance WHERE fintech_use_num = %s", [fin])[0]
+        rows_read = {"marks": 0, "groups": 0}
+
+        async def fetch_marks(fintech_use_num: str, start: str, end: str):
+            rows = query(conn, *daily_mark_query(fintech_use_num, start, end))
+            rows_read["marks"] += len(rows)
+            return rows
+
+        async def fetch_groups(fintech_use_num: str, start: str, end: str):
+            rows = query(conn, *daily_group_query(fintech_use_num, start, end))
+            rows_read["groups"] += len(rows)
+            return rows
+
+        summarizer = PeriodSummarizer(SummaryStore(os.path.join(tmp, "summaries.sqlite")), fetch_marks, fetch_groups)
+
+        async def step(month: str) -> Dict[str, Any]:
+            rows_read.update(marks=0, groups=0)
+            started = time.perf_counter()
+            built = await summarizer.month(fin, month)
+            work = {key: value for key, value in built["work"].items() if value}
+            return {"ms": round((time.perf_counter() - started) * 1000, 2), "grouped_rows_read": rows_read["groups"],
+                    "work": work, "summary": built["summary"]}
+
+        latest = query(conn, "SELECT MAX(tran_date) AS latest FROM transactions WHERE fintech_use_num = %s", [fin])
+        last_month = latest[0]["latest"][:6]
+        index = int(last_month[:4]) * 12 + int(last_month[4:6]) - 1
+        months = [f"{(index - i) // 12:04d}{(index - i) % 12 + 1:02d}" for i in reversed(range(args.months))]
+
+        reports = []
+        for month in months:
+            days = month_days(month)
+            raw = query(conn, "SELECT * FROM transactions WHERE fintech_use_num = %s AND tran_date BETWEEN %s AND %s"
+                              " ORDER BY tran_datetime", [fin, days[0], days[-1]])
+            cold = await step(month)
+            warm = await step(month)
+            day = days[len(days) // 2]
+            conn.executemany(
+                "INSERT INTO transactions (fintech_use_num, tran_date, tran_time, tran_datetime, inout_type,"
+                " tran_type, printed_content, tran_amt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(fin, day, "120000", f"{day[:4]}-{day[4:6]}-{day[6:]} 12:00:00", "출금", "카드", "스타벅스 강남점", 4500)]
+                * args.append,
+            )
+            conn.commit()
+            appended = await step(month)
+            report = {
+                "month": month,
+                "transactions": len(raw),
+                "story_prompt_tokens": count_tokens(render_summary(appended["summary"])),
+                "raw_rows_tokens": count_tokens(TransactionPrompt(account, raw, limit=len(raw)).table()),
+            }
+            for name, result in (("cold", cold), ("warm", warm), ("append", appended)):
+                report[name] = {key: value for key, value in result.items() if key != "summary"}
+            reports.append(report)
+        conn.close()
+        return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hierarchical period summary benchmark")
+    parser.add_argument("--transactions", type=int, default=20000, help="1년치 합성 거래 수")
+    parser.add_argument("--months", type=int, default=3, help="측정할 최근 월 수")
+    parser.add_argument("--append", type=int, default=5, help="월 중간 하루에 추가할 거래 수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run(args))
+    for report in reports:
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prompt token benchmark: legacy JSON/bullet encoding vs compact table.
+
+Seeds a synthetic SQLite DB (synthetic_db.py), fetches each user's account
+row and latest 100 transactions exactly like the MCP tools (`SELECT *`),
+and counts the data-part tokens of the draft / reflection / revision calls
+for both encodings (prompt_encoding.token_report). Uses tiktoken when
+installed.
+
+Usage:
+    python bench_prompt_encoding.py --users 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from prompt_encoding import TransactionPrompt, _tokenizer, token_report
+from synthetic_db import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt encoding token benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tx-per-user", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=100, help="사용자별 조회 거래 수 (/analyze 와 동일)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        users = seed(db_path, args.users, args.tx_per_user)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        samples = []
+        for fin in users:
+            account = dict(conn.execute(
+                "SELECT * FROM account_balance WHERE fintech_use_num = ? LIMIT 1", (fin,)).fetchone())
+            rows = [dict(r) for r in conn.execute(
+                "SELECT * FROM transactions WHERE fintech_use_num = ? ORDER BY tran_datetime DESC LIMIT ?",
+                (fin, args.limit))]
+            samples.append((account, rows))
+        conn.close()
+
+    reports = [token_report(account, rows) for account, rows in samples]
+    started = time.perf_counter()
+    for account, rows in samples:
+        TransactionPrompt(account, rows).section()
+    encode_ms = (time.perf_counter() - started) * 1000 / len(samples)
+
+    summary = {
+        "tokenizer": "tiktoken" if _tokenizer() is not None else "estimate(chars/2)",
+        "users": len(samples),
+        "encode_ms_per_request": round(encode_ms, 3),
+    }
+    for call in ("draft", "reflection", "revision", "total"):
+        before = float(np.mean([r["before"][call] for r in reports]))
+        after = float(np.mean([r["after"][call] for r in reports]))
+        summary[call] = {"before": round(before, 1), "after": round(after, 1),
+                         "reduction": round(1 - after / before, 3)}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parse-only benchmark for card_gorila_scraper over saved HTML snapshots.
+
+Every snapshot in the SnapshotCache is parsed with each parser backend
+(no browser, no network). The output of each backend is compared with the
+reference 'html.parser' output, so a faster backend can only be adopted
+when it produces identical card records.
+
+Usage:
+    python bench_scraper_parse.py --snapshot-dir html_snapshots --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Dict, List, Tuple
+
+from card_gorila_scraper import (
+    CardGorillaScraper,
+    DETAIL_LINK_RE,
+    LXML_AVAILABLE,
+    PARSER_BACKENDS,
+    SnapshotCache,
+    make_soup,
+)
+
+REFERENCE_BACKEND = "html.parser"
+VOLATILE_KEYS = {"scraped_at"}
+
+
+def load_fixtures(snapshot_dir: str) -> List[Tuple[str, str]]:
+    """(url, html) 목록 - URL별 최신 스냅샷"""
+    snapshots = SnapshotCache(snapshot_dir)
+    fixtures = []
+    for url in snapshots.urls():
+        meta = snapshots.lookup(url)
+        if meta:
+            fixtures.append((url, snapshots.read(meta["sha256"])))
+    return fixtures
+
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def parse_fixture(scraper: CardGorillaScraper, url: str, html: str):
+    soup = make_soup(html, scraper.parser_backend)
+    if DETAIL_LINK_RE.search(url):
+        return scraper.parse_card_detail(soup, url)
+    return scraper.parse_top100_page(soup)
+
+
+def run_backend(backend: str, fixtures: List[Tuple[str, str]], repeat: int) -> Tuple[Dict, Dict]:
+    scraper = CardGorillaScraper(use_playwright=False, parser_backend=backend)
+    outputs: Dict[str, object] = {}
+    timings: List[float] = []
+
+    # 파서 내부의 진행 로그 출력이 측정에 섞이지 않도록 stdout을 버린다
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for url, html in fixtures:
+                outputs[url] = parse_fixture(scraper, url, html)
+            timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    stats = {
+        "backend": backend,
+        "pages": len(fixtures),
+        "best_total_s": round(best, 4),
+        "mean_total_s": round(sum(timings) / len(timings), 4),
+        "ms_per_page": round(best * 1000 / max(len(fixtures), 1), 3),
+    }
+    return stats, {url: _strip_volatile(out) for url, out in outputs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper parse-only benchmark")
+    parser.add_argument("--snapshot-dir", default="html_snapshots")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.snapshot_dir)
+    if not fixtures:
+        raise SystemExit(f"{args.snapshot_dir} 에 스냅샷이 없습니다. 먼저 스크래퍼를 실행하세요.")
+
+    backends = [b for b in PARSER_BACKENDS if b != "lxml" or LXML_AVAILABLE]
+    results = []
+    reference = None
+    for backend in sorted(backends, key=lambda b: b != REFERENCE_BACKEND):
+        stats, outputs = run_backend(backend, fixtures, args.repeat)
+        if backend == REFERENCE_BACKEND:
+            reference = outputs
+        mismatched = [url for url in outputs if outputs[url] != reference.get(url)]
+        stats["parity"] = not mismatched
+        stats["mismatched_pages"] = mismatched[:10]
+        results.append(stats)
+
+    baseline = results[0]["best_total_s"]
+    for stats in results:
+        stats["speedup"] = round(baseline / stats["best_total_s"], 2) if stats["best_total_s"] else None
+        print(f"{stats['backend']:12s} {stats['ms_per_page']:8.3f} ms/page  "
+              f"x{stats['speedup']}  parity={'OK' if stats['parity'] else 'MISMATCH'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
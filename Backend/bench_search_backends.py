@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency benchmark for card_benefit_api search backends (Milvus vs in-memory).
+
+Query embeddings are computed once up front, so only the backend search
+(+ weighted fusion) is timed. Reports p50/p99 latency, QPS and top-k overlap with
+the Milvus results.
+
+Usage:
+    python bench_search_backends.py --rounds 50 --top-k 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from card_benefit_api import SEARCH_BACKENDS, SearchFilters, create_search_backend, encode_query
+
+QUERIES = [
+    "대중교통 할인 카드 추천",
+    "편의점 10% 할인",
+    "주유 리터당 할인",
+    "카페 스타벅스 할인",
+    "해외 결제 수수료 면제",
+    "넷플릭스 유튜브 구독 할인",
+    "온라인 쇼핑 적립",
+    "공과금 통신비 할인",
+    "전월실적 없는 무조건 할인",
+    "항공 마일리지 적립",
+]
+FILTERS = [None, SearchFilters(max_rank=30), SearchFilters(issuers=["신한카드", "삼성카드"])]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(values), q))
+
+
+def run_backend(name: str, encoded, top_k: int, rounds: int) -> Dict:
+    backend = create_search_backend(name)
+    for dense, sparse, filters in encoded:  # warm-up
+        backend.search(dense, sparse, top_k, filters)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for dense, sparse, filters in encoded:
+            t0 = time.perf_counter()
+            backend.search(dense, sparse, top_k, filters)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    results = [[hit["name"] for hit in backend.search(d, s, top_k, f)] for d, s, f in encoded]
+    return {
+        "backend": name,
+        "searches": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "qps": round(len(latencies) / elapsed, 1),
+        "_results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search backend latency benchmark")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=sorted(set(SEARCH_BACKENDS) - {"remote"}))
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    encoded = []
+    for query in QUERIES:
+        dense, sparse = encode_query(query)
+        encoded.extend((dense, sparse, filters) for filters in FILTERS)
+
+    reports = [run_backend(name, encoded, args.top_k, args.rounds) for name in args.backends]
+
+    reference = next((r for r in reports if r["backend"] == "milvus"), reports[0])
+    for report in reports:
+        overlaps = [
+            len(set(a) & set(b)) / max(len(b), 1)
+            for a, b in zip(report["_results"], reference["_results"])
+        ]
+        report["overlap_vs_" + reference["backend"]] = round(float(np.mean(overlaps)), 3)
+    for report in reports:
+        report.pop("_results")
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
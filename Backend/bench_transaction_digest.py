@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Digest benchmark: prompt size and aggregation time vs history length.
+
+For each history length, seeds a one-user synthetic SQLite DB
+(synthetic_db.py), runs the transaction_digest SQL + build_digest exactly
+like the get_transaction_digest MCP tool, and reports the grouped row count,
+aggregation latency and the token count of the /analyze draft prompt data
+(digest + PROMPT_ROW_LIMIT recent rows) next to what 100 raw rows in the
+legacy encoding cost.
+
+Usage:
+    python bench_transaction_digest.py --sizes 100 1000 10000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from prompt_encoding import PROMPT_ROW_LIMIT, TransactionPrompt, count_tokens, legacy_payloads
+from synthetic_db import seed
+from transaction_digest import build_digest, digest_queries, render_digest
+
+
+def query(conn: sqlite3.Connection, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+    return [dict(row) for row in conn.execute(sql.replace("%s", "?"), tuple(params))]
+
+
+def run_size(size: int, repeat: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "digest.sqlite")
+        fin = seed(db_path, users=1, tx_per_user=size)[0]
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        account = query(conn, "SELECT * FROM account_balance WHERE fintech_use_num = %s", [fin])[0]
+        recent = query(conn, "SELECT * FROM transactions WHERE fintech_use_num = %s "
+                             "ORDER BY tran_datetime DESC LIMIT %s", [fin, 100])
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (group_sql, group_params), (balance_sql, balance_params) = digest_queries(fin)
+            groups = query(conn, group_sql, group_params)
+            digest = build_digest(groups, query(conn, balance_sql, balance_params))
+            timings.append(time.perf_counter() - started)
+        conn.close()
+
+    assert digest["totals"]["transactions"] == size
+    prompt = TransactionPrompt(account, recent, digest=render_digest(digest)).section()
+    return {
+        "transactions": size,
+        "grouped_rows": len(groups),
+        "digest_ms_p50": round(float(np.percentile(timings, 50)) * 1000, 2),
+        "prompt_tokens": count_tokens(prompt),
+        "prompt_rows": min(PROMPT_ROW_LIMIT, size),
+        "legacy_prompt_tokens": count_tokens(legacy_payloads(account, recent)["draft"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction digest benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    reports = []
+    for size in args.sizes:
+        report = run_size(size, args.repeat)
+        reports.append(report)
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput scaling benchmark for serve.py (1 → N worker processes).
+
+For each worker count, starts `serve.py --workers N` on a free port, waits
+for /healthz, then drives POST /search (cache disabled, so every request
+embeds the query and searches) from a fixed pool of concurrent clients for
+a fixed duration. Reports requests/s, latency percentiles, master+worker RSS
+and the scaling efficiency rps(N) / (N * rps(1)).
+
+Usage:
+    SEARCH_BACKEND=memory python bench_workers.py --workers 1 2 4 8 --duration 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+QUERIES = [
+    "대중교통 할인 카드 추천", "편의점 10% 할인", "주유 리터당 할인", "카페 스타벅스 할인",
+    "해외 결제 수수료 면제", "넷플릭스 유튜브 구독 할인", "온라인 쇼핑 적립", "공과금 통신비 할인",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def tree_rss_mb(pid: int) -> float:
+    """프로세스와 자식들의 RSS 합 (COW 공유 페이지는 중복 집계되므로 상한값)"""
+    pids = [pid]
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    if children.exists():
+        pids += [int(p) for p in children.read_text().split()]
+    total = 0.0
+    for p in pids:
+        try:
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) / 1024
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not become ready in time")
+
+
+async def drive(base_url: str, concurrency: int, duration: float, top_k: int) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def client_loop(i: int):
+            n = i
+            while time.perf_counter() < deadline:
+                query = QUERIES[n % len(QUERIES)]
+                n += concurrency
+                t0 = time.perf_counter()
+                response = await client.post("/search", json={"query": query, "top_k": top_k})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    return latencies
+
+
+def run_level(workers: int, concurrency: int, duration: float, warmup: float, top_k: int,
+              startup_timeout: float) -> Dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, SEARCH_CACHE_SIZE="0")
+    proc = subprocess.Popen(
+        [sys.executable, str(HERE / "serve.py"), "--workers", str(workers),
+         "--host", "127.0.0.1", "--port", str(port)],
+        env=env, start_new_session=True,
+    )
+    try:
+        wait_ready(base_url, proc, startup_timeout)
+        asyncio.run(drive(base_url, concurrency, warmup, top_k))
+        latencies = asyncio.run(drive(base_url, concurrency, duration, top_k))
+        rss = tree_rss_mb(proc.pid)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / duration, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+        "rss_total_mb": round(rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serve.py worker scaling benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=0, help="동시 클라이언트 수 (0 = 최대 워커 수 x 4)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--startup-timeout", type=float, default=900.0)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    concurrency = args.concurrency or max(args.workers) * 4
+    reports = []
+    for workers in args.workers:
+        report = run_level(workers, concurrency, args.duration, args.warmup, args.top_k, args.startup_timeout)
+        base = reports[0] if reports else report
+        report["scaling_efficiency"] = round(
+            report["req_per_s"] / (base["req_per_s"] * workers / base["workers"]), 3)
+        reports.append(report)
+        print(json.dumps(report, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming missed-benefit detector ("놓친 혜택 알림").
+
+Each incoming transaction is categorised, matched against the user's own
+cards (card_list) and against the precompiled benefit matrices of
+benefit_simulator.BenefitSimulator. When some card in the catalogue would
+have returned noticeably more than the best card the user holds, an alert
+is emitted.
+
+Sources:
+- POST /alerts/ingest : push one or many transactions
+- TransactionTailer   : polls the transactions table (id watermark) through
+                        mcp_server.run_query when ALERT_TAIL_ENABLED=1
+
+Both sources also feed the category budget counters
+(category_budgets.record_transactions).
+
+Per-user state (month totals, cap usage, missed total) is updated in O(1)
+per event; the catalogue side only looks at a few precomputed candidates
+per category.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from benefit_extractor import categorize_merchant
+from benefit_simulator import BenefitSimulator, get_simulator
+from category_budgets import record_transactions
+
+ALERT_MIN_MISSED_WON = float(os.getenv("ALERT_MIN_MISSED_WON", "100"))
+ALERT_CANDIDATES_PER_CATEGORY = int(os.getenv("ALERT_CANDIDATES_PER_CATEGORY", "5"))
+ALERT_HISTORY_PER_USER = int(os.getenv("ALERT_HISTORY_PER_USER", "50"))
+ALERT_HISTORY_GLOBAL = int(os.getenv("ALERT_HISTORY_GLOBAL", "1000"))
+
+ALERT_TAIL_ENABLED = os.getenv("ALERT_TAIL_ENABLED", "") not in ("", "0", "false")
+ALERT_TAIL_INTERVAL = float(os.getenv("ALERT_TAIL_INTERVAL", "2.0"))
+ALERT_TAIL_BATCH = int(os.getenv("ALERT_TAIL_BATCH", "500"))
+ALERT_TAIL_STATE = Path(os.getenv("ALERT_TAIL_STATE", "alert_tail_state.json"))
+
+_NAME_NOISE_RE = re.compile(r"[\s\-_()\[\]]+")
+
+
+def normalize_card_name(name: str) -> str:
+    return _NAME_NOISE_RE.sub("", name or "").lower()
+
+
+class UserState:
+    """사용자별 스트리밍 상태 (이벤트당 O(1) 갱신)"""
+
+    __slots__ = ("cards", "month", "month_total", "prev_month_total",
+                 "cap_used", "missed_total", "events", "alerts")
+
+    def __init__(self, cards: Tuple[int, ...]):
+        self.cards = cards
+        self.month = ""
+        self.month_total = 0.0
+        self.prev_month_total = 0.0
+        self.cap_used: Dict[Tuple[int, int], float] = {}
+        self.missed_total = 0.0
+        self.events = 0
+        self.alerts: Deque[Dict[str, Any]] = deque(maxlen=ALERT_HISTORY_PER_USER)
+
+    def roll_month(self, month: str):
+        if month and month != self.month:
+            if self.month:
+                self.prev_month_total = self.month_total
+            self.month = month
+            self.month_total = 0.0
+            self.cap_used.clear()
+
+
+def _load_cards_from_db(fintech_use_num: str) -> List[str]:
+    # 지연 import: 수집 엔드포인트만 쓸 때는 DB 드라이버가 필요 없다
+    from mcp_server import run_query
+
+    rows = run_query(
+        "SELECT card_name FROM card_list WHERE fintech_use_num = %s AND card_status = %s",
+        [fintech_use_num, "01"],
+    )
+    return [row["card_name"] for row in rows if row.get("card_name")]
+
+
+class MissedBenefitDetector:
+    def __init__(
+        self,
+        simulator: Optional[BenefitSimulator] = None,
+        min_missed: float = ALERT_MIN_MISSED_WON,
+        cards_loader: Optional[Callable[[str], List[str]]] = _load_cards_from_db,
+    ):
+        self.sim = simulator or get_simulator()
+        self.min_missed = min_missed
+        self.cards_loader = cards_loader
+        self.users: Dict[str, UserState] = {}
+        self.alerts: Deque[Dict[str, Any]] = deque(maxlen=ALERT_HISTORY_GLOBAL)
+        self.stats = {"events": 0, "skipped": 0, "alerts": 0, "missed_won": 0.0}
+        self._lock = threading.Lock()
+
+        # numpy 스칼라 인덱싱은 느리므로 이벤트 경로에서는 파이썬 리스트를 쓴다
+        self._rate = self.sim.rate.tolist()
+        self._fixed = self.sim.fixed.tolist()
+        self._cap = self.sim.cap.tolist()
+        self._min_spend = self.sim.min_spend.tolist()
+        self._base = self.sim.base.tolist()
+        self._base_cap = self.sim.base_cap.tolist()
+        self._base_min_spend = self.sim.base_min_spend.tolist()
+        self._category_pos = {c: i for i, c in enumerate(self.sim.categories)}
+        self._candidates = self._build_candidates()
+        self._name_to_card = {
+            normalize_card_name(card["name"]): i
+            for i, card in enumerate(self.sim.cards[cid] for cid in self.sim.card_ids)
+        }
+
+    def _build_candidates(self) -> List[List[int]]:
+        """카테고리별 후보 카드: 혜택율 상위 N개 + 건당 정액 상위 카드"""
+        candidates = []
+        n_cards = len(self.sim.card_ids)
+        for ki in range(len(self.sim.categories)):
+            by_rate = sorted(range(n_cards), key=lambda ci: -self._rate[ci][ki])
+            picked = [ci for ci in by_rate[:ALERT_CANDIDATES_PER_CATEGORY] if self._rate[ci][ki] > 0]
+            best_fixed = max(range(n_cards), key=lambda ci: self._fixed[ci][ki], default=None)
+            if best_fixed is not None and self._fixed[best_fixed][ki] > 0 and best_fixed not in picked:
+                picked.append(best_fixed)
+            candidates.append(picked)
+        return candidates
+
+    # ---------------- card ownership ---------------- #
+    def resolve_card(self, card_name: str) -> Optional[int]:
+        key = normalize_card_name(card_name)
+        if key in self._name_to_card:
+            return self._name_to_card[key]
+        for name, ci in self._name_to_card.items():
+            if name and (name in key or key in name):
+                return ci
+        return None
+
+    def set_user_cards(self, fintech_use_num: str, card_names: Iterable[str]) -> UserState:
+        cards = self._resolve_cards(card_names)
+        with self._lock:
+            return self._install_cards(fintech_use_num, cards)
+
+    def _resolve_cards(self, card_names: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(ci for ci in (self.resolve_card(n) for n in card_names) if ci is not None)
+
+    def _install_cards(self, fintech_use_num: str, cards: Tuple[int, ...]) -> UserState:
+        """잠금 없이 사용자 카드 등록 - 호출자가 self._lock 을 잡고 있거나 단일 스레드여야 한다"""
+        state = self.users.get(fintech_use_num)
+        if state is None:
+            state = self.users[fintech_use_num] = UserState(cards)
+        else:
+            state.cards = cards
+        return state
+
+    def _load_card_names(self, fintech_use_num: str) -> List[str]:
+        if self.cards_loader is None:
+            return []
+        try:
+            return self.cards_loader(fintech_use_num)
+        except Exception as exc:
+            print(f"⚠️ 카드 목록 조회 실패 ({fintech_use_num}): {exc}")
+            return []
+
+    def preload_users(self, fintech_use_nums: Iterable[str]) -> int:
+        """처음 보는 사용자의 카드 목록을 잠금 밖에서 미리 읽는다 (DB 조회 동안 전역 잠금을 잡지 않도록)"""
+        unseen = {fin for fin in fintech_use_nums if fin not in self.users}
+        loaded = {fin: self._resolve_cards(self._load_card_names(fin)) for fin in unseen}
+        with self._lock:
+            for fin, cards in loaded.items():
+                # 그 사이 다른 스레드가 등록했으면 그대로 둔다
+                if fin not in self.users:
+                    self._install_cards(fin, cards)
+        return len(loaded)
+
+    def _user_state(self, fintech_use_num: str) -> UserState:
+        state = self.users.get(fintech_use_num)
+        if state is not None:
+            return state
+        # process() 를 직접 부른 경우의 대비책 - process_many 는 preload_users 로 미리 채운다
+        return self._install_cards(fintech_use_num, self._resolve_cards(self._load_card_names(fintech_use_num)))
+
+    # ---------------- scoring ---------------- #
+    def _slot(self, ci: int, ki: int) -> Tuple[Tuple[int, int], float, float]:
+        """한도 사용액 키, 한도, 실적 조건 - 기본 혜택 칸은 카드당 하나의 풀 (ki=-1)"""
+        if self._base[ci][ki]:
+            return (ci, -1), self._base_cap[ci], self._base_min_spend[ci]
+        return (ci, ki), self._cap[ci][ki], self._min_spend[ci][ki]
+
+    def _benefit(self, ci: int, ki: int, amount: float, state: UserState, own: bool) -> float:
+        key, cap, min_spend = self._slot(ci, ki)
+        if state.prev_month_total < min_spend:
+            return 0.0
+        gross = amount * self._rate[ci][ki] + self._fixed[ci][ki]
+        remaining = cap - (state.cap_used.get(key, 0.0) if own else 0.0)
+        return min(gross, remaining) if remaining > 0 else 0.0
+
+    def process(self, tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """거래 1건 처리 -> 알림(dict) 또는 None (잠금 없음 - 여러 스레드에서는 process_many)"""
+        self.stats["events"] += 1
+        if tx.get("inout_type") != "출금":
+            self.stats["skipped"] += 1
+            return None
+        # 실적(전월 총 출금액)에는 분류되지 않은 출금도 포함
+        amount = float(tx.get("tran_amt") or 0)
+        state = self._user_state(tx.get("fintech_use_num") or "")
+        state.roll_month(str(tx.get("tran_date") or "")[:6])
+        state.month_total += amount
+        ki = self._category_pos.get(categorize_merchant(tx.get("printed_content") or ""))
+        if ki is None:
+            self.stats["skipped"] += 1
+            return None
+        state.events += 1
+
+        own_card, own_benefit = None, 0.0
+        for ci in state.cards:
+            benefit = self._benefit(ci, ki, amount, state, own=True)
+            if benefit > own_benefit:
+                own_card, own_benefit = ci, benefit
+        if own_card is not None:
+            key = self._slot(own_card, ki)[0]
+            state.cap_used[key] = state.cap_used.get(key, 0.0) + own_benefit
+
+        best_card, best_benefit = None, 0.0
+        for ci in self._candidates[ki]:
+            benefit = self._benefit(ci, ki, amount, state, own=False)
+            if benefit > best_benefit:
+                best_card, best_benefit = ci, benefit
+
+        missed = best_benefit - own_benefit
+        if best_card is None or best_card in state.cards or missed < self.min_missed:
+            return None
+
+        state.missed_total += missed
+        alert = {
+            "fintech_use_num": tx.get("fintech_use_num"),
+            "tran_date": tx.get("tran_date"),
+            "tran_time": tx.get("tran_time"),
+            "printed_content": tx.get("printed_content"),
+            "category": self.sim.categories[ki],
+            "tran_amt": amount,
+            "current_card_id": self.sim.card_ids[own_card] if own_card is not None else None,
+            "current_benefit": round(own_benefit),
+            "best_card_id": self.sim.card_ids[best_card],
+            "best_card_name": self.sim.cards[self.sim.card_ids[best_card]]["name"],
+            "best_benefit": round(best_benefit),
+            "missed": round(missed),
+        }
+        state.alerts.append(alert)
+        self.alerts.append(alert)
+        self.stats["alerts"] += 1
+        self.stats["missed_won"] += missed
+        return alert
+
+    def process_many(self, transactions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """스레드 안전한 묶음 처리: 카드 목록은 잠금 밖에서 읽고 상태 갱신만 잠금 안에서"""
+        transactions = list(transactions)
+        self.preload_users(tx.get("fintech_use_num") or "" for tx in transactions)
+        alerts = []
+        with self._lock:
+            for tx in transactions:
+                alert = self.process(tx)
+                if alert is not None:
+                    alerts.append(alert)
+        return alerts
+
+    def user_summary(self, fintech_use_num: str) -> Optional[Dict[str, Any]]:
+        state = self.users.get(fintech_use_num)
+        if state is None:
+            return None
+        return {
+            "fintech_use_num": fintech_use_num,
+            "cards": [self.sim.card_ids[ci] for ci in state.cards],
+            "events": state.events,
+            "missed_total": round(state.missed_total),
+            "alerts": list(state.alerts),
+        }
+
+
+class TransactionTailer:
+    """transactions 테이블을 id 워터마크로 폴링하며 sinks(예산 카운터 등)와 detector 에 흘려보낸다"""
+
+    def __init__(self, detector: MissedBenefitDetector, interval: float = ALERT_TAIL_INTERVAL,
+                 batch_size: int = ALERT_TAIL_BATCH, state_path: Path = ALERT_TAIL_STATE,
+                 sinks: Sequence[Callable[[List[Dict[str, Any]]], Any]] = ()):
+        self.detector = detector
+        self.sinks = sinks
+        self.interval = interval
+        self.batch_size = batch_size
+        self.state_path = Path(state_path)
+        self.last_id = self._load_watermark()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_watermark(self) -> int:
+        if self.state_path.exists():
+            try:
+                return int(json.loads(self.state_path.read_text(encoding="utf-8")).get("last_id", 0))
+            except (ValueError, OSError):
+                pass
+        return 0
+
+    def _save_watermark(self):
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"last_id": self.last_id}), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def poll_once(self) -> int:
+        from mcp_server import run_query
+
+        rows = run_query(
+            "SELECT * FROM transactions WHERE id > %s ORDER BY id ASC LIMIT %s",
+            [self.last_id, self.batch_size],
+        )
+        if not rows:
+            return 0
+        # sink 실패 시 워터마크를 올리지 않고 같은 묶음을 다시 읽는다 (예산 카운터는 거래 키로 멱등)
+        for sink in self.sinks:
+            sink(rows)
+        self.detector.process_many(rows)
+        self.last_id = max(int(row["id"]) for row in rows)
+        self._save_watermark()
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # 밀려 있는 행이 있으면 쉬지 않고 따라잡는다
+                if self.poll_once() >= self.batch_size:
+                    continue
+            except Exception as exc:
+                print(f"⚠️ transactions 폴링 실패: {exc}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="transaction-tailer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+detector: Optional[MissedBenefitDetector] = None
+tailer: Optional[TransactionTailer] = None
+
+
+def get_detector() -> MissedBenefitDetector:
+    global detector
+    if detector is None:
+        detector = MissedBenefitDetector()
+    return detector
+
+
+# ---------------- FastAPI ---------------- #
+app = FastAPI(
+    title="Missed Benefit Alerts",
+    description="결제 시점 놓친 카드 혜택 알림 스트림",
+    version="1.0.0",
+)
+
+
+class TransactionEvent(BaseModel):
+    fintech_use_num: str
+    tran_date: Optional[str] = None
+    tran_time: Optional[str] = None
+    inout_type: str = "출금"
+    printed_content: Optional[str] = None
+    tran_amt: float = 0
+
+
+class IngestRequest(BaseModel):
+    transactions: Union[TransactionEvent, List[TransactionEvent]]
+
+
+@app.on_event("startup")
+def _start_tailer():
+    global tailer
+    if ALERT_TAIL_ENABLED and tailer is None:
+        tailer = TransactionTailer(get_detector(), sinks=(record_transactions,))
+        tailer.start()
+        print(f"✅ transactions 테일러 시작 (last_id={tailer.last_id})")
+
+
+@app.on_event("shutdown")
+def _stop_tailer():
+    if tailer is not None:
+        tailer.stop()
+
+
+@app.post("/alerts/ingest")
+def ingest_transactions(request: IngestRequest):
+    events = request.transactions if isinstance(request.transactions, list) else [request.transactions]
+    rows = [event.dict() for event in events]
+    budget_alerts = record_transactions(rows)
+    alerts = get_detector().process_many(rows)
+    return {"processed": len(events), "alerts": alerts, "budget_alerts": budget_alerts}
+
+
+@app.get("/alerts/stats")
+def alert_stats():
+    det = get_detector()
+    return {
+        **det.stats,
+        "missed_won": round(det.stats["missed_won"]),
+        "users": len(det.users),
+        "tail_last_id": tailer.last_id if tailer is not None else None,
+        "recent": list(det.alerts)[-20:],
+    }
+
+
+@app.get("/alerts/{fintech_use_num}")
+def user_alerts(fintech_use_num: str):
+    summary = get_detector().user_summary(fintech_use_num)
+    if summary is None:
+        return {"fintech_use_num": fintech_use_num, "events": 0, "missed_total": 0, "alerts": []}
+    return summary
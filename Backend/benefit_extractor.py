@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured benefit extraction for card_data/cardgorilla_top100_detailed.json.
+
+The scraper stores each benefit as a raw "<label><description>" string such as
+"편의점편의점 10% 할인" or "주유소4대 정유사 리터당 60원 할인". This module turns
+every benefit into structured records (category, rate type, value, caps and
+spend conditions) and builds an in-memory inverted index category -> cards,
+persisted as card_data/benefit_index.json.
+
+Usage:
+    python benefit_extractor.py            # rebuild card_data/benefit_index.json
+"""
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CARD_JSON = Path("card_data/cardgorilla_top100_detailed.json")
+BENEFIT_INDEX_JSON = Path("card_data/benefit_index.json")
+
+# 지출 카테고리 -> 혜택 문구/가맹점명에 등장하는 키워드
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "모든가맹점": ["모든 가맹점", "모든가맹점", "국내외 가맹점", "국내외가맹점", "국내 가맹점",
+               "전가맹점", "전 가맹점", "어디서나", "국내/외 모든"],
+    "편의점": ["편의점", "CU", "GS25", "세븐일레븐", "이마트24"],
+    "주유": ["주유", "정유사", "충전소", "EV충전", "LPG", "SK에너지", "GS칼텍스", "S-OIL", "현대오일뱅크"],
+    "대형마트": ["대형마트", "마트", "할인점", "장보기", "슈퍼마켓", "이마트", "홈플러스", "코스트코"],
+    "카페": ["카페", "커피", "스타벅스", "이디야", "투썸", "폴바셋", "커피빈"],
+    "택시": ["택시", "카카오T"],
+    "대중교통": ["대중교통", "버스", "지하철", "교통", "티머니"],
+    "통신": ["이동통신", "통신", "SKT", "LG U+", "LGU+", "전화요금", "인터넷"],
+    "온라인쇼핑": ["온라인쇼핑", "온라인 쇼핑", "온라인몰", "쿠팡", "G마켓", "11번가", "알리익스프레스", "네이버쇼핑"],
+    "쇼핑": ["오프라인 쇼핑", "쇼핑", "백화점", "아울렛", "면세점"],
+    "간편결제": ["간편결제", "KB Pay", "삼성페이", "4대 PAY"],
+    "음식점": ["음식점", "외식", "푸드", "식음료", "패스트푸드", "패밀리레스토랑", "레스토랑", "점심", "베이커리", "아웃백"],
+    "배달앱": ["배달", "요기요", "쿠팡이츠", "딜리버리"],
+    "디지털구독": ["디지털구독", "OTT", "스트리밍", "넷플릭스", "유튜브", "멜론", "디지털콘텐츠", "디지털 컨텐츠", "디지털컨텐츠"],
+    "영화": ["영화", "CGV", "롯데시네마", "메가박스"],
+    "해외": ["해외"],
+    "병원/약국": ["병원", "약국", "의료"],
+    "공과금": ["공과금", "관리비", "전기료", "도시가스", "생활요금", "수도요금"],
+    "보험": ["보험"],
+    "교육": ["학원", "학습지", "유치원", "교육"],
+    "여행": ["여행", "항공권", "호텔", "숙박", "리조트"],
+    "뷰티": ["올리브영", "드럭스토어", "뷰티", "미용실"],
+}
+
+# 혜택 라벨(dt) 중 문구에서 카테고리를 찾지 못했을 때 쓰는 카테고리
+LABEL_CATEGORY: Dict[str, str] = {
+    "주유소": "주유", "주유": "주유", "편의점": "편의점", "대형마트": "대형마트",
+    "마트/편의점": "대형마트", "카페": "카페", "택시": "택시", "대중교통": "대중교통",
+    "교통": "대중교통", "기차": "대중교통", "통신": "통신", "온라인쇼핑": "온라인쇼핑",
+    "쇼핑": "쇼핑", "백화점": "쇼핑", "면세점": "쇼핑", "간편결제": "간편결제",
+    "네이버페이": "간편결제", "삼성페이": "간편결제", "푸드": "음식점", "일반음식점": "음식점",
+    "패밀리레스토랑": "음식점", "패스트푸드": "음식점", "점심": "음식점", "베이커리": "음식점",
+    "배달앱": "배달앱", "디지털구독": "디지털구독", "영화": "영화", "해외": "해외",
+    "해외이용": "해외", "병원/약국": "병원/약국", "공과금": "공과금", "보험사": "보험",
+    "학원": "교육", "학습지": "교육", "유치원": "교육", "여행/숙박": "여행",
+    "온라인 여행사": "여행", "항공권": "여행", "리조트": "여행", "드럭스토어": "뷰티",
+    "모든가맹점": "모든가맹점", "국내외가맹점": "모든가맹점",
+}
+
+# 지출과 무관한 부가 서비스 라벨 - 구조화 대상에서 제외
+NON_SPEND_LABELS = {
+    "유의사항", "공항라운지", "공항라운지/PP", "공항", "바우처", "프리미엄 서비스", "프리미엄",
+    "무이자할부", "수수료우대", "금융", "멤버십포인트", "호텔", "테마파크",
+}
+
+# 카테고리 정보가 없는 범용 라벨 (문구에서 카테고리를 찾는다)
+GENERIC_LABELS = {
+    "적립", "할인", "캐시백", "선택형", "기타", "생활", "혜택 프로모션", "대한항공",
+    "항공마일리지", "자동차", "자동차/하이패스", "정비",
+}
+
+KNOWN_LABELS = sorted(
+    set(LABEL_CATEGORY) | NON_SPEND_LABELS | GENERIC_LABELS, key=len, reverse=True)
+
+_KEYWORD_TO_CATEGORY = {
+    keyword: category
+    for category, keywords in CATEGORY_KEYWORDS.items()
+    for keyword in keywords
+}
+CATEGORY_KEYWORD_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(_KEYWORD_TO_CATEGORY, key=len, reverse=True)))
+
+_NUM = r"\d[\d,]*(?:\.\d+)?"
+PROGRAM_TAG_RE = re.compile(r"^\s*(\[[^\]]*\]|\([^)]*\))\s*")
+PER_LITER_RE = re.compile(
+    rf"리터당\s*({_NUM})(?:\s*[~～-]\s*({_NUM}))?\s*(원|포인트)")
+PER_SPEND_RE = re.compile(
+    rf"({_NUM})\s*(천)?\s*원\s*당[^\d]{{0,30}}?(?:최대\s*)?({_NUM})(?:\s*[~～-]\s*({_NUM}))?\s*"
+    r"(?:마일리지|마일|포인트|멤버십|[A-Za-z가-힣]*\s*포인트)")
+PERCENT_RE = re.compile(
+    rf"({_NUM})\s*%?\s*(?:[~～-]\s*({_NUM}))?\s*%")
+FIXED_WON_RE = re.compile(
+    rf"({_NUM})\s*(천|만)?\s*원\s*(?:결제일\s*|청구\s*|현장\s*|즉시\s*)*(할인|캐시백)")
+CAP_RE = re.compile(
+    rf"(월|연)\s*(?:최대\s*)?({_NUM})\s*(천|만)?\s*[A-Za-z.]*\s*(?:원|포인트|마일리지)?\s*한도")
+PREV_MONTH_RE = re.compile(
+    rf"전월\s*(?:실적|이용\s*금액|이용금액)?\s*[:：]?\s*({_NUM})\s*(만)?\s*원\s*이상")
+MIN_TXN_RE = re.compile(rf"({_NUM})\s*(천|만)?\s*원\s*이상\s*결제\s*시")
+CARD_ID_RE = re.compile(r"/card/detail/(\d+)")
+
+_UNIT_MULTIPLIER = {None: 1, "": 1, "천": 1_000, "만": 10_000}
+
+
+def _to_number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _to_won(number: str, unit: Optional[str]) -> int:
+    return int(_to_number(number) * _UNIT_MULTIPLIER[unit])
+
+
+def _max_of(first: str, second: Optional[str]) -> float:
+    values = [_to_number(first)]
+    if second:
+        values.append(_to_number(second))
+    return max(values)
+
+
+def _category_positions(text: str) -> Dict[str, int]:
+    """카테고리 -> 첫 키워드가 끝나는 위치 (등장 순서 유지)"""
+    positions: Dict[str, int] = {}
+    for match in CATEGORY_KEYWORD_RE.finditer(text or ""):
+        positions.setdefault(_KEYWORD_TO_CATEGORY[match.group(0)], match.end())
+    return positions
+
+
+def categorize_text(text: str) -> List[str]:
+    """문구/가맹점명에서 지출 카테고리를 등장 순서대로 추출 (중복 제거)"""
+    return list(_category_positions(text))
+
+
+@lru_cache(maxsize=65536)
+def categorize_merchant(printed_content: str) -> Optional[str]:
+    """가맹점 표기 -> 대표 카테고리 (같은 가맹점은 반복되므로 캐시)"""
+    categories = categorize_text(printed_content)
+    return categories[0] if categories else None
+
+
+OTHER_CATEGORY = "기타"
+
+
+def spend_category(printed_content: Optional[str]) -> str:
+    """
+    거래 내역의 가맹점 표기 -> 지출 카테고리 (분류되지 않거나 '모든가맹점'이면 OTHER_CATEGORY).
+    예산 카운터와 기간 요약이 같이 쓰므로 두 화면의 카테고리별 금액이 일치한다.
+    """
+    category = categorize_merchant(printed_content or "")
+    return category if category and category != "모든가맹점" else OTHER_CATEGORY
+
+
+def normalize_category(name: str) -> Optional[str]:
+    """사용자 입력 카테고리명('커피', '주유소' 등)을 표준 카테고리로 변환"""
+    name = (name or "").strip()
+    if name in CATEGORY_KEYWORDS:
+        return name
+    if name in LABEL_CATEGORY:
+        return LABEL_CATEGORY[name]
+    categories = categorize_text(name)
+    return categories[0] if categories else None
+
+
+def split_label(text: str) -> Tuple[Optional[str], str]:
+    """'편의점편의점 10% 할인' -> ('편의점', '편의점 10% 할인')"""
+    for label in KNOWN_LABELS:
+        if text.startswith(label):
+            return label, text[len(label):].strip()
+    return None, text.strip()
+
+
+def _benefit_type(body: str) -> str:
+    if "캐시백" in body:
+        return "캐시백"
+    if "적립" in body or "마일" in body or "포인트" in body:
+        return "적립"
+    if "할인" in body:
+        return "할인"
+    return "기타"
+
+
+def _parse_rate(body: str) -> Dict[str, Any]:
+    """rate_type: percent | won_per_liter | points_per_won | fixed_won"""
+    match = PER_LITER_RE.search(body)
+    if match:
+        return {"rate_type": "won_per_liter", "value": _max_of(match.group(1), match.group(2))}
+
+    match = PER_SPEND_RE.search(body)
+    if match:
+        unit_amount = _to_won(match.group(1), match.group(2))
+        return {
+            "rate_type": "points_per_won",
+            "value": _max_of(match.group(3), match.group(4)),
+            "unit_amount": unit_amount,
+        }
+
+    match = PERCENT_RE.search(body)
+    if match:
+        return {"rate_type": "percent", "value": _max_of(match.group(1), match.group(2))}
+
+    match = FIXED_WON_RE.search(body)
+    if match:
+        return {"rate_type": "fixed_won", "value": float(_to_won(match.group(1), match.group(2)))}
+
+    return {"rate_type": None, "value": None}
+
+
+def _parse_conditions(body: str) -> Dict[str, Any]:
+    conditions: Dict[str, Any] = {
+        "monthly_cap": None,
+        "annual_cap": None,
+        "min_prev_month_spend": None,
+        "min_transaction_amount": None,
+    }
+    for period, number, unit in CAP_RE.findall(body):
+        key = "monthly_cap" if period == "월" else "annual_cap"
+        conditions[key] = _to_won(number, unit)
+
+    match = PREV_MONTH_RE.search(body)
+    if match:
+        conditions["min_prev_month_spend"] = _to_won(match.group(1), match.group(2))
+
+    match = MIN_TXN_RE.search(body)
+    if match:
+        conditions["min_transaction_amount"] = _to_won(match.group(1), match.group(2))
+    return conditions
+
+
+def extract_benefit_records(text: str) -> List[Dict[str, Any]]:
+    """
+    혜택 문구 하나를 카테고리별 구조화 레코드로 변환.
+    지출과 무관한 부가 서비스나 카테고리를 알 수 없는 문구는 빈 리스트를 반환한다.
+    """
+    label, body = split_label(text)
+    if label in NON_SPEND_LABELS:
+        return []
+
+    program = None
+    tag = PROGRAM_TAG_RE.match(body)
+    if tag:
+        program = tag.group(1).strip("[]()")
+        body = body[tag.end():]
+
+    positions = _category_positions(body)
+    if not positions and label in LABEL_CATEGORY:
+        positions = {LABEL_CATEGORY[label]: 0}
+    if not positions:
+        return []
+
+    benefit_type = _benefit_type(body)
+    default_rate = _parse_rate(body)
+    if benefit_type == "기타" and default_rate["value"] is None:
+        return []
+
+    conditions = _parse_conditions(body)
+    records = []
+    for category, position in positions.items():
+        # '택시/커피 5%, 영화관 30%' 처럼 카테고리마다 뒤따르는 혜택율이 다를 수 있다
+        rate = _parse_rate(body[position:])
+        if rate["value"] is None:
+            rate = default_rate
+        records.append({
+            "category": category,
+            "label": label,
+            "program": program,
+            "benefit_type": benefit_type,
+            "unit_amount": None,
+            **rate,
+            **conditions,
+            "raw": text,
+        })
+    return records
+
+
+def card_key(card: Dict[str, Any]) -> str:
+    """카드 식별자: 카드고릴라 상세 id, 없으면 순위"""
+    match = CARD_ID_RE.search(card.get("link") or card.get("url") or "")
+    if match:
+        return match.group(1)
+    return f"rank-{card.get('rank')}"
+
+
+class BenefitIndex:
+    """
+    카테고리 -> 카드 역색인.
+
+    cards_for("편의점") 는 dict 조회 한 번으로 해당 카테고리 혜택이 있는 카드 id 목록을
+    반환한다. 레코드는 카테고리별로 정률(%) 혜택을 우선, 값이 큰 순으로 정렬된다.
+    """
+
+    def __init__(self, cards: Dict[str, Dict[str, Any]], records: Dict[str, List[Dict[str, Any]]]):
+        self.cards = cards
+        self.records = records
+        self.by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for key, card_records in records.items():
+            for record in card_records:
+                self.by_category.setdefault(record["category"], []).append(
+                    {"card_id": key, **record})
+        for entries in self.by_category.values():
+            entries.sort(key=lambda r: (r["rate_type"] == "percent", r["value"] or 0), reverse=True)
+        self.category_cards: Dict[str, List[str]] = {
+            category: list(dict.fromkeys(r["card_id"] for r in entries))
+            for category, entries in self.by_category.items()
+        }
+
+    @classmethod
+    def build(cls, cards: Iterable[Dict[str, Any]]) -> "BenefitIndex":
+        card_meta: Dict[str, Dict[str, Any]] = {}
+        records: Dict[str, List[Dict[str, Any]]] = {}
+        for card in cards:
+            key = card_key(card)
+            card_meta[key] = {
+                "rank": card.get("rank"),
+                "name": card.get("name", ""),
+                "issuer": card.get("issuer", ""),
+                "link": card.get("link"),
+            }
+            benefits = card.get("description_text", {}).get("benefits_text", []) or []
+            records[key] = [
+                record for text in benefits for record in extract_benefit_records(text)]
+        return cls(card_meta, records)
+
+    def categories(self) -> Dict[str, int]:
+        return {category: len(keys) for category, keys in self.category_cards.items()}
+
+    def cards_for(self, category: str) -> List[str]:
+        return self.category_cards.get(category, [])
+
+    def records_for(self, category: str) -> List[Dict[str, Any]]:
+        return self.by_category.get(category, [])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cards": self.cards,
+            "records": self.records,
+            "category_cards": self.category_cards,
+        }
+
+    def save(self, path: Path = BENEFIT_INDEX_JSON):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path = BENEFIT_INDEX_JSON) -> "BenefitIndex":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(data["cards"], data["records"])
+
+
+def load_or_build_index(card_json: Path = CARD_JSON,
+                        index_json: Path = BENEFIT_INDEX_JSON) -> BenefitIndex:
+    """저장된 색인이 카드 데이터보다 최신이면 불러오고, 아니면 다시 만들어 저장"""
+    if index_json.exists() and (
+        not card_json.exists() or index_json.stat().st_mtime >= card_json.stat().st_mtime
+    ):
+        return BenefitIndex.load(index_json)
+    cards = json.loads(card_json.read_text(encoding="utf-8"))
+    index = BenefitIndex.build(cards)
+    index.save(index_json)
+    return index
+
+
+def main():
+    cards = json.loads(CARD_JSON.read_text(encoding="utf-8"))
+    index = BenefitIndex.build(cards)
+    index.save(BENEFIT_INDEX_JSON)
+
+    total = sum(len(r) for r in index.records.values())
+    print(f"✅ {len(index.cards)}개 카드에서 혜택 레코드 {total}개 추출 -> {BENEFIT_INDEX_JSON}")
+    for category, count in sorted(index.categories().items(), key=lambda x: -x[1]):
+        print(f"   - {category}: {count}개 카드")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorised annual-benefit simulator ("변경 시 연간 혜택 증가 시뮬레이션").
+
+Builds a cards x categories benefit matrix from the structured benefit index
+(benefit_extractor.py) and a users x categories monthly spend matrix from
+transaction rollups, then scores every (user, card) pair with NumPy:
+
+    monthly[u, c] = sum_k min(spend[u, k] * rate[c, k] + count[u, k] * fixed[c, k], cap[c, k])
+                    (only where the user's monthly total meets the card's spend condition)
+                  + min(base pool, base_cap[c])
+    annual = 12 * monthly
+
+The all-merchant base benefit (모든가맹점) is one pool per card: categories
+where it beats the card's specific benefit, plus uncategorised spend, share
+a single cap and spend condition. Spend conditions are checked against
+total monthly withdrawals, uncategorised ones included.
+
+Endpoints (mounted on main_api):
+- POST /simulate        : one user (transactions via MCP, or an explicit monthly_spend)
+- POST /simulate/batch  : many users at once
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from benefit_extractor import (
+    CATEGORY_KEYWORDS,
+    BenefitIndex,
+    categorize_text,
+    load_or_build_index,
+)
+
+BASE_CATEGORY = "모든가맹점"
+SPEND_CATEGORIES: List[str] = [c for c in CATEGORY_KEYWORDS if c != BASE_CATEGORY]
+
+FUEL_PRICE_PER_LITER = float(os.getenv("SIM_FUEL_PRICE_PER_LITER", "1700"))
+MILE_VALUE_WON = float(os.getenv("SIM_MILE_VALUE_WON", "15"))
+DEFAULT_CHUNK_SIZE = int(os.getenv("SIM_CHUNK_SIZE", "4096"))
+
+
+def _record_rate(record: Dict[str, Any]) -> Tuple[float, float]:
+    """레코드 -> (지출 1원당 혜택율, 건당 정액 혜택)"""
+    value = record.get("value")
+    rate_type = record.get("rate_type")
+    if value is None:
+        return 0.0, 0.0
+    if rate_type == "percent":
+        return value / 100.0, 0.0
+    if rate_type == "won_per_liter":
+        return value / FUEL_PRICE_PER_LITER, 0.0
+    if rate_type == "points_per_won":
+        point_value = MILE_VALUE_WON if "마일" in record.get("raw", "") else 1.0
+        return value * point_value / (record.get("unit_amount") or 1000), 0.0
+    if rate_type == "fixed_won":
+        return 0.0, value
+    return 0.0, 0.0
+
+
+def _record_cap(record: Dict[str, Any]) -> float:
+    if record.get("monthly_cap"):
+        return float(record["monthly_cap"])
+    if record.get("annual_cap"):
+        return float(record["annual_cap"]) / 12.0
+    return np.inf
+
+
+class BenefitSimulator:
+    """카드 x 카테고리 혜택 행렬을 들고 있는 시뮬레이터"""
+
+    def __init__(self, index: BenefitIndex, categories: Sequence[str] = SPEND_CATEGORIES):
+        self.card_ids: List[str] = list(index.cards)
+        self.cards = index.cards
+        self.categories: List[str] = list(categories)
+        self._category_pos = {c: i for i, c in enumerate(self.categories)}
+
+        n_cards, n_cats = len(self.card_ids), len(self.categories)
+        self.rate = np.zeros((n_cards, n_cats), dtype=np.float32)
+        self.fixed = np.zeros((n_cards, n_cats), dtype=np.float32)
+        self.cap = np.full((n_cards, n_cats), np.inf, dtype=np.float32)
+        self.min_spend = np.zeros((n_cards, n_cats), dtype=np.float32)
+        # 전 가맹점 기본 혜택: 카드당 하나의 한도/실적 조건을 공유하는 풀
+        self.base_rate = np.zeros(n_cards, dtype=np.float32)
+        self.base_fixed = np.zeros(n_cards, dtype=np.float32)
+        self.base_cap = np.full(n_cards, np.inf, dtype=np.float32)
+        self.base_min_spend = np.zeros(n_cards, dtype=np.float32)
+
+        for ci, card_id in enumerate(self.card_ids):
+            for record in index.records.get(card_id, []):
+                if record["category"] == BASE_CATEGORY:
+                    self._apply_base(ci, record)
+                    continue
+                ki = self._category_pos.get(record["category"])
+                if ki is not None:
+                    self._apply(ci, ki, record)
+
+        # 카테고리 특화 혜택보다 기본 혜택이 나은 칸은 기본 혜택 풀로 계산 (둘은 중복되지 않음)
+        base_rate, base_fixed = self.base_rate[:, None], self.base_fixed[:, None]
+        self.base = (base_rate > self.rate) | (
+            (base_rate == self.rate) & (self.rate == 0) & (base_fixed > self.fixed))
+        self.rate = np.where(self.base, base_rate, self.rate).astype(np.float32)
+        self.fixed = np.where(self.base, base_fixed, self.fixed).astype(np.float32)
+        # 한도와 실적 조건은 풀 단위(base_cap, base_min_spend)로 한 번만 적용
+        self.cap[self.base] = np.inf
+        self.min_spend[self.base] = 0
+
+        # 한도/실적 조건이 하나도 없으면 행렬곱 한 번으로 계산할 수 있다
+        self._uncapped = bool(
+            np.isinf(self.cap).all() and np.isinf(self.base_cap).all()
+            and not self.min_spend.any() and not self.base_min_spend.any()
+        )
+
+    def _apply(self, ci: int, ki: int, record: Dict[str, Any]):
+        rate, fixed = _record_rate(record)
+        if rate > self.rate[ci, ki]:
+            self.rate[ci, ki] = rate
+            self.cap[ci, ki] = _record_cap(record)
+            self.min_spend[ci, ki] = record.get("min_prev_month_spend") or 0
+        if fixed > self.fixed[ci, ki]:
+            self.fixed[ci, ki] = fixed
+
+    def _apply_base(self, ci: int, record: Dict[str, Any]):
+        rate, fixed = _record_rate(record)
+        if rate > self.base_rate[ci]:
+            self.base_rate[ci] = rate
+            self.base_cap[ci] = _record_cap(record)
+            self.base_min_spend[ci] = record.get("min_prev_month_spend") or 0
+        if fixed > self.base_fixed[ci]:
+            self.base_fixed[ci] = fixed
+
+    @classmethod
+    def from_card_data(cls) -> "BenefitSimulator":
+        return cls(load_or_build_index())
+
+    # ---------------- spend matrix ---------------- #
+    def spend_vector(self, monthly_spend: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(len(self.categories), dtype=np.float32)
+        for category, amount in monthly_spend.items():
+            ki = self._category_pos.get(category)
+            if ki is not None:
+                vector[ki] += float(amount)
+        return vector
+
+    def build_spend_matrix(
+        self, transactions_by_user: Dict[str, Iterable[Dict[str, Any]]]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        거래 내역 -> (user_ids, 월평균 지출 행렬, 월평균 건수 행렬, 월평균 총 출금액)
+
+        출금 거래만 사용하며 printed_content 로 카테고리를 분류한다.
+        총 출금액은 분류되지 않은 출금까지 포함한다 (전월 실적 조건 판정용).
+        """
+        user_ids = list(transactions_by_user)
+        spend = np.zeros((len(user_ids), len(self.categories)), dtype=np.float32)
+        counts = np.zeros_like(spend)
+        totals = np.zeros(len(user_ids), dtype=np.float32)
+
+        for ui, user_id in enumerate(user_ids):
+            months = set()
+            for tx in transactions_by_user[user_id]:
+                if tx.get("inout_type") != "출금":
+                    continue
+                months.add(str(tx.get("tran_date") or "")[:6])
+                amount = float(tx.get("tran_amt") or 0)
+                totals[ui] += amount
+                categories = categorize_text(tx.get("printed_content") or "")
+                ki = self._category_pos.get(categories[0]) if categories else None
+                if ki is None:
+                    continue
+                spend[ui, ki] += amount
+                counts[ui, ki] += 1
+            if len(months) > 1:
+                spend[ui] /= len(months)
+                counts[ui] /= len(months)
+                totals[ui] /= len(months)
+        return user_ids, spend, counts, totals
+
+    # ---------------- simulation ---------------- #
+    def simulate(
+        self,
+        spend: np.ndarray,
+        counts: Optional[np.ndarray] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        totals: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        users x categories 월 지출 -> users x cards 연간 예상 혜택(원)
+
+        totals: 사용자별 월 총 출금액 (미분류 출금 포함, 기본: 카테고리 지출 합).
+        실적 조건은 totals 로 판정하고, 미분류 지출은 전 가맹점 기본 혜택만 받는다.
+        """
+        spend = np.asarray(spend, dtype=np.float32)
+        if spend.ndim == 1:
+            spend = spend[None, :]
+        if counts is not None:
+            counts = np.asarray(counts, dtype=np.float32).reshape(spend.shape)
+        categorized = spend.sum(axis=1)
+        totals = categorized if totals is None else np.maximum(
+            np.asarray(totals, dtype=np.float32).reshape(-1), categorized)
+        other = totals - categorized
+
+        if self._uncapped:
+            monthly = spend @ self.rate.T + other[:, None] * self.base_rate[None, :]
+            if counts is not None:
+                monthly += counts @ self.fixed.T
+            return monthly * 12.0
+
+        n_users = spend.shape[0]
+        annual = np.empty((n_users, len(self.card_ids)), dtype=np.float32)
+        eligible_mask = self.min_spend[None, :, :]
+        base_mask = self.base[None, :, :]
+
+        for start in range(0, n_users, chunk_size):
+            stop = min(start + chunk_size, n_users)
+            gross = spend[start:stop, None, :] * self.rate[None, :, :]
+            if counts is not None:
+                gross += counts[start:stop, None, :] * self.fixed[None, :, :]
+            # 기본 혜택 풀: 기본 혜택이 이기는 카테고리 + 미분류 지출, 카드당 한도 1회
+            pool = np.where(base_mask, gross, 0.0).sum(axis=2)
+            pool += other[start:stop, None] * self.base_rate[None, :]
+            np.minimum(pool, self.base_cap[None, :], out=pool)
+            pool *= totals[start:stop, None] >= self.base_min_spend[None, :]
+
+            np.minimum(gross, self.cap[None, :, :], out=gross)
+            gross *= ~base_mask
+            gross *= totals[start:stop, None, None] >= eligible_mask
+            annual[start:stop] = (gross.sum(axis=2) + pool) * 12.0
+        return annual
+
+    @staticmethod
+    def top_k(savings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """행마다 상위 k개 카드 인덱스/값 (내림차순)"""
+        k = min(k, savings.shape[1])
+        part = np.argpartition(-savings, k - 1, axis=1)[:, :k]
+        part_values = np.take_along_axis(savings, part, axis=1)
+        order = np.argsort(-part_values, axis=1)
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_values, order, axis=1)
+
+    def card_position(self, card_id: Optional[str]) -> Optional[int]:
+        if card_id is None:
+            return None
+        try:
+            return self.card_ids.index(card_id)
+        except ValueError:
+            return None
+
+    def recommend(self, savings_row: np.ndarray, top_k: int,
+                  current_card_id: Optional[str] = None) -> Dict[str, Any]:
+        indices, values = self.top_k(savings_row[None, :], top_k)
+        current_pos = self.card_position(current_card_id)
+        current = float(savings_row[current_pos]) if current_pos is not None else 0.0
+        return {
+            "current_card_id": current_card_id,
+            "current_annual_benefit": round(current),
+            "recommendations": [
+                {
+                    "card_id": self.card_ids[i],
+                    **self.cards[self.card_ids[i]],
+                    "annual_benefit": round(float(v)),
+                    "annual_increase": round(float(v) - current),
+                }
+                for i, v in zip(indices[0], values[0])
+            ],
+        }
+
+
+simulator: Optional[BenefitSimulator] = None
+
+
+def get_simulator() -> BenefitSimulator:
+    global simulator
+    if simulator is None:
+        simulator = BenefitSimulator.from_card_data()
+    return simulator
+
+
+# ---------------- FastAPI ---------------- #
+app = FastAPI(
+    title="Card Benefit Simulator",
+    description="카드 변경 시 연간 혜택 증가 시뮬레이션",
+    version="1.0.0",
+)
+
+
+class SimulationRequest(BaseModel):
+    account_id: Optional[int] = None
+    fintech_use_num: Optional[str] = None
+    monthly_spend: Optional[Dict[str, float]] = None
+    current_card_id: Optional[str] = None
+    top_k: int = 5
+
+
+class BatchUserSpend(BaseModel):
+    user_id: str
+    monthly_spend: Dict[str, float]
+    current_card_id: Optional[str] = None
+
+
+class BatchSimulationRequest(BaseModel):
+    users: List[BatchUserSpend]
+    top_k: int = 5
+
+
+@app.post("/simulate")
+async def simulate_user(request: SimulationRequest):
+    sim = get_simulator()
+
+    if request.monthly_spend is not None:
+        spend = sim.spend_vector(request.monthly_spend)[None, :]
+        counts = None
+        totals = np.array([sum(float(v) for v in request.monthly_spend.values())], dtype=np.float32)
+    else:
+        # 지연 import: MCP 클라이언트는 거래 내역이 필요할 때만 사용
+        from client_app import fetch_account, fetch_transactions
+
+        account_info = await fetch_account(request.account_id, request.fintech_use_num)
+        if not account_info:
+            raise HTTPException(status_code=404, detail="계좌를 찾을 수 없습니다.")
+        transactions = await fetch_transactions(account_info.get("fintech_use_num"), limit=500)
+        _, spend, counts, totals = sim.build_spend_matrix({"user": transactions})
+
+    savings = sim.simulate(spend, counts, totals=totals)
+    result = sim.recommend(savings[0], request.top_k, request.current_card_id)
+    result["monthly_spend"] = {
+        category: round(float(amount))
+        for category, amount in zip(sim.categories, spend[0]) if amount > 0
+    }
+    return result
+
+
+@app.post("/simulate/batch")
+def simulate_batch(request: BatchSimulationRequest):
+    sim = get_simulator()
+    if not request.users:
+        return {"results": []}
+
+    spend = np.stack([sim.spend_vector(u.monthly_spend) for u in request.users])
+    totals = np.array([sum(float(v) for v in u.monthly_spend.values()) for u in request.users], dtype=np.float32)
+    savings = sim.simulate(spend, totals=totals)
+    return {
+        "results": [
+            {"user_id": user.user_id, **sim.recommend(row, request.top_k, user.current_card_id)}
+            for user, row in zip(request.users, savings)
+        ]
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("SIMULATOR_PORT", "9900")))
@@ -6,20 +6,47 @@ Hybrid (dense + sparse) Milvus search API for card benefits.
 Steps:
 1. On startup, connect to Milvus and make sure the collection exists.
 2. If empty, read card_data/cardgorilla_top100_detailed.json,
-   embed each benefits_text with BGEM3 (dense + sparse) and insert.
-3. Expose POST /search to embed a user query and run hybrid search.
+   embed each card with BGE-M3 and insert: benefits_text (dense + sparse),
+   "issuer name" (dense) and event_text (dense).
+3. Expose POST /search to embed a user query and run one multi-field hybrid
+   search fused by a WeightedRanker (per-field weights configurable per request).
+   Optional structured filters (issuer, rank, annual fee) compile to a
+   Milvus boolean expr pushed down into both dense and sparse requests.
+   The search itself goes through a SearchBackend: Milvus (default), an
+   in-process NumPy/SciPy backend for small catalogues (SEARCH_BACKEND=memory)
+   or a remote owner process (SEARCH_BACKEND=remote, see search_server.py) so
+   that multi-worker deployments never open Milvus Lite from more than one process.
+   Whole /search responses are cached (bounded LRU + TTL) under a catalogue
+   version derived from the served content (catalogue_fingerprint: every
+   card row + the embedding model), so a re-ingestion with different content
+   changes it and a restart with the same content keeps it. Workers using
+   the remote backend re-check the owner's version on cache hits as well
+   (at most every SEARCH_VERSION_POLL_S seconds).
+4. Expose GET /benefits/categories/{category} backed by the structured
+   category -> card inverted index (see benefit_extractor.py).
 """
 from __future__ import annotations
 
+import base64
+import hashlib
 import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+import numpy as np
+from scipy import sparse as sp
+
 from pymilvus import (
+    MilvusException,
     connections,
     utility,
     FieldSchema,
@@ -27,12 +54,15 @@ from pymilvus import (
     DataType,
     Collection,
     AnnSearchRequest,
-    RRFRanker,
+    WeightedRanker,
 )
-from pymilvus.model.hybrid import BGEM3EmbeddingFunction
-
 import json
 
+from benefit_extractor import BenefitIndex, load_or_build_index, normalize_category
+from embedding_backends import create_embedding_function
+from metrics import stage
+from parallel_embedding import EMBED_BATCH_SIZE, Progress, chunked, iter_embedded_chunks
+
 # Ensure Hugging Face cache persists locally to avoid repeated downloads
 _hf_cache = os.getenv("HF_HOME") or os.getenv("TRANSFORMERS_CACHE")
 if not _hf_cache:
@@ -45,13 +75,40 @@ CARD_JSON = Path("card_data/cardgorilla_top100_detailed.json")
 COLLECTION_NAME = "card_benefits_hybrid"
 DENSE_FIELD = "benefit_dense"
 SPARSE_FIELD = "benefit_sparse"
+# Milvus 는 컬렉션당 벡터 필드가 최대 4개이므로 issuer 는 name 벡터에 함께 임베딩한다 ("issuer name")
+NAME_FIELD = "name_dense"
+EVENT_FIELD = "event_dense"
+# 요청 weights 키 -> 벡터 필드
+SEARCH_FIELDS = {
+    "benefits": DENSE_FIELD,
+    "benefits_sparse": SPARSE_FIELD,
+    "name": NAME_FIELD,
+    "event": EVENT_FIELD,
+}
+DEFAULT_FIELD_WEIGHTS = {"benefits": 0.4, "benefits_sparse": 0.3, "name": 0.2, "event": 0.1}
 MAX_VARCHAR = 2048
+SCALAR_INDEX_FIELDS = ("issuer", "rank", "annual_fee")
+UNKNOWN_ANNUAL_FEE = -1
+OUTPUT_FIELDS = ["rank", "name", "issuer", "annual_fee", "event_text", "benefits_raw"]
+
+# "1천원당 1포인트" 같은 적립 단위는 금액이 아니다
+ANNUAL_FEE_RE = re.compile(r"(?:(\d+)\s*만\s*)?(?:(\d+)\s*천\s*)?(\d[\d,]*)?\s*원(?!\s*당)")
+NO_ANNUAL_FEE_RE = re.compile(r"연회비\s*(없음|무료|면제)")
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "milvus").lower()
+MEMORY_INDEX_PATH = Path(os.getenv("MEMORY_INDEX_PATH", "card_vectors.npz"))
+SEARCH_SERVER_URL = os.getenv("SEARCH_SERVER_URL", "unix:///tmp/card_search.sock")
+SEARCH_SERVER_TIMEOUT = float(os.getenv("SEARCH_SERVER_TIMEOUT", "30"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))  # 0 = 캐시 끔
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))  # 초
+# remote 백엔드: 캐시 적중 시에도 owner 의 카탈로그 버전을 이 간격(초)마다 한 번 확인
+SEARCH_VERSION_POLL_S = float(os.getenv("SEARCH_VERSION_POLL_S", "5"))
 
 DEFAULT_MILVUS_URI = (Path.cwd() / "card_benefits.db").as_posix()
 MILVUS_URI = os.getenv("MILVUS_URI", DEFAULT_MILVUS_URI)
 
-embedding_fn = BGEM3EmbeddingFunction(
-    use_fp16=False, device=os.getenv("BGE_DEVICE", "cpu"))
+# EMBEDDING_BACKEND=bge-m3 (PyTorch) | onnx-int8 (ONNX Runtime, see embedding_backends.py)
+embedding_fn = create_embedding_function()
 
 
 def connect_milvus():
@@ -64,26 +121,38 @@ def create_collection_if_needed() -> Collection:
         FieldSchema("rank", DataType.INT64),
         FieldSchema("name", DataType.VARCHAR, max_length=256),
         FieldSchema("issuer", DataType.VARCHAR, max_length=256),
+        FieldSchema("annual_fee", DataType.INT64),
         FieldSchema("event_text", DataType.VARCHAR, max_length=MAX_VARCHAR),
         FieldSchema("benefits_raw", DataType.VARCHAR, max_length=MAX_VARCHAR),
         FieldSchema(DENSE_FIELD, DataType.FLOAT_VECTOR,
                     dim=embedding_fn.dim["dense"]),
         FieldSchema(SPARSE_FIELD, DataType.SPARSE_FLOAT_VECTOR),
+        FieldSchema(NAME_FIELD, DataType.FLOAT_VECTOR,
+                    dim=embedding_fn.dim["dense"]),
+        FieldSchema(EVENT_FIELD, DataType.FLOAT_VECTOR,
+                    dim=embedding_fn.dim["dense"]),
     ]
     schema = CollectionSchema(
         fields, description="Card benefits hybrid embeddings")
 
     if utility.has_collection(COLLECTION_NAME):
         collection = Collection(COLLECTION_NAME)
+        existing = {field.name for field in collection.schema.fields}
+        if not {field.name for field in fields} <= existing:
+            # 필드가 추가된 이전 스키마 -> 재생성 후 ingest_if_empty 로 다시 적재
+            print(f"⚠️ {COLLECTION_NAME} 스키마가 오래되어 컬렉션을 다시 생성합니다.")
+            utility.drop_collection(COLLECTION_NAME)
+            collection = Collection(name=COLLECTION_NAME, schema=schema)
     else:
         collection = Collection(name=COLLECTION_NAME, schema=schema)
 
     # Create indexes (AUTOINDEX dense + sparse inverted)
-    if not any(idx.field_name == DENSE_FIELD for idx in collection.indexes):
-        collection.create_index(
-            DENSE_FIELD,
-            index_params={"metric_type": "IP", "index_type": "AUTOINDEX"},
-        )
+    for field in (DENSE_FIELD, NAME_FIELD, EVENT_FIELD):
+        if not any(idx.field_name == field for idx in collection.indexes):
+            collection.create_index(
+                field,
+                index_params={"metric_type": "IP", "index_type": "AUTOINDEX"},
+            )
 
     if not any(idx.field_name == SPARSE_FIELD for idx in collection.indexes):
         collection.create_index(
@@ -91,54 +160,149 @@ def create_collection_if_needed() -> Collection:
             index_params={"index_type": "SPARSE_INVERTED_INDEX"},
         )
 
+    create_scalar_indexes(collection)
     collection.load()
     return collection
 
 
+def create_scalar_indexes(collection: Collection):
+    """필터에 쓰이는 스칼라 필드에 INVERTED 인덱스 생성"""
+    indexed = {idx.field_name for idx in collection.indexes}
+    for field in SCALAR_INDEX_FIELDS:
+        if field in indexed:
+            continue
+        try:
+            collection.create_index(
+                field,
+                index_params={"index_type": "INVERTED"},
+                index_name=f"{field}_idx",
+            )
+        except MilvusException as exc:
+            # Milvus Lite 등 스칼라 인덱스를 지원하지 않는 배포에서는 필터만 적용된다
+            print(f"⚠️ {field} 스칼라 인덱스 생성 실패: {exc}")
+
+
+def parse_annual_fee(card: Dict[str, Any]) -> int:
+    """
+    스크래퍼가 상세 페이지 연회비 항목에서 뽑은 annual_fee 의 가장 낮은 옵션(원).
+    그 항목이 없으면 UNKNOWN_ANNUAL_FEE - 본문에서 추측하지 않는다.
+    """
+    fee_info = card.get("annual_fee") or {}
+    texts = [str(text) for text in fee_info.values()] if isinstance(fee_info, dict) else [str(fee_info)]
+
+    fees = []
+    for text in texts:
+        if NO_ANNUAL_FEE_RE.search(text) or text.strip() in ("없음", "무료"):
+            fees.append(0)
+        for man, cheon, won in ANNUAL_FEE_RE.findall(text):
+            if man or cheon or won:
+                fees.append(int(man or 0) * 10_000 + int(cheon or 0) * 1_000
+                            + int(won.replace(",", "") or 0))
+    return min(fees) if fees else UNKNOWN_ANNUAL_FEE
+
+
 def load_cards_from_json() -> List[dict]:
     if not CARD_JSON.exists():
         raise FileNotFoundError(f"{CARD_JSON} not found.")
     return json.loads(CARD_JSON.read_text(encoding="utf-8"))
 
 
+def card_columns(cards: List[dict]) -> Dict[str, list]:
+    """카드 목록 -> 컬렉션 스칼라 컬럼 (+ 이름 벡터용 name_text = "issuer name")"""
+    columns: Dict[str, list] = {
+        "rank": [], "name": [], "issuer": [], "annual_fee": [],
+        "event_text": [], "benefits_raw": [], "name_text": [],
+    }
+    for card in cards:
+        benefits = card.get("description_text", {}).get(
+            "benefits_text", []) or []
+        columns["rank"].append(card.get("rank") or 0)
+        columns["name"].append(card.get("name", ""))
+        columns["issuer"].append(card.get("issuer", ""))
+        columns["annual_fee"].append(parse_annual_fee(card))
+        columns["event_text"].append(card.get("event_text") or "")
+        columns["benefits_raw"].append("; ".join(benefits))
+        columns["name_text"].append(f"{card.get('issuer', '')} {card.get('name', '')}".strip())
+    return columns
+
+
+def field_texts(columns: Dict[str, list]) -> List[str]:
+    """한 번의 임베딩 호출로 보낼 텍스트: benefits + name_text + event_text 순서로 이어 붙임"""
+    return columns["benefits_raw"] + columns["name_text"] + columns["event_text"]
+
+
+def split_field_embeddings(embeddings: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """field_texts 순서의 임베딩 -> 필드별 벡터 (sparse 는 benefits 만 사용)"""
+    dense = embeddings["dense"]
+    return {
+        DENSE_FIELD: dense[:n],
+        SPARSE_FIELD: embeddings["sparse"][:n],
+        NAME_FIELD: dense[n:2 * n],
+        EVENT_FIELD: dense[2 * n:3 * n],
+    }
+
+
+def collection_rows(collection: Collection, fields: List[str] = OUTPUT_FIELDS) -> Iterator[Dict[str, Any]]:
+    iterator = collection.query_iterator(batch_size=1000, expr="id >= 0", output_fields=fields)
+    while True:
+        batch = iterator.next()
+        if not batch:
+            break
+        for row in batch:
+            yield {field: row.get(field) for field in fields}
+    iterator.close()
+
+
+def existing_card_names(collection: Collection) -> set:
+    names = set()
+    iterator = collection.query_iterator(batch_size=1000, expr="id >= 0", output_fields=["name"])
+    while True:
+        batch = iterator.next()
+        if not batch:
+            break
+        names.update(row["name"] for row in batch)
+    iterator.close()
+    return names
+
+
+def embed_in_chunks(chunks):
+    """parallel_embedding 으로 청크 임베딩 (EMBED_WORKERS=1 이면 이 프로세스의 embedding_fn 사용)"""
+    return iter_embedded_chunks(chunks, embedding_fn=embedding_fn)
+
+
 def ingest_if_empty(collection: Collection):
-    if collection.num_entities > 0:
+    """
+    비어 있거나 일부만 적재된 컬렉션에 카드 적재.
+    EMBED_BATCH_SIZE 장씩 임베딩/insert 하며, 중단 후 재시작하면 이미 들어간 카드(name)는 건너뛴다.
+    """
+    cards = load_cards_from_json()
+    if collection.num_entities >= len(cards):
         return
 
-    cards = load_cards_from_json()
-    texts = []
-    ranks = []
-    names = []
-    issuers = []
-    events = []
-    benefits_raw = []
+    done = existing_card_names(collection) if collection.num_entities > 0 else set()
+    pending = [card for card in cards if card.get("name", "") not in done]
+    if not pending:
+        return
 
-    for card in cards:
-        benefits = card.get("description_text", {}).get(
-            "benefits_text", []) or []
-        text = "; ".join(benefits)
-        texts.append(text)
-        ranks.append(card.get("rank") or 0)
-        names.append(card.get("name", ""))
-        issuers.append(card.get("issuer", ""))
-        events.append(card.get("event_text") or "")
-        benefits_raw.append(text)
-
-    embeddings = embedding_fn.encode_documents(texts)
-    dense_vectors = [vec.tolist() for vec in embeddings["dense"]]
-    sparse_matrix = embeddings["sparse"].tocsr()
-
-    collection.insert(
-        [
-            ranks,
-            names,
-            issuers,
-            events,
-            benefits_raw,
-            dense_vectors,
-            sparse_matrix,
-        ]
-    )
+    progress = Progress(len(cards), "Milvus 적재", done=len(cards) - len(pending))
+    chunks = (card_columns(chunk) for chunk in chunked(pending, EMBED_BATCH_SIZE))
+    for columns, embeddings in embed_in_chunks((cols, field_texts(cols)) for cols in chunks):
+        vectors = split_field_embeddings(embeddings, len(columns["rank"]))
+        collection.insert(
+            [
+                columns["rank"],
+                columns["name"],
+                columns["issuer"],
+                columns["annual_fee"],
+                columns["event_text"],
+                columns["benefits_raw"],
+                vectors[DENSE_FIELD].tolist(),
+                vectors[SPARSE_FIELD],
+                vectors[NAME_FIELD].tolist(),
+                vectors[EVENT_FIELD].tolist(),
+            ]
+        )
+        progress.update(len(columns["rank"]))
     collection.flush()
 
 
@@ -150,13 +314,489 @@ def ensure_ready() -> Collection:
     return collection
 
 
+class SearchResponseCache:
+    """
+    /search 응답 캐시 (OrderedDict LRU + TTL).
+    항목마다 계산 당시의 catalogue version(catalogue_fingerprint)을 기록해 두고, 버전이 바뀌면 비운다.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = ""
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0,
+                      "saved_ms": 0.0, "miss_ms": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def set_version(self, version: str):
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            created, version, value, compute_ms = entry
+            if version != self.version or time.monotonic() - created > self.ttl:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["saved_ms"] += compute_ms
+            return value
+
+    def put(self, key: tuple, value: Dict[str, Any], compute_ms: float, version: str):
+        self.stats["miss_ms"] += compute_ms
+        if not self.enabled:
+            return
+        with self._lock:
+            if version != self.version:
+                # 계산 도중 재적재됨 -> 저장하지 않음
+                return
+            self._entries[key] = (time.monotonic(), version, value, compute_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "catalogue_version": self.version,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            **stats,
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(stats["saved_ms"], 1),
+            "miss_ms": round(stats["miss_ms"], 1),
+            "avg_miss_ms": round(stats["miss_ms"] / stats["misses"], 2) if stats["misses"] else 0.0,
+        }
+
+
+search_cache = SearchResponseCache()
+
+
+def catalogue_fingerprint(rows: Iterable[Dict[str, Any]]) -> str:
+    """
+    검색 대상 카드 행 전부 + 임베딩 모델로 만든 카탈로그 버전.
+    프로세스 카운터와 달리 재시작해도 같은 내용이면 같은 값이고, 내용이 바뀌면 반드시 바뀐다.
+    """
+    digest = hashlib.sha1(
+        f"{type(embedding_fn).__name__}:{embedding_fn.dim['dense']}:{','.join(SEARCH_FIELDS)}".encode("utf-8"))
+    for row in sorted(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str) for row in rows):
+        digest.update(row.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def set_catalogue_version(version: str):
+    """백엔드가 카탈로그를 (다시) 올린 뒤 호출 -> 버전이 바뀌었으면 캐시된 /search 응답 무효화"""
+    search_cache.set_version(version)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+def search_cache_key(request: SearchRequest, weights: Dict[str, float], backend_name: str) -> tuple:
+    filters = None
+    if request.filters is not None:
+        filters = tuple(
+            (name, tuple(sorted(value)) if isinstance(value, list) else value)
+            for name, value in sorted(request.filters.dict().items())
+            if value is not None
+        )
+    return (backend_name, normalize_query(request.query), request.top_k, filters, tuple(weights.items()))
+
+
 collection = None
 _collection_lock = None
+search_backend = None
+_backend_lock = threading.Lock()
+benefit_index: BenefitIndex | None = None
+
+
+class SearchFilters(BaseModel):
+    issuers: Optional[List[str]] = None
+    exclude_issuers: Optional[List[str]] = None
+    min_rank: Optional[int] = None
+    max_rank: Optional[int] = None
+    max_annual_fee: Optional[int] = None
 
 
 class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
+    filters: Optional[SearchFilters] = None
+    # 필드별 가중치 (benefits, benefits_sparse, name, event). 주어지면 기본값을 대체하며 빠진 필드는 0
+    weights: Optional[Dict[str, float]] = None
+
+
+def resolve_weights(weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """요청 가중치 검증 -> 0보다 큰 필드만 SEARCH_FIELDS 순서로"""
+    if weights is None:
+        weights = DEFAULT_FIELD_WEIGHTS
+    unknown = set(weights) - set(SEARCH_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown weight fields: {sorted(unknown)} (choose from {list(SEARCH_FIELDS)})")
+    if any(w < 0 for w in weights.values()):
+        raise ValueError("weights must not be negative")
+    resolved = {key: float(weights[key]) for key in SEARCH_FIELDS if weights.get(key, 0) > 0}
+    if not resolved:
+        raise ValueError("at least one weight must be positive")
+    return resolved
+
+
+def _string_list(values: List[str]) -> str:
+    return json.dumps([str(v) for v in values], ensure_ascii=False)
+
+
+def compile_filter_expr(filters: Optional[SearchFilters]) -> str:
+    """SearchFilters -> Milvus boolean expr (빈 문자열이면 필터 없음)"""
+    if filters is None:
+        return ""
+    clauses = []
+    if filters.issuers:
+        clauses.append(f"issuer in {_string_list(filters.issuers)}")
+    if filters.exclude_issuers:
+        clauses.append(f"issuer not in {_string_list(filters.exclude_issuers)}")
+    if filters.min_rank is not None:
+        clauses.append(f"rank >= {int(filters.min_rank)}")
+    if filters.max_rank is not None:
+        clauses.append(f"rank <= {int(filters.max_rank)}")
+    if filters.max_annual_fee is not None:
+        # 연회비를 모르는 카드(-1)는 걸러 내지 않는다 (결과의 annual_fee 가 -1)
+        clauses.append(f"annual_fee < 0 or annual_fee <= {int(filters.max_annual_fee)}")
+    return " and ".join(f"({clause})" for clause in clauses)
+
+
+def filter_mask(filters: Optional[SearchFilters], meta: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """compile_filter_expr 와 같은 조건을 NumPy boolean mask 로 (None 이면 필터 없음)"""
+    if filters is None:
+        return None
+    mask = np.ones(len(meta["rank"]), dtype=bool)
+    if filters.issuers:
+        mask &= np.isin(meta["issuer"], filters.issuers)
+    if filters.exclude_issuers:
+        mask &= ~np.isin(meta["issuer"], filters.exclude_issuers)
+    if filters.min_rank is not None:
+        mask &= meta["rank"] >= filters.min_rank
+    if filters.max_rank is not None:
+        mask &= meta["rank"] <= filters.max_rank
+    if filters.max_annual_fee is not None:
+        mask &= (meta["annual_fee"] < 0) | (meta["annual_fee"] <= filters.max_annual_fee)
+    return mask
+
+
+def encode_query(query: str) -> Tuple[np.ndarray, sp.csr_matrix]:
+    with stage("embedding"):
+        emb = embedding_fn.encode_queries([query])
+    dense = np.asarray(emb["dense"][0], dtype=np.float32)
+    return dense, emb["sparse"].tocsr()
+
+
+def weighted_fuse(score_lists: List[np.ndarray], weights: List[float], limit: int, top_k: int,
+                  mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Milvus WeightedRanker 와 같은 방식: 각 점수 벡터에서 상위 limit 개를 뽑아
+    IP 점수를 0.5 + arctan(score) / pi 로 정규화한 뒤 가중합.
+    점수가 -inf 인 문서(예: 쿼리와 겹치는 토큰이 없는 sparse 결과)는 해당 리스트에서 제외.
+    """
+    fused = np.zeros(score_lists[0].shape[0], dtype=np.float64)
+    for scores, weight in zip(score_lists, weights):
+        valid = np.isfinite(scores) if mask is None else np.isfinite(scores) & mask
+        candidates = np.flatnonzero(valid)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        fused[candidates] += weight * (0.5 + np.arctan(scores[candidates]) / np.pi)
+
+    hits = np.flatnonzero(fused)
+    top = hits[np.argsort(-fused[hits], kind="stable")[:top_k]]
+    return top, fused[top]
+
+
+class SearchBackend:
+    """검색 백엔드 인터페이스: 쿼리 임베딩 + 필터 -> 결과 목록"""
+
+    name = "base"
+
+    def prepare(self):
+        """인덱스 로딩/적재 (startup 시 1회) 후 set_catalogue_version"""
+
+    def refresh_version(self):
+        """캐시 조회 전에 카탈로그 버전 확인 (다른 프로세스가 카탈로그를 가진 remote 백엔드만 필요)"""
+
+    def search(self, dense: np.ndarray, sparse: sp.csr_matrix, top_k: int,
+               filters: Optional[SearchFilters] = None,
+               weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class MilvusSearchBackend(SearchBackend):
+    name = "milvus"
+
+    def prepare(self):
+        set_catalogue_version(catalogue_fingerprint(collection_rows(get_collection())))
+
+    def search(self, dense, sparse, top_k, filters=None, weights=None):
+        weights = weights or resolve_weights(None)
+        hybrid_reqs = build_hybrid_requests(dense, sparse, top_k, compile_filter_expr(filters), weights)
+        collection = get_collection()
+        with stage("milvus"):
+            results = collection.hybrid_search(
+                hybrid_reqs,
+                rerank=WeightedRanker(*weights.values()),
+                limit=top_k,
+                output_fields=OUTPUT_FIELDS,
+            )
+        return [
+            {
+                "score": hit.score,
+                "rank": hit.entity.get("rank"),
+                "name": hit.entity.get("name"),
+                "issuer": hit.entity.get("issuer"),
+                "annual_fee": hit.entity.get("annual_fee"),
+                "event_text": hit.entity.get("event_text"),
+                "benefits_text": hit.entity.get("benefits_raw"),
+            }
+            for hit in results[0]
+        ]
+
+
+class InMemorySearchBackend(SearchBackend):
+    """
+    카탈로그 전체(~100행)를 프로세스 메모리에 올려 두고 검색.
+    필드별 dense: (N, dim) float32 C-contiguous, sparse: CSR -> 필드마다 행렬곱 1회 + NumPy 가중합.
+    문서 임베딩은 MEMORY_INDEX_PATH 에 캐시하고 카드 JSON 이 바뀌면 다시 만든다.
+    """
+
+    name = "memory"
+
+    def __init__(self, index_path: Path = MEMORY_INDEX_PATH):
+        self.index_path = Path(index_path)
+        self.dense: Dict[str, np.ndarray] = {}
+        self.sparse: Optional[sp.csr_matrix] = None
+        self.meta: Dict[str, np.ndarray] = {}
+        self.rows: List[Dict[str, Any]] = []
+
+    def _cache_key(self) -> str:
+        fields = ",".join(SEARCH_FIELDS)
+        return f"{type(embedding_fn).__name__}:{embedding_fn.dim['dense']}:{fields}:{CARD_JSON.stat().st_mtime_ns}"
+
+    def _load_cached(self, key: str) -> bool:
+        if not self.index_path.exists():
+            return False
+        with np.load(self.index_path, allow_pickle=False) as data:
+            if str(data["key"]) != key:
+                return False
+            self.dense = {
+                field: np.ascontiguousarray(data[field], dtype=np.float32)
+                for field in (DENSE_FIELD, NAME_FIELD, EVENT_FIELD)
+            }
+            self.sparse = sp.csr_matrix(
+                (data["sparse_data"], data["sparse_indices"], data["sparse_indptr"]),
+                shape=tuple(data["sparse_shape"]),
+            )
+        return True
+
+    def _save_cached(self, key: str):
+        tmp = self.index_path.with_name(self.index_path.stem + ".tmp.npz")
+        np.savez(
+            tmp,
+            key=np.array(key),
+            **self.dense,
+            sparse_data=self.sparse.data,
+            sparse_indices=self.sparse.indices,
+            sparse_indptr=self.sparse.indptr,
+            sparse_shape=np.array(self.sparse.shape),
+        )
+        os.replace(tmp, self.index_path)
+
+    def prepare(self):
+        columns = card_columns(load_cards_from_json())
+        self.meta = {
+            "rank": np.asarray(columns["rank"], dtype=np.int64),
+            "issuer": np.asarray(columns["issuer"], dtype=object),
+            "annual_fee": np.asarray(columns["annual_fee"], dtype=np.int64),
+        }
+        self.rows = [
+            {
+                "rank": columns["rank"][i],
+                "name": columns["name"][i],
+                "issuer": columns["issuer"][i],
+                "annual_fee": columns["annual_fee"][i],
+                "event_text": columns["event_text"][i],
+                "benefits_text": columns["benefits_raw"][i],
+            }
+            for i in range(len(columns["rank"]))
+        ]
+
+        key = self._cache_key()
+        if not self._load_cached(key) or self.dense[DENSE_FIELD].shape[0] != len(self.rows):
+            n = len(self.rows)
+            parts = dict(embed_in_chunks(
+                (start, field_texts({k: v[start:start + EMBED_BATCH_SIZE] for k, v in columns.items()}))
+                for start in range(0, n, EMBED_BATCH_SIZE)
+            ))
+            chunks = [
+                split_field_embeddings(parts[start], min(EMBED_BATCH_SIZE, n - start))
+                for start in sorted(parts)
+            ]
+            self.dense = {
+                field: np.ascontiguousarray(np.vstack([c[field] for c in chunks]), dtype=np.float32)
+                for field in (DENSE_FIELD, NAME_FIELD, EVENT_FIELD)
+            }
+            self.sparse = sp.vstack([c[SPARSE_FIELD] for c in chunks]).tocsr().astype(np.float32)
+            self._save_cached(key)
+        set_catalogue_version(catalogue_fingerprint(self.rows))
+
+    def _field_scores(self, field: str, dense: np.ndarray, sparse: sp.csr_matrix) -> np.ndarray:
+        if field == SPARSE_FIELD:
+            scores = (self.sparse @ sparse.T).toarray().ravel()
+            # Milvus sparse 검색처럼 겹치는 토큰이 없는 문서는 후보에서 뺀다
+            scores[scores <= 0] = -np.inf
+            return scores
+        return self.dense[field] @ dense
+
+    def search(self, dense, sparse, top_k, filters=None, weights=None):
+        weights = weights or resolve_weights(None)
+        dense = dense.astype(np.float32, copy=False)
+        with stage("memory_search"):
+            top, scores = weighted_fuse(
+                [self._field_scores(SEARCH_FIELDS[key], dense, sparse) for key in weights],
+                list(weights.values()),
+                limit=max(top_k * 2, top_k),
+                top_k=top_k,
+                mask=filter_mask(filters, self.meta),
+            )
+        return [{"score": float(score), **self.rows[i]} for i, score in zip(top, scores)]
+
+
+def encode_query_vectors(dense: np.ndarray, sparse: sp.csr_matrix) -> Dict[str, Any]:
+    """쿼리 벡터 -> JSON (dense: base64 float32, sparse: 1행 indices/values)"""
+    row = sparse.tocsr()
+    return {
+        "dense": base64.b64encode(np.asarray(dense, dtype=np.float32).tobytes()).decode("ascii"),
+        "sparse": {"indices": row.indices.tolist(), "values": row.data.tolist(), "dim": row.shape[1]},
+    }
+
+
+def decode_query_vectors(payload: Dict[str, Any]) -> Tuple[np.ndarray, sp.csr_matrix]:
+    dense = np.frombuffer(base64.b64decode(payload["dense"]), dtype=np.float32)
+    sparse = payload["sparse"]
+    indices = np.asarray(sparse["indices"], dtype=np.int64)
+    sparse_matrix = sp.csr_matrix(
+        (np.asarray(sparse["values"], dtype=np.float32), indices, [0, indices.size]),
+        shape=(1, sparse["dim"]),
+    )
+    return dense, sparse_matrix
+
+
+class RemoteSearchBackend(SearchBackend):
+    """
+    search_server.py (Milvus 를 단독으로 여는 owner 프로세스) 에 검색을 위임.
+    쿼리 임베딩은 각 워커에서 계산하고 벡터만 보낸다.
+    owner 의 catalogue version 이 바뀌면 이 프로세스의 응답 캐시도 비운다.
+    """
+
+    name = "remote"
+
+    def __init__(self, url: str = SEARCH_SERVER_URL, timeout: float = SEARCH_SERVER_TIMEOUT):
+        import httpx
+
+        if url.startswith("unix://"):
+            transport = httpx.HTTPTransport(uds=url[len("unix://"):])
+            self.client = httpx.Client(transport=transport, base_url="http://search", timeout=timeout)
+        else:
+            self.client = httpx.Client(base_url=url.rstrip("/"), timeout=timeout)
+        self.url = url
+        self.catalogue_version: Optional[str] = None
+        self._checked_at = 0.0
+        self._version_lock = threading.Lock()
+
+    def _check_version(self, version: str):
+        self._checked_at = time.monotonic()
+        if version != self.catalogue_version:
+            self.catalogue_version = version
+            set_catalogue_version(version)
+
+    def prepare(self):
+        response = self.client.get("/healthz")
+        response.raise_for_status()
+        self._check_version(response.json()["catalogue_version"])
+
+    def refresh_version(self, max_age: float = SEARCH_VERSION_POLL_S):
+        """owner 의 /version 을 max_age 초에 한 번만 확인 -> 재적재됐으면 이 워커의 캐시도 비운다"""
+        if time.monotonic() - self._checked_at < max_age:
+            return
+        with self._version_lock:
+            if time.monotonic() - self._checked_at < max_age:
+                return
+            try:
+                response = self.client.get("/version")
+                response.raise_for_status()
+            except Exception as exc:
+                # owner 가 잠시 내려가 있으면 새 카탈로그도 아직 없다 -> 다음 주기에 다시 확인
+                self._checked_at = time.monotonic()
+                print(f"⚠️ 검색 owner 버전 확인 실패: {exc}")
+                return
+            self._check_version(response.json()["catalogue_version"])
+
+    def search(self, dense, sparse, top_k, filters=None, weights=None):
+        with stage("remote_search"):
+            response = self.client.post("/search", json={
+                **encode_query_vectors(dense, sparse),
+                "top_k": top_k,
+                "filters": filters.dict() if filters is not None else None,
+                "weights": weights,
+            })
+        response.raise_for_status()
+        payload = response.json()
+        self._check_version(payload["catalogue_version"])
+        return payload["results"]
+
+
+SEARCH_BACKENDS = {
+    MilvusSearchBackend.name: MilvusSearchBackend,
+    InMemorySearchBackend.name: InMemorySearchBackend,
+    RemoteSearchBackend.name: RemoteSearchBackend,
+}
+
+
+def create_search_backend(name: str = SEARCH_BACKEND) -> SearchBackend:
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"unknown SEARCH_BACKEND: {name} (choose from {sorted(SEARCH_BACKENDS)})")
+    backend = SEARCH_BACKENDS[name]()
+    backend.prepare()
+    return backend
+
+
+def get_search_backend() -> SearchBackend:
+    global search_backend
+    if search_backend is None:
+        with _backend_lock:
+            if search_backend is None:
+                search_backend = create_search_backend()
+    return search_backend
 
 
 app = FastAPI(
@@ -179,8 +819,6 @@ def get_collection() -> Collection:
     if collection is not None:
         return collection
 
-    import threading
-
     if _collection_lock is None:
         _collection_lock = threading.Lock()
 
@@ -190,29 +828,33 @@ def get_collection() -> Collection:
     return collection
 
 
-def build_hybrid_requests(query: str, top_k: int) -> List[AnnSearchRequest]:
-    emb = embedding_fn.encode_queries([query])
-    dense = [[value for value in emb["dense"][0]]]
-    sparse_matrix = emb["sparse"].tocsr()
+def build_hybrid_requests(dense: np.ndarray, sparse_matrix: sp.csr_matrix, top_k: int,
+                          expr: str = "", weights: Optional[Dict[str, float]] = None) -> List[AnnSearchRequest]:
+    """weights 에 포함된 필드마다 AnnSearchRequest 1개 (순서 = WeightedRanker 가중치 순서)"""
+    requests = []
+    for key in weights or resolve_weights(None):
+        field = SEARCH_FIELDS[key]
+        requests.append(AnnSearchRequest(
+            data=sparse_matrix if field == SPARSE_FIELD else [dense.tolist()],
+            anns_field=field,
+            param={} if field == SPARSE_FIELD else {"metric_type": "IP"},
+            limit=max(top_k * 2, top_k),
+            expr=expr or None,
+        ))
+    return requests
 
-    dense_req = AnnSearchRequest(
-        data=dense,
-        anns_field=DENSE_FIELD,
-        param={"metric_type": "IP"},
-        limit=max(top_k * 2, top_k),
-    )
-    sparse_req = AnnSearchRequest(
-        data=sparse_matrix,
-        anns_field=SPARSE_FIELD,
-        param={},
-        limit=max(top_k * 2, top_k),
-    )
-    return [dense_req, sparse_req]
+
+def get_benefit_index() -> BenefitIndex:
+    global benefit_index
+    if benefit_index is None:
+        benefit_index = load_or_build_index()
+    return benefit_index
 
 
 @app.on_event("startup")
 def _startup_event():
-    get_collection()
+    get_search_backend()
+    get_benefit_index()
 
 
 @app.post("/search")
@@ -220,32 +862,60 @@ def search_benefits(request: SearchRequest):
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="query must not be empty")
 
-    collection = get_collection()
-
-    hybrid_reqs = build_hybrid_requests(request.query, request.top_k)
-
-    results = collection.hybrid_search(
-        hybrid_reqs,
-        rerank=RRFRanker(),
-        limit=request.top_k,
-        output_fields=["rank", "name", "issuer", "event_text", "benefits_raw"],
-    )
-
-    hits = results[0]
-    response = []
-    for hit in hits:
-        response.append(
-            {
-                "score": hit.score,
-                "rank": hit.entity.get("rank"),
-                "name": hit.entity.get("name"),
-                "issuer": hit.entity.get("issuer"),
-                "event_text": hit.entity.get("event_text"),
-                "benefits_text": hit.entity.get("benefits_raw"),
-            }
-        )
-
-    return {"query": request.query, "results": response}
+    try:
+        weights = resolve_weights(request.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    backend = get_search_backend()
+    key = search_cache_key(request, weights, backend.name)
+    backend.refresh_version()
+    results = search_cache.get(key)
+    cached = results is not None
+    if not cached:
+        version = search_cache.version
+        started = time.perf_counter()
+        dense, sparse_matrix = encode_query(request.query)
+        results = backend.search(dense, sparse_matrix, request.top_k, request.filters, weights)
+        search_cache.put(key, results, (time.perf_counter() - started) * 1000, version)
+
+    return {
+        "query": request.query,
+        "filter": compile_filter_expr(request.filters),
+        "weights": weights,
+        "backend": backend.name,
+        "cached": cached,
+        "results": results,
+    }
+
+
+@app.get("/search/cache/stats")
+def search_cache_stats():
+    return search_cache.summary()
+
+
+@app.get("/benefits/categories")
+def list_benefit_categories():
+    index = get_benefit_index()
+    return {"categories": index.categories()}
+
+
+@app.get("/benefits/categories/{category}")
+def cards_for_category(category: str):
+    category_name = normalize_category(category)
+    if category_name is None:
+        raise HTTPException(status_code=404, detail=f"unknown category: {category}")
+
+    index = get_benefit_index()
+    records_by_card: dict = {}
+    for record in index.records_for(category_name):
+        records_by_card.setdefault(record["card_id"], []).append(record)
+
+    cards = [
+        {"card_id": card_id, **index.cards[card_id], "benefits": records_by_card[card_id]}
+        for card_id in index.cards_for(category_name)
+    ]
+    return {"category": category_name, "cards": cards}
 
 
 if __name__ == "__main__":
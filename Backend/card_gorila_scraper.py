@@ -5,11 +5,17 @@ JavaScript 렌더링을 위해 Playwright 사용
 """
 
 from bs4 import BeautifulSoup
+import argparse
+import gzip
+import hashlib
 import json
+import os
 import time
 import csv
-from datetime import datetime
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
 import re
 
 try:
@@ -20,13 +26,235 @@ except ImportError:
     print("⚠️  Playwright가 설치되지 않았습니다. 'pip install playwright && playwright install chromium' 실행 필요")
 
 
+# 파싱에 쓰이는 정규식/상수는 모듈 로드 시 한 번만 컴파일
+CARD_ITEM_CLASS_RE = re.compile('card.*item|item.*card', re.I)
+DETAIL_LINK_RE = re.compile(r'/card/detail/')
+TITLE_NAME_CLASS_RE = re.compile('title|name', re.I)
+CARD_NAME_CLASS_RE = re.compile('card.*name|name.*card', re.I)
+TITLE_SECTION_CLASS_RE = re.compile('title|header|name', re.I)
+ISSUER_CLASS_RE = re.compile('issuer|company', re.I)
+FEE_CLASS_RE = re.compile('fee|annual', re.I)
+FEE_LABEL_RE = re.compile(r'^\s*연회비\s*$')
+# "국내전용 15,000원 해외겸용 [VISA] 18,000원" -> 옵션별 금액 문구
+FEE_OPTION_RE = re.compile(r'(국내전용|해외겸용|국내외겸용|해외|국내)[^\d없면무]{0,20}'
+                           r'((?:\d[\d,]*\s*(?:만|천)?\s*)+원|없음|면제|무료)')
+BENEFIT_CLASS_RE = re.compile('benefit', re.I)
+SPEC_CLASS_RE = re.compile('spec|info', re.I)
+BENEFIT_HEADING_RE = re.compile('주요혜택')
+NOTICE_CLASS_RE = re.compile('notice|caution|warning', re.I)
+RELATED_HEADING_RE = re.compile('연관')
+CONTENTS_LINK_RE = re.compile(r'/contents/')
+ITEM_CLASS_RE = re.compile('item', re.I)
+CATEGORY_CLASS_RE = re.compile('category|type', re.I)
+DISCOUNT_CLASS_RE = re.compile('discount|rate|percent', re.I)
+
+CARD_ISSUERS = ['신한카드', '삼성카드', 'KB국민카드', '하나카드', '롯데카드',
+                '현대카드', 'BC카드', 'NH카드', '우리카드', 'IBK기업은행카드',
+                '카카오뱅크', '토스카드']
+INVALID_CARD_NAMES = ['🏆 신용카드 실시간 인기순위', '신용카드 실시간 인기순위',
+                      '인기순위', '카드고릴라', 'TOP100']
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# BeautifulSoup 트리 빌더: 'html.parser'(표준 라이브러리, 기본) 또는 'lxml'(C 파서, 빠름)
+# lxml 은 설치 여부와 무관하게 SCRAPER_PARSER=lxml / --parser lxml 로 명시했을 때만 사용
+# (설치 환경에 따라 파싱 결과가 달라지지 않도록; bench_scraper_parse.py 로 일치 여부 확인)
+PARSER_BACKENDS = ('lxml', 'html.parser')
+DEFAULT_PARSER_BACKEND = os.getenv("SCRAPER_PARSER", "html.parser")
+
+
+_lxml_warned = False
+
+
+def _warn_lxml_missing():
+    global _lxml_warned
+    if not _lxml_warned:
+        _lxml_warned = True
+        print("⚠️ lxml 이 설치되어 있지 않아 html.parser 로 파싱합니다. (pip install lxml)")
+
+
+def make_soup(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """선택한 파서 백엔드로 BeautifulSoup 생성 (lxml 을 골랐는데 미설치면 html.parser)"""
+    backend = backend or DEFAULT_PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"지원하지 않는 파서 백엔드: {backend}")
+    if backend == 'lxml' and not LXML_AVAILABLE:
+        _warn_lxml_missing()
+        backend = 'html.parser'
+    return BeautifulSoup(html, backend)
+
+
+DEFAULT_SNAPSHOT_DIR = os.getenv("SCRAPER_SNAPSHOT_DIR", "html_snapshots")
+
+
+class SnapshotCache:
+    """
+    가져온 HTML을 압축 저장하는 content-addressed 스냅샷 캐시
+
+    - objects/<sha256[:2]>/<sha256>.html.gz : 페이지 본문 (동일 내용은 한 번만 저장)
+    - index.json : {url: {fetch_date(YYYY-MM-DD): {sha256, fetched_at, size}}}
+
+    파서 수정 시 브라우저 없이 --reparse 로 다시 파싱할 수 있고,
+    저장된 페이지는 파서 벤치마크 fixture로도 사용된다.
+    """
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self._index: Dict[str, Dict[str, Dict]] = {}
+        if self.index_path.exists():
+            self._index = json.loads(
+                self.index_path.read_text(encoding="utf-8"))
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.html.gz"
+
+    def put(self, url: str, html: str, fetched_at: Optional[datetime] = None) -> str:
+        """HTML을 저장하고 sha256 digest를 반환"""
+        fetched_at = fetched_at or datetime.now()
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        obj_path = self._object_path(digest)
+        if not obj_path.exists():
+            obj_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = obj_path.with_suffix(".tmp")
+            tmp_path.write_bytes(gzip.compress(raw, compresslevel=6))
+            os.replace(tmp_path, obj_path)
+
+        self._index.setdefault(url, {})[fetched_at.date().isoformat()] = {
+            "sha256": digest,
+            "fetched_at": fetched_at.isoformat(),
+            "size": len(raw),
+        }
+        self._save_index()
+        return digest
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(
+            self._index, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, url: str, date: Optional[str] = None) -> Optional[Dict]:
+        """url의 스냅샷 메타데이터 (date 지정 시 해당 날짜 이하 중 최신)"""
+        entries = self._index.get(url)
+        if not entries:
+            return None
+        dates = sorted(d for d in entries if date is None or d <= date)
+        if not dates:
+            return None
+        return entries[dates[-1]]
+
+    def read(self, digest: str) -> str:
+        return gzip.decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+
+    def urls(self) -> List[str]:
+        return list(self._index)
+
+
+DEFAULT_CRAWL_STATE = os.getenv("SCRAPER_CRAWL_STATE", "crawl_state.json")
+DEFAULT_DETAIL_TTL_HOURS = float(os.getenv("SCRAPER_DETAIL_TTL_HOURS", "24"))
+
+CARD_ID_PATTERN = re.compile(r'/card/detail/(\d+)')
+
+
+def card_id_from_link(link: Optional[str]) -> Optional[str]:
+    """/card/detail/<id> 링크에서 카드 id 추출"""
+    if not link:
+        return None
+    match = CARD_ID_PATTERN.search(link)
+    return match.group(1) if match else None
+
+
+class CrawlState:
+    """
+    카드 id 기준 증분 크롤링 상태
+
+    - cards: {card_id: {detail, fetched_at}} - 마지막으로 수집한 상세정보
+    - run: 진행 중인 실행의 TOP100 목록과 완료 여부
+
+    상세정보를 하나 수집할 때마다 파일에 체크포인트하므로, 중간에 중단되어도
+    다음 실행은 TTL 내에 수집된 카드를 건너뛰고 이어서 진행한다.
+    """
+
+    def __init__(self, path: str = DEFAULT_CRAWL_STATE):
+        self.path = Path(path)
+        self.cards: Dict[str, Dict] = {}
+        self.run: Dict = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.cards = data.get("cards", {})
+            self.run = data.get("run", {})
+
+    def checkpoint(self):
+        """상태를 원자적으로 파일에 기록"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(
+            {"cards": self.cards, "run": self.run}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, card_id: Optional[str], ttl: timedelta) -> bool:
+        entry = self.cards.get(card_id) if card_id else None
+        if not entry:
+            return False
+        fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        return datetime.now() - fetched_at < ttl
+
+    def get_detail(self, card_id: str) -> Dict:
+        return self.cards[card_id]["detail"]
+
+    def record_detail(self, card_id: str, detail: Dict):
+        self.cards[card_id] = {
+            "detail": detail,
+            "fetched_at": datetime.now().isoformat(),
+        }
+        self.checkpoint()
+
+    def resumable_cards(self, term: str, ttl: timedelta) -> Optional[List[Dict]]:
+        """중단된 실행이 있으면 그 실행의 TOP100 목록을 반환"""
+        run = self.run
+        if not run or run.get("finished") or run.get("term") != term:
+            return None
+        started_at = datetime.fromisoformat(run["started_at"])
+        if datetime.now() - started_at >= ttl:
+            return None
+        return run.get("top100_cards") or None
+
+    def start_run(self, term: str, top100_cards: List[Dict]):
+        self.run = {
+            "term": term,
+            "started_at": datetime.now().isoformat(),
+            "top100_cards": top100_cards,
+            "finished": False,
+        }
+        self.checkpoint()
+
+    def finish_run(self):
+        if self.run:
+            self.run["finished"] = True
+            self.run["finished_at"] = datetime.now().isoformat()
+        self.checkpoint()
+
+
 class CardGorillaScraper:
-    def __init__(self, use_playwright: bool = True):
+    def __init__(self, use_playwright: bool = True,
+                 snapshots: Optional[SnapshotCache] = None,
+                 parser_backend: Optional[str] = None):
         self.base_url = "https://www.card-gorilla.com"
         self.use_playwright = use_playwright and PLAYWRIGHT_AVAILABLE
         self.delay = 2  # 요청 간 지연시간 (초)
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
+        self.snapshots = snapshots
+        self.parser_backend = parser_backend or DEFAULT_PARSER_BACKEND
 
         if self.use_playwright:
             self.playwright = sync_playwright().start()
@@ -63,7 +291,9 @@ class CardGorillaScraper:
             time.sleep(2)
 
             html = self.page.content()
-            return BeautifulSoup(html, 'html.parser')
+            if self.snapshots is not None:
+                self.snapshots.put(url, html)
+            return make_soup(html, self.parser_backend)
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
@@ -76,12 +306,19 @@ class CardGorillaScraper:
         Args:
             term: 기간 선택 ('weekly', 'monthly' 등)
         """
-        url = f"{self.base_url}/chart/top100?term={term}"
+        url = self.top100_url(term)
         soup = self.get_page(url)
 
         if not soup:
             return []
 
+        return self.parse_top100_page(soup)
+
+    def top100_url(self, term: str = 'weekly') -> str:
+        return f"{self.base_url}/chart/top100?term={term}"
+
+    def parse_top100_page(self, soup: BeautifulSoup) -> List[Dict]:
+        """TOP100 페이지 HTML에서 카드 목록 파싱"""
         cards = []
 
         # ranking_wrap 영역 찾기
@@ -98,7 +335,7 @@ class CardGorillaScraper:
             # 대체 선택자 시도
             card_items = ranking_section.find_all('article') or \
                 ranking_section.find_all(
-                    'div', class_=re.compile('card.*item|item.*card', re.I))
+                    'div', class_=CARD_ITEM_CLASS_RE)
 
         print(f"Found {len(card_items)} card items")
 
@@ -167,7 +404,7 @@ class CardGorillaScraper:
         # 카드 상세 링크 및 카드명
         # 여러 링크가 있을 수 있으므로, name_area를 포함한 링크를 찾음
         link_elem = None
-        for link in item.find_all('a', href=re.compile(r'/card/detail/')):
+        for link in item.find_all('a', href=DETAIL_LINK_RE):
             # name_area를 포함한 링크가 실제 카드명 링크
             if link.find('div', class_='name_area') or link.find('p', class_='card_name'):
                 link_elem = link
@@ -175,7 +412,7 @@ class CardGorillaScraper:
 
         # name_area를 포함한 링크가 없으면 첫 번째 링크 사용
         if not link_elem:
-            link_elem = item.find('a', href=re.compile(r'/card/detail/'))
+            link_elem = item.find('a', href=DETAIL_LINK_RE)
 
         if link_elem:
             href = link_elem.get('href', '')
@@ -203,11 +440,8 @@ class CardGorillaScraper:
                     # 카드사명이 아닌 가장 긴 텍스트를 카드명으로 사용
                     if texts:
                         # 카드사명 제외하고 가장 긴 텍스트 선택
-                        card_issuers = ['신한카드', '삼성카드', 'KB국민카드', '하나카드', '롯데카드',
-                                        '현대카드', 'BC카드', 'NH카드', '우리카드', 'IBK기업은행카드',
-                                        '카카오뱅크', '토스카드']
                         filtered_texts = [t for t in texts if not any(
-                            issuer in t for issuer in card_issuers)]
+                            issuer in t for issuer in CARD_ISSUERS)]
                         if filtered_texts:
                             card_name = max(filtered_texts, key=len)
                         else:
@@ -218,11 +452,8 @@ class CardGorillaScraper:
                 link_text = link_elem.get_text(strip=True)
                 if link_text:
                     # 카드사명 제거
-                    card_issuers = ['신한카드', '삼성카드', 'KB국민카드', '하나카드', '롯데카드',
-                                    '현대카드', 'BC카드', 'NH카드', '우리카드', 'IBK기업은행카드',
-                                    '카카오뱅크', '토스카드']
                     cleaned_text = link_text
-                    for issuer in card_issuers:
+                    for issuer in CARD_ISSUERS:
                         cleaned_text = cleaned_text.replace(issuer, '').strip()
                     if cleaned_text:
                         card_name = cleaned_text
@@ -230,11 +461,9 @@ class CardGorillaScraper:
                         card_name = link_text
 
             # 잘못된 카드명 필터링 (페이지 제목 등)
-            invalid_names = ['🏆 신용카드 실시간 인기순위', '신용카드 실시간 인기순위',
-                             '인기순위', '카드고릴라', 'TOP100']
             if card_name:
                 # 잘못된 값이면 None으로 설정
-                if any(invalid in card_name for invalid in invalid_names):
+                if any(invalid in card_name for invalid in INVALID_CARD_NAMES):
                     card_name = None
 
             if card_name:
@@ -274,11 +503,8 @@ class CardGorillaScraper:
                         alt_text = img_elem.get('alt', '').strip()
                         if alt_text and len(alt_text) > 2:
                             # 카드사명 제거
-                            card_issuers = ['신한카드', '삼성카드', 'KB국민카드', '하나카드', '롯데카드',
-                                            '현대카드', 'BC카드', 'NH카드', '우리카드', 'IBK기업은행카드',
-                                            '카카오뱅크', '토스카드']
                             cleaned_alt = alt_text
-                            for issuer in card_issuers:
+                            for issuer in CARD_ISSUERS:
                                 cleaned_alt = cleaned_alt.replace(
                                     issuer, '').strip()
                             if cleaned_alt:
@@ -291,10 +517,7 @@ class CardGorillaScraper:
             full_text = item.get_text(strip=True)
             if full_text:
                 # 카드사명 추출 시도 (일반적인 카드사명 패턴)
-                card_issuers = ['신한카드', '삼성카드', 'KB국민카드', '하나카드', '롯데카드',
-                                '현대카드', 'BC카드', 'NH카드', '우리카드', 'IBK기업은행카드',
-                                '카카오뱅크', '토스카드']
-                for issuer in card_issuers:
+                for issuer in CARD_ISSUERS:
                     if issuer in full_text:
                         card_data['issuer'] = issuer
                         break
@@ -312,9 +535,14 @@ class CardGorillaScraper:
         if not soup:
             return {}
 
+        return self.parse_card_detail(soup, card_url)
+
+    def parse_card_detail(self, soup: BeautifulSoup, card_url: str,
+                          scraped_at: Optional[str] = None) -> Dict:
+        """카드 상세 페이지 HTML 파싱"""
         detail = {
             'url': card_url,
-            'scraped_at': datetime.now().isoformat()
+            'scraped_at': scraped_at or datetime.now().isoformat()
         }
 
         try:
@@ -328,21 +556,20 @@ class CardGorillaScraper:
 
             # 2. h2 태그에서 추출 (title, name 클래스)
             if not card_name:
-                title = soup.find('h2', class_=re.compile('title|name', re.I))
+                title = soup.find('h2', class_=TITLE_NAME_CLASS_RE)
                 if title:
                     card_name = title.get_text(strip=True)
 
             # 3. card_name 클래스를 가진 요소에서 추출
             if not card_name:
-                name_elem = soup.find(class_=re.compile(
-                    'card.*name|name.*card', re.I))
+                name_elem = soup.find(class_=CARD_NAME_CLASS_RE)
                 if name_elem:
                     card_name = name_elem.get_text(strip=True)
 
             # 4. 상세 페이지의 제목 영역에서 추출
             if not card_name:
                 title_section = soup.find(
-                    'div', class_=re.compile('title|header|name', re.I))
+                    'div', class_=TITLE_SECTION_CLASS_RE)
                 if title_section:
                     # h1, h2, strong 태그 찾기
                     title_tag = title_section.find(['h1', 'h2', 'strong'])
@@ -376,25 +603,29 @@ class CardGorillaScraper:
 
             # 카드사
             issuer = soup.find(
-                'span', class_=re.compile('issuer|company', re.I))
+                'span', class_=ISSUER_CLASS_RE)
             if issuer:
                 detail['issuer'] = issuer.get_text(strip=True)
 
-            # 연회비 정보
-            fee_section = soup.find('dl', class_=re.compile('fee|annual', re.I)) or \
-                soup.find('div', class_=re.compile('fee|annual', re.I))
-            if fee_section:
-                detail['annual_fee'] = self._parse_fee_section(fee_section)
+            # 연회비 정보: '연회비' 라벨 옆 값 우선, 없으면 fee/annual 클래스 섹션
+            annual_fee = self._extract_annual_fee(soup)
+            if not annual_fee:
+                fee_section = soup.find('dl', class_=FEE_CLASS_RE) or \
+                    soup.find('div', class_=FEE_CLASS_RE)
+                if fee_section:
+                    annual_fee = self._parse_fee_section(fee_section)
+            if annual_fee:
+                detail['annual_fee'] = annual_fee
 
             # 혜택 정보
-            benefit_section = soup.find('div', class_=re.compile('benefit', re.I)) or \
-                soup.find('section', class_=re.compile('benefit', re.I))
+            benefit_section = soup.find('div', class_=BENEFIT_CLASS_RE) or \
+                soup.find('section', class_=BENEFIT_CLASS_RE)
             if benefit_section:
                 detail['benefits'] = self._parse_benefits(benefit_section)
 
             # 카드 스펙
             spec_table = soup.find('table') or soup.find(
-                'dl', class_=re.compile('spec|info', re.I))
+                'dl', class_=SPEC_CLASS_RE)
             if spec_table:
                 detail['specifications'] = self._parse_specifications(
                     spec_table)
@@ -417,7 +648,7 @@ class CardGorillaScraper:
 
         try:
             # 주요혜택 섹션 찾기
-            benefit_heading = soup.find('h3', string=re.compile('주요혜택'))
+            benefit_heading = soup.find('h3', string=BENEFIT_HEADING_RE)
             if benefit_heading:
                 benefit_article = benefit_heading.find_parent('article')
                 if benefit_article:
@@ -439,20 +670,20 @@ class CardGorillaScraper:
 
                     # 하단 안내 텍스트
                     notice_divs = benefit_article.find_all(
-                        'div', class_=re.compile('notice|caution|warning', re.I))
+                        'div', class_=NOTICE_CLASS_RE)
                     for div in notice_divs:
                         text = div.get_text(strip=True)
                         if text and text not in description['notices_text']:
                             description['notices_text'].append(text)
 
             # 연관 콘텐츠 섹션 찾기
-            related_heading = soup.find('h3', string=re.compile('연관'))
+            related_heading = soup.find('h3', string=RELATED_HEADING_RE)
             if related_heading:
                 related_article = related_heading.find_parent('article')
                 if related_article:
                     # 연관 콘텐츠 링크들
                     related_links = related_article.find_all(
-                        'a', href=re.compile(r'/contents/'))
+                        'a', href=CONTENTS_LINK_RE)
                     for link in related_links[:5]:  # 최대 5개만
                         title_elem = link.find('p')
                         if title_elem:
@@ -483,6 +714,20 @@ class CardGorillaScraper:
 
         return description
 
+    def _extract_annual_fee(self, soup: BeautifulSoup) -> Dict:
+        """'연회비' 라벨(dt/th/strong 등) 바로 다음 요소의 값 -> {옵션: 금액 문구} 또는 {'raw': 값}"""
+        for label in soup.find_all(string=FEE_LABEL_RE):
+            tag = label.parent
+            value = tag.find_next_sibling() or (tag.parent.find_next_sibling() if tag.parent else None)
+            if value is None:
+                continue
+            text = value.get_text(' ', strip=True)
+            if not text:
+                continue
+            fees = {option: amount for option, amount in FEE_OPTION_RE.findall(text)}
+            return fees or {'raw': text}
+        return {}
+
     def _parse_fee_section(self, section) -> Dict:
         """연회비 섹션 파싱"""
         fees = {}
@@ -504,18 +749,18 @@ class CardGorillaScraper:
         try:
             # li 항목들
             items = section.find_all('li') or section.find_all(
-                'div', class_=re.compile('item', re.I))
+                'div', class_=ITEM_CLASS_RE)
             for item in items:
                 benefit = {}
 
                 # 카테고리
                 category = item.find(
-                    'span', class_=re.compile('category|type', re.I))
+                    'span', class_=CATEGORY_CLASS_RE)
                 if category:
                     benefit['category'] = category.get_text(strip=True)
 
                 # 할인율/혜택
-                discount = item.find('span', class_=re.compile('discount|rate|percent', re.I)) or \
+                discount = item.find('span', class_=DISCOUNT_CLASS_RE) or \
                     item.find('strong')
                 if discount:
                     benefit['discount'] = discount.get_text(strip=True)
@@ -581,17 +826,210 @@ class CardGorillaScraper:
         print(f"✅ Saved {len(data)} items to {filename}")
 
 
-def main():
+def merge_card_detail(card: Dict, detail: Dict) -> Dict:
+    """TOP100 목록 정보와 상세정보 병합"""
+    merged = {**card, **detail}
+
+    # 카드명 우선순위: card (올바른 값) > detail > fallback
+    # 1. 기본 정보의 카드명이 올바른 값이면 우선 사용
+    card_name = card.get('name', '').strip()
+    if card_name and not any(invalid in card_name for invalid in INVALID_CARD_NAMES):
+        merged['name'] = card_name
+    # 2. 상세정보에서 추출한 카드명이 있으면 사용
+    elif detail.get('name') and detail.get('name').strip():
+        detail_name = detail.get('name').strip()
+        # 상세정보의 name도 잘못된 값이 아닌지 확인
+        if not any(invalid in detail_name for invalid in INVALID_CARD_NAMES):
+            merged['name'] = detail_name
+        else:
+            # 상세정보도 잘못된 값이면 URL에서 추출
+            url_parts = card.get('link', '').split('/')
+            if url_parts:
+                merged['name'] = f"카드 {url_parts[-1]}"
+    # 3. 둘 다 없거나 모두 잘못된 값이면 URL에서 추출
+    else:
+        url_parts = card.get('link', '').split('/')
+        if url_parts:
+            merged['name'] = f"카드 {url_parts[-1]}"
+
+    return merged
+
+
+def save_detailed_cards(scraper: CardGorillaScraper, detailed_cards: List[Dict],
+                        failed_cards: List[Dict]):
+    """상세정보 JSON 저장 및 요약 출력"""
+    scraper.save_to_json(detailed_cards, 'cardgorilla_top100_detailed.json')
+    print(f"\n✅ 상세정보 {len(detailed_cards)}개 저장 완료")
+
+    # 설명 텍스트가 있는 카드 수 확인
+    cards_with_text = sum(1 for card in detailed_cards
+                          if card.get('description_text') and
+                          card.get('description_text', {}).get('full_description'))
+    print(f"   - 설명 텍스트 포함: {cards_with_text}개")
+
+    if failed_cards:
+        print(f"\n⚠️  {len(failed_cards)}개 카드에서 에러 발생:")
+        for failed in failed_cards[:5]:  # 처음 5개만 표시
+            print(f"   - {failed['card']}: {failed['error'][:50]}")
+
+
+def _fallback_card(state: CrawlState, card_id: Optional[str], card: Dict) -> Dict:
+    """상세 수집 실패 시 이전에 수집한 상세정보가 있으면 병합해서 사용"""
+    if card_id and card_id in state.cards:
+        return merge_card_detail(card, state.get_detail(card_id))
+    return card
+
+
+_worker_scraper: Optional[CardGorillaScraper] = None
+_worker_snapshots: Optional[SnapshotCache] = None
+
+
+def _reparse_detail_worker(job: Tuple[str, str, str, str, str]) -> Dict:
+    """프로세스 풀 작업: 스냅샷 하나를 읽어 상세정보로 파싱"""
+    global _worker_scraper, _worker_snapshots
+    snapshot_dir, url, digest, fetched_at, parser_backend = job
+    if _worker_scraper is None or _worker_scraper.parser_backend != parser_backend:
+        _worker_scraper = CardGorillaScraper(
+            use_playwright=False, parser_backend=parser_backend)
+    if _worker_snapshots is None or str(_worker_snapshots.root) != snapshot_dir:
+        _worker_snapshots = SnapshotCache(snapshot_dir)
+    html = _worker_snapshots.read(digest)
+    soup = make_soup(html, parser_backend)
+    return _worker_scraper.parse_card_detail(soup, url, scraped_at=fetched_at)
+
+
+def reparse_from_snapshots(snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                           term: str = 'weekly',
+                           date: Optional[str] = None,
+                           workers: Optional[int] = None,
+                           parser_backend: Optional[str] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    브라우저 없이 스냅샷만으로 TOP100 목록/상세정보를 다시 파싱
+
+    Args:
+        snapshot_dir: SnapshotCache 디렉터리
+        term: TOP100 기간 ('weekly', 'monthly' 등)
+        date: YYYY-MM-DD. 지정 시 해당 날짜 이하의 최신 스냅샷 사용
+        workers: 상세 페이지 파싱 프로세스 수 (기본: CPU 수)
+        parser_backend: 'lxml' 또는 'html.parser' (기본: DEFAULT_PARSER_BACKEND)
+
+    Returns:
+        (top100_cards, detailed_cards, failed_cards)
+    """
+    snapshots = SnapshotCache(snapshot_dir)
+    scraper = CardGorillaScraper(
+        use_playwright=False, parser_backend=parser_backend)
+
+    list_url = scraper.top100_url(term)
+    list_meta = snapshots.lookup(list_url, date)
+    if not list_meta:
+        print(f"❌ 스냅샷이 없습니다: {list_url}")
+        return [], [], []
+
+    soup = make_soup(snapshots.read(list_meta['sha256']), scraper.parser_backend)
+    top100_cards = scraper.parse_top100_page(soup)
+    for card in top100_cards:
+        card['scraped_at'] = list_meta['fetched_at']
+
+    jobs = {}
+    for idx, card in enumerate(top100_cards):
+        link = card.get('link')
+        meta = snapshots.lookup(link, date) if link else None
+        if meta:
+            jobs[idx] = (str(snapshots.root), link, meta['sha256'],
+                         meta['fetched_at'], scraper.parser_backend)
+
+    print(f"스냅샷 {len(jobs)}/{len(top100_cards)}개 상세 페이지 재파싱 중...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        details = dict(zip(jobs, pool.map(
+            _reparse_detail_worker, jobs.values(), chunksize=4)))
+
+    detailed_cards = []
+    failed_cards = []
+    for idx, card in enumerate(top100_cards):
+        detail = details.get(idx)
+        if detail:
+            detailed_cards.append(merge_card_detail(card, detail))
+        else:
+            if card.get('link'):
+                failed_cards.append({'card': card.get('name') or f"카드 #{idx + 1}",
+                                     'error': '스냅샷 없음'})
+            detailed_cards.append(card)
+
+    return top100_cards, detailed_cards, failed_cards
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="카드고릴라 TOP100 스크래퍼")
+    parser.add_argument('--reparse', action='store_true',
+                        help="브라우저 없이 저장된 HTML 스냅샷으로 다시 파싱")
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR,
+                        help="HTML 스냅샷 캐시 디렉터리")
+    parser.add_argument('--date', default=None,
+                        help="--reparse 시 사용할 스냅샷 날짜 (YYYY-MM-DD, 기본: 최신)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="--reparse 파싱 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--term', default='weekly',
+                        help="TOP100 기간 (weekly, monthly 등)")
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default=DEFAULT_PARSER_BACKEND,
+                        help="HTML 파서 백엔드")
+    parser.add_argument('--state-file', default=DEFAULT_CRAWL_STATE,
+                        help="증분 크롤링 상태(체크포인트) 파일")
+    parser.add_argument('--ttl-hours', type=float, default=DEFAULT_DETAIL_TTL_HOURS,
+                        help="상세정보 재수집 주기 (시간)")
+    parser.add_argument('--full', action='store_true',
+                        help="크롤링 상태를 무시하고 모든 상세 페이지를 다시 수집")
+    return parser.parse_args(argv)
+
+
+def reparse_main(args: argparse.Namespace):
+    """스냅샷 재파싱 실행 함수"""
+    print("=" * 60)
+    print("카드고릴라 TOP100 스냅샷 재파싱 (브라우저 미사용)")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    top100_cards, detailed_cards, failed_cards = reparse_from_snapshots(
+        args.snapshot_dir, term=args.term, date=args.date, workers=args.workers,
+        parser_backend=args.parser)
+
+    if not top100_cards:
+        print("\n❌ 재파싱할 카드 정보가 없습니다.")
+        return
+
+    scraper = CardGorillaScraper(use_playwright=False)
+    scraper.save_to_json(top100_cards, 'cardgorilla_top100.json')
+    scraper.save_to_csv(top100_cards, 'cardgorilla_top100.csv')
+    save_detailed_cards(scraper, detailed_cards, failed_cards)
+    print(f"\n⏱  재파싱 소요 시간: {time.perf_counter() - started:.2f}s")
+
+
+def main(argv: Optional[List[str]] = None):
     """메인 실행 함수"""
-    scraper = CardGorillaScraper()
+    args = parse_args(argv)
+    if args.reparse:
+        reparse_main(args)
+        return
+
+    scraper = CardGorillaScraper(snapshots=SnapshotCache(args.snapshot_dir),
+                                 parser_backend=args.parser)
+    state = CrawlState(args.state_file)
+    ttl = timedelta(hours=args.ttl_hours)
 
     print("=" * 60)
     print("카드고릴라 TOP100 스크래핑 시작")
     print("=" * 60)
 
     # 1. TOP100 인기 카드 스크래핑 (주간 기준)
-    print("\n[1/2] TOP100 카드 목록 스크래핑 중... (주간 기준)")
-    top100_cards = scraper.scrape_top100_cards(term='weekly')
+    top100_cards = None if args.full else state.resumable_cards(args.term, ttl)
+    if top100_cards:
+        print(f"\n[1/2] 중단된 실행을 이어서 진행합니다. "
+              f"(목록 수집: {state.run['started_at']})")
+    else:
+        print("\n[1/2] TOP100 카드 목록 스크래핑 중... (주간 기준)")
+        top100_cards = scraper.scrape_top100_cards(term=args.term)
+        if top100_cards:
+            state.start_run(args.term, top100_cards)
 
     if top100_cards:
         print(f"\n✅ 총 {len(top100_cards)}개의 카드 정보를 수집했습니다.")
@@ -618,45 +1056,33 @@ def main():
         print(f"총 {len(top100_cards)}개 카드의 상세정보를 수집합니다. (시간이 다소 걸릴 수 있습니다)")
         detailed_cards = []
         failed_cards = []
+        reused_count = 0
 
         for idx, card in enumerate(top100_cards, 1):
             if 'link' in card and card.get('link'):
                 # 카드명 추출 (여러 소스에서 시도)
                 card_name = card.get('name') or card.get(
                     'image_alt') or card.get('raw_link_text') or f"카드 #{idx}"
+                card_id = card_id_from_link(card['link'])
+
+                # TTL 이내에 수집된 상세정보는 재사용
+                if not args.full and state.is_fresh(card_id, ttl):
+                    detailed_cards.append(
+                        merge_card_detail(card, state.get_detail(card_id)))
+                    reused_count += 1
+                    continue
+
                 print(
                     f"  [{idx}/{len(top100_cards)}] {card_name} 상세정보 수집 중...", end=' ', flush=True)
                 try:
                     detail = scraper.scrape_card_detail(card['link'])
                     if detail:
+                        # 카드별 체크포인트
+                        if card_id:
+                            state.record_detail(card_id, detail)
+
                         # 기본 정보와 상세정보 병합
-                        merged = {**card, **detail}
-
-                        # 카드명 우선순위: card (올바른 값) > detail > fallback
-                        # 잘못된 값 필터링
-                        invalid_names = ['🏆 신용카드 실시간 인기순위', '신용카드 실시간 인기순위',
-                                         '인기순위', '카드고릴라', 'TOP100']
-
-                        # 1. 기본 정보의 카드명이 올바른 값이면 우선 사용
-                        card_name = card.get('name', '').strip()
-                        if card_name and not any(invalid in card_name for invalid in invalid_names):
-                            merged['name'] = card_name
-                        # 2. 상세정보에서 추출한 카드명이 있으면 사용
-                        elif detail.get('name') and detail.get('name').strip():
-                            detail_name = detail.get('name').strip()
-                            # 상세정보의 name도 잘못된 값이 아닌지 확인
-                            if not any(invalid in detail_name for invalid in invalid_names):
-                                merged['name'] = detail_name
-                            else:
-                                # 상세정보도 잘못된 값이면 URL에서 추출
-                                url_parts = card.get('link', '').split('/')
-                                if url_parts:
-                                    merged['name'] = f"카드 {url_parts[-1]}"
-                        # 3. 둘 다 없거나 모두 잘못된 값이면 URL에서 추출
-                        else:
-                            url_parts = card.get('link', '').split('/')
-                            if url_parts:
-                                merged['name'] = f"카드 {url_parts[-1]}"
+                        merged = merge_card_detail(card, detail)
 
                         detailed_cards.append(merged)
                         # 설명 텍스트가 있는지 확인
@@ -670,33 +1096,25 @@ def main():
                             print("✅ (텍스트 없음)")
                     else:
                         print("⚠️  (상세정보 없음)")
-                        # 상세정보가 없어도 기본 정보는 저장
-                        detailed_cards.append(card)
+                        # 상세정보가 없어도 기본 정보(또는 이전 상세정보)는 저장
+                        detailed_cards.append(_fallback_card(state, card_id, card))
                 except Exception as e:
                     print(f"❌ (에러: {str(e)[:50]})")
                     failed_cards.append(
                         {'card': card_name or f"카드 #{idx}", 'error': str(e)})
-                    # 에러가 발생해도 기본 정보는 저장
-                    detailed_cards.append(card)
+                    # 에러가 발생해도 기본 정보(또는 이전 상세정보)는 저장
+                    detailed_cards.append(_fallback_card(state, card_id, card))
             else:
                 # 링크가 없는 경우 기본 정보만 저장
                 detailed_cards.append(card)
 
+        if reused_count:
+            print(f"  ♻️  {reused_count}개 카드는 {args.ttl_hours:g}시간 이내 수집본을 재사용했습니다.")
+
         if detailed_cards:
-            scraper.save_to_json(
-                detailed_cards, 'cardgorilla_top100_detailed.json')
-            print(f"\n✅ 상세정보 {len(detailed_cards)}개 저장 완료")
-
-            # 설명 텍스트가 있는 카드 수 확인
-            cards_with_text = sum(1 for card in detailed_cards
-                                  if card.get('description_text') and
-                                  card.get('description_text', {}).get('full_description'))
-            print(f"   - 설명 텍스트 포함: {cards_with_text}개")
-
-            if failed_cards:
-                print(f"\n⚠️  {len(failed_cards)}개 카드에서 에러 발생:")
-                for failed in failed_cards[:5]:  # 처음 5개만 표시
-                    print(f"   - {failed['card']}: {failed['error'][:50]}")
+            save_detailed_cards(scraper, detailed_cards, failed_cards)
+
+        state.finish_run()
 
     else:
         print("\n❌ 카드 정보를 수집하지 못했습니다.")
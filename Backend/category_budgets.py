@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-category monthly budgets with running spend counters ("카테고리별 목표 금액").
+
+Targets are stored per user (fintech_use_num) and category; a target applies
+to every month. Spending is never recomputed from the transactions table on
+a check. Instead the transaction ingest path (POST /alerts/ingest and the
+transactions tailer in benefit_alerts) calls BudgetStore.record_many, which
+folds the batch into (user, month, category) increments. A single
+transaction then applies them as `spent = spent + ?` upserts, so concurrent
+writers (serve.py workers, the tailer, batch loads) never lose an update.
+Every withdrawal counts towards its category (benefit_extractor's merchant
+categories, the same taxonomy as the benefit simulator and the missed-benefit
+alerts; OTHER_CATEGORY when none matches) and towards TOTAL_CATEGORY.
+
+Counting is idempotent. Each withdrawal has a content key
+(transaction_key: user, date, time, direction, merchant and amount), and the
+keys are recorded in budget_applied in the same SQLite transaction as the
+increments. A batch the tailer re-reads after a crash is not counted twice.
+Neither is an event posted to /alerts/ingest that the tailer later reads from
+the transactions table. Ingest events must carry tran_time to match.
+
+"Remaining" and "over budget" checks are primary-key lookups on one target
+row and one counter row, independent of how many transactions the user has.
+
+Endpoints (mounted on main_api):
+- PUT /budgets/{fintech_use_num}/targets       : set / clear targets
+- GET /budgets/{fintech_use_num}?month=YYYYMM : every target with spent / remaining
+- GET /budgets/{fintech_use_num}/{category}   : one category
+- GET /budgets/stats
+
+Backfill counters for an existing month (run before enabling the tailer):
+    python category_budgets.py --backfill 202510
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from benefit_extractor import OTHER_CATEGORY, spend_category
+from benefit_simulator import SPEND_CATEGORIES
+
+BUDGET_STORE_PATH = os.getenv("BUDGET_STORE_PATH", "category_budgets.sqlite")
+# 0 이면 수집 경로가 예산 카운터를 갱신하지 않음
+BUDGET_TRACKING_ENABLED = os.getenv("BUDGET_TRACKING_ENABLED", "1") not in ("0", "false", "False")
+
+TOTAL_CATEGORY = "전체"
+# 혜택 시뮬레이터·놓친 혜택 알림과 같은 지출 카테고리
+CATEGORIES = (TOTAL_CATEGORY, *SPEND_CATEGORIES, OTHER_CATEGORY)
+# 같은 거래를 알아보는 필드 - 수집 이벤트(TransactionEvent)와 transactions 행에 공통으로 있는 것만
+KEY_FIELDS = ("fintech_use_num", "tran_date", "tran_time", "inout_type", "printed_content")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS budget_targets (
+    fintech_use_num TEXT NOT NULL,
+    category TEXT NOT NULL,
+    target_amt INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (fintech_use_num, category)
+);
+CREATE TABLE IF NOT EXISTS budget_spend (
+    fintech_use_num TEXT NOT NULL,
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    spent INTEGER NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (fintech_use_num, month, category)
+);
+CREATE TABLE IF NOT EXISTS budget_applied (
+    tx_key TEXT PRIMARY KEY,
+    month TEXT NOT NULL,
+    applied_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_budget_applied_month ON budget_applied (month);
+"""
+
+_UPSERT_SPEND = (
+    "INSERT INTO budget_spend (fintech_use_num, month, category, spent, tx_count, updated_at)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(fintech_use_num, month, category) DO UPDATE SET"
+    " spent = spent + excluded.spent, tx_count = tx_count + excluded.tx_count, updated_at = excluded.updated_at"
+)
+
+
+def transaction_key(tx: Dict[str, Any], occurrence: int = 0) -> str:
+    """
+    거래 내용으로 만든 식별 키. 같은 묶음 안의 똑같은 거래는 occurrence(0, 1, ...)로 구분하므로
+    같은 묶음을 다시 반영해도 키가 같다.
+    """
+    parts = [str(tx.get(field) or "") for field in KEY_FIELDS]
+    parts.append(str(int(float(tx.get("tran_amt") or 0))))
+    parts.append(str(occurrence))
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def current_month() -> str:
+    return time.strftime("%Y%m")
+
+
+def validate_month(month: Optional[str]) -> str:
+    if month is None:
+        return current_month()
+    if len(month) != 6 or not month.isdigit() or not 1 <= int(month[4:]) <= 12:
+        raise ValueError(f"invalid month: {month} (YYYYMM)")
+    return month
+
+
+def _budget_view(category: str, target: Optional[int], spent: int, tx_count: int) -> Dict[str, Any]:
+    view: Dict[str, Any] = {"category": category, "target": target, "spent": spent, "tx_count": tx_count}
+    if target is not None:
+        view["remaining"] = target - spent
+        view["over_budget"] = spent > target
+        view["usage"] = round(spent / target, 3) if target else None
+    return view
+
+
+class BudgetStore:
+    def __init__(self, path: str = BUDGET_STORE_PATH):
+        self.path = path
+        self.stats = {"batches": 0, "transactions": 0, "counted": 0, "duplicates": 0, "crossed": 0, "lookups": 0}
+        self._stats_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------------- targets ---------------- #
+    def set_targets(self, fintech_use_num: str, targets: Dict[str, Optional[int]]):
+        """{카테고리: 월 목표 금액} - None/0 이하는 목표 삭제"""
+        unknown = [name for name in targets if name not in CATEGORIES]
+        if unknown:
+            raise ValueError(f"unknown categories: {unknown} (가능: {', '.join(CATEGORIES)})")
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for category, amount in targets.items():
+                if amount is None or amount <= 0:
+                    conn.execute("DELETE FROM budget_targets WHERE fintech_use_num = ? AND category = ?",
+                                 (fintech_use_num, category))
+                else:
+                    conn.execute(
+                        "INSERT INTO budget_targets (fintech_use_num, category, target_amt, updated_at)"
+                        " VALUES (?, ?, ?, ?) ON CONFLICT(fintech_use_num, category) DO UPDATE SET"
+                        " target_amt = excluded.target_amt, updated_at = excluded.updated_at",
+                        (fintech_use_num, category, int(amount), now),
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ---------------- ingest ---------------- #
+    @staticmethod
+    def keyed(transactions: Iterable[Dict[str, Any]]) -> Tuple[List[Tuple[str, str, str, str, int]], int]:
+        """출금만 (키, 사용자, 월, 카테고리, 금액) 으로 -> (목록, 전체 건수)"""
+        keyed: List[Tuple[str, str, str, str, int]] = []
+        occurrences: Dict[str, int] = {}
+        seen = 0
+        for tx in transactions:
+            seen += 1
+            month = str(tx.get("tran_date") or "")[:6]
+            if tx.get("inout_type") != "출금" or not tx.get("fintech_use_num") or len(month) != 6:
+                continue
+            key = transaction_key(tx)
+            occurrence = occurrences[key] = occurrences.get(key, -1) + 1
+            if occurrence:
+                key = transaction_key(tx, occurrence)
+            keyed.append((key, tx["fintech_use_num"], month, spend_category(tx.get("printed_content")),
+                          int(float(tx.get("tran_amt") or 0))))
+        return keyed, seen
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, keyed: List[Tuple[str, str, str, str, int]],
+               now: float) -> Dict[Tuple[str, str, str], List[int]]:
+        """열린 트랜잭션 안에서 처음 보는 키만 기록하고 카운터에 더함 -> 반영한 (사용자, 월, 카테고리) 증분"""
+        increments: Dict[Tuple[str, str, str], List[int]] = {}
+        for key, fin, month, category, amount in keyed:
+            if conn.execute("INSERT OR IGNORE INTO budget_applied (tx_key, month, applied_at) VALUES (?, ?, ?)",
+                            (key, month, now)).rowcount == 0:
+                continue
+            for name in (category, TOTAL_CATEGORY):
+                bucket = increments.setdefault((fin, month, name), [0, 0])
+                bucket[0] += amount
+                bucket[1] += 1
+        conn.executemany(_UPSERT_SPEND, [
+            (fin, month, category, amount, count, now)
+            for (fin, month, category), (amount, count) in increments.items()
+        ])
+        return increments
+
+    def record_many(self, transactions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        거래 묶음을 한 트랜잭션으로 카운터에 반영 (이미 반영한 거래는 건너뜀).
+        이번 묶음으로 목표를 처음 넘긴 (사용자, 월, 카테고리) 목록 반환 (알림용).
+        """
+        keyed, seen = self.keyed(transactions)
+        crossed: List[Dict[str, Any]] = []
+        counted = 0
+        if keyed:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                increments = self._apply(conn, keyed, time.time())
+                counted = sum(count for (_, _, category), (_, count) in increments.items()
+                              if category == TOTAL_CATEGORY)
+                for (fin, month, category), (amount, _) in increments.items():
+                    row = conn.execute(
+                        "SELECT t.target_amt, s.spent FROM budget_targets t JOIN budget_spend s"
+                        " ON s.fintech_use_num = t.fintech_use_num AND s.category = t.category"
+                        " WHERE t.fintech_use_num = ? AND t.category = ? AND s.month = ?",
+                        (fin, category, month),
+                    ).fetchone()
+                    if row and row[1] > row[0] >= row[1] - amount:
+                        crossed.append({"fintech_use_num": fin, "month": month, "category": category,
+                                        "target": row[0], "spent": row[1]})
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["transactions"] += seen
+            self.stats["counted"] += counted
+            self.stats["duplicates"] += len(keyed) - counted
+            self.stats["crossed"] += len(crossed)
+        return crossed
+
+    def replace_month(self, month: str, transactions: Iterable[Dict[str, Any]]) -> int:
+        """백필: 그 달 카운터와 반영 키를 지우고 transactions 의 출금 행으로 다시 채움 -> 카운터 수"""
+        keyed, _ = self.keyed(tx for tx in transactions if str(tx.get("tran_date") or "")[:6] == month)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM budget_spend WHERE month = ?", (month,))
+            conn.execute("DELETE FROM budget_applied WHERE month = ?", (month,))
+            increments = self._apply(conn, keyed, time.time())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return len(increments)
+
+    # ---------------- queries (기본키 조회) ---------------- #
+    def remaining(self, fintech_use_num: str, category: str, month: Optional[str] = None) -> Dict[str, Any]:
+        month = validate_month(month)
+        conn = self._connect()
+        try:
+            target = conn.execute(
+                "SELECT target_amt FROM budget_targets WHERE fintech_use_num = ? AND category = ?",
+                (fintech_use_num, category),
+            ).fetchone()
+            spend = conn.execute(
+                "SELECT spent, tx_count FROM budget_spend WHERE fintech_use_num = ? AND month = ? AND category = ?",
+                (fintech_use_num, month, category),
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._stats_lock:
+            self.stats["lookups"] += 1
+        return {"fintech_use_num": fintech_use_num, "month": month,
+                **_budget_view(category, target[0] if target else None, *(spend or (0, 0)))}
+
+    def status(self, fintech_use_num: str, month: Optional[str] = None) -> Dict[str, Any]:
+        """목표가 있는 카테고리 전부 + 목표 없이 지출만 있는 카테고리 (카테고리 수만큼의 행)"""
+        month = validate_month(month)
+        conn = self._connect()
+        try:
+            targets = dict(conn.execute(
+                "SELECT category, target_amt FROM budget_targets WHERE fintech_use_num = ?",
+                (fintech_use_num,),
+            ).fetchall())
+            spend = {
+                category: (spent, count) for category, spent, count in conn.execute(
+                    "SELECT category, spent, tx_count FROM budget_spend WHERE fintech_use_num = ? AND month = ?",
+                    (fintech_use_num, month),
+                )
+            }
+        finally:
+            conn.close()
+        with self._stats_lock:
+            self.stats["lookups"] += 1
+        budgets = [
+            _budget_view(category, targets.get(category), *spend.get(category, (0, 0)))
+            for category in CATEGORIES if category in targets or category in spend
+        ]
+        return {
+            "fintech_use_num": fintech_use_num,
+            "month": month,
+            "budgets": budgets,
+            "over_budget": [item["category"] for item in budgets if item.get("over_budget")],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            targets, users = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT fintech_use_num) FROM budget_targets").fetchone()
+            counters = conn.execute("SELECT COUNT(*) FROM budget_spend").fetchone()[0]
+            applied = conn.execute("SELECT COUNT(*) FROM budget_applied").fetchone()[0]
+        finally:
+            conn.close()
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {**stats, "targets": targets, "users_with_targets": users, "counters": counters, "applied": applied}
+
+
+budget_store: Optional[BudgetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_budget_store() -> BudgetStore:
+    global budget_store
+    with _store_lock:
+        if budget_store is None:
+            budget_store = BudgetStore()
+    return budget_store
+
+
+def record_transactions(transactions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """수집 경로용 훅 (BUDGET_TRACKING_ENABLED=0 이면 무시)"""
+    if not BUDGET_TRACKING_ENABLED:
+        return []
+    return get_budget_store().record_many(transactions)
+
+
+# ---------------- FastAPI ---------------- #
+app = FastAPI(
+    title="Category Budgets",
+    description="카테고리별 월 목표 금액과 실시간 지출 카운터",
+    version="1.0.0",
+)
+
+
+class BudgetTargetsRequest(BaseModel):
+    targets: Dict[str, Optional[int]]  # {"카페": 100000, "전체": 1500000}, null/0 은 삭제
+
+
+@app.get("/budgets/stats")
+def budget_stats():
+    return {"enabled": BUDGET_TRACKING_ENABLED, **get_budget_store().summary()}
+
+
+@app.put("/budgets/{fintech_use_num}/targets")
+def set_budget_targets(fintech_use_num: str, request: BudgetTargetsRequest):
+    store = get_budget_store()
+    try:
+        store.set_targets(fintech_use_num, request.targets)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return store.status(fintech_use_num)
+
+
+@app.get("/budgets/{fintech_use_num}")
+def get_budget_status(fintech_use_num: str, month: Optional[str] = None):
+    try:
+        return get_budget_store().status(fintech_use_num, month)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/budgets/{fintech_use_num}/{category}")
+def get_budget_remaining(fintech_use_num: str, category: str, month: Optional[str] = None):
+    if category not in CATEGORIES:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 카테고리입니다: {category}")
+    try:
+        return get_budget_store().remaining(fintech_use_num, category, month)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def backfill(month: str) -> int:
+    """transactions 테이블의 한 달치 출금으로 카운터와 반영 키를 다시 채움 (배포 직후 1회)"""
+    from mcp_server import run_query
+
+    month = validate_month(month)
+    rows = run_query(
+        """
+        SELECT fintech_use_num, tran_date, tran_time, inout_type, printed_content, tran_amt
+        FROM transactions
+        WHERE tran_date BETWEEN %s AND %s AND inout_type = %s
+        ORDER BY id
+        """,
+        [f"{month}01", f"{month}31", "출금"],
+    )
+    return get_budget_store().replace_month(month, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Category budget counters")
+    parser.add_argument("--backfill", metavar="YYYYMM", required=True, help="카운터를 다시 집계할 월")
+    args = parser.parse_args()
+    print(f"✅ {args.backfill}: 카운터 {backfill(args.backfill)}개 재집계")
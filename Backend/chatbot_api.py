@@ -2,12 +2,21 @@
 # -*- coding: utf-8 -*-
 """
 LangGraph 기반 단기/장기 메모리가 결합된 챗봇 API.
+
+여러 워커 프로세스(serve.py)로 띄워도 안전하도록:
+- 장기 기억 JSON 은 fcntl 파일 잠금 아래에서 읽고 원자적으로 교체 저장한다.
+- 단기 기억(checkpointer)은 CHAT_CHECKPOINTER=sqlite 로 SqliteSaver(WAL)를 쓰면
+  같은 thread_id 요청이 어느 워커로 가도 이어진다. (기본 memory = InMemorySaver, 단일 프로세스용)
+- 그래프/체크포인터는 프로세스마다 처음 요청 시 생성한다 (preload 후 fork 해도 연결을 공유하지 않음).
 """
 from __future__ import annotations
 
+import fcntl
 import json
 import os
+import sqlite3
 import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -15,43 +24,72 @@ from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import MessagesState, StateGraph, START, END
 from pydantic import BaseModel
 
+from llm_provider import create_chat_model
+from metrics import LLMMetricsCallback
+
 load_dotenv()
 
+CHAT_CHECKPOINTER = os.getenv("CHAT_CHECKPOINTER", "memory").lower()  # memory | sqlite
+CHAT_CHECKPOINT_DB = os.getenv("CHAT_CHECKPOINT_DB", "chat_checkpoints.sqlite")
+
 
 # ---------------- Long-term memory manager ---------------- #
 class LongTermMemoryManager:
     """
     매우 단순한 JSON 기반 장기 기억 저장소.
     실제 서비스라면 Postgres/Mongo 등을 사용하는 것이 권장된다.
+    여러 프로세스가 같은 파일을 쓰므로 <path>.lock 에 flock 을 걸고,
+    파일이 바뀌었을 때(inode, mtime)만 다시 읽는다.
     """
 
     def __init__(self, path: str = "long_term_memory.json", max_entries: int = 20):
         self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
         self.max_entries = max_entries
         self._lock = threading.Lock()
         self._store: Dict[str, List[Dict[str, str]]] = {}
-        self._load()
+        self._signature: Optional[tuple] = None
 
-    def _load(self) -> None:
-        if self.path.exists():
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
             try:
-                self._store = json.loads(self.path.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
-                self._store = {}
-        else:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """다른 프로세스가 저장했으면 다시 읽기 (잠금 안에서 호출)"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._store, self._signature = {}, None
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if signature == self._signature:
+            return
+        try:
+            self._store = json.loads(self.path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
             self._store = {}
+        self._signature = signature
 
     def _save(self) -> None:
-        self.path.write_text(json.dumps(
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(
             self._store, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        stat = self.path.stat()
+        self._signature = (stat.st_ino, stat.st_mtime_ns)
 
     def get_context(self, user_id: str) -> str:
-        with self._lock:
+        with self._locked(exclusive=False):
+            self._load()
             entries = self._store.get(user_id, [])
             if not entries:
                 return ""
@@ -61,7 +99,8 @@ class LongTermMemoryManager:
             )
 
     def append(self, user_id: str, user_message: str, assistant_message: str) -> None:
-        with self._lock:
+        with self._locked(exclusive=True):
+            self._load()
             history = self._store.setdefault(user_id, [])
             history.append(
                 {"user": user_message, "assistant": assistant_message})
@@ -70,20 +109,27 @@ class LongTermMemoryManager:
             self._save()
 
 
-long_term_memory = LongTermMemoryManager()
+long_term_memory = LongTermMemoryManager(os.getenv("LONG_TERM_MEMORY_PATH", "long_term_memory.json"))
 
 
 # ---------------- LangGraph setup ---------------- #
-llm = ChatOpenAI(
-    model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-    temperature=0.2,
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
+llm = create_chat_model(temperature=0.2, callbacks=[LLMMetricsCallback()], lane="interactive")
+
+
+def create_checkpointer():
+    """CHAT_CHECKPOINTER: memory (프로세스 내) | sqlite (프로세스 간 공유)"""
+    if CHAT_CHECKPOINTER == "sqlite":
+        from langgraph.checkpoint.sqlite import SqliteSaver
 
-checkpointer = InMemorySaver()
+        conn = sqlite3.connect(CHAT_CHECKPOINT_DB, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return SqliteSaver(conn)
+    if CHAT_CHECKPOINTER != "memory":
+        raise ValueError(f"unknown CHAT_CHECKPOINTER: {CHAT_CHECKPOINTER} (memory | sqlite)")
+    return InMemorySaver()
 
 
-def build_graph():
+def build_graph(checkpointer):
     builder = StateGraph(MessagesState)
 
     def call_model(state: MessagesState, config: Optional[dict] = None):
@@ -120,7 +166,20 @@ def build_graph():
     return builder.compile(checkpointer=checkpointer)
 
 
-graph = build_graph()
+_graph = None
+_graph_pid: Optional[int] = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """프로세스마다 한 번 그래프 + 체크포인터 생성 (fork 이후 첫 요청에서)"""
+    global _graph, _graph_pid
+    if _graph is None or _graph_pid != os.getpid():
+        with _graph_lock:
+            if _graph is None or _graph_pid != os.getpid():
+                _graph = build_graph(create_checkpointer())
+                _graph_pid = os.getpid()
+    return _graph
 
 
 # ---------------- FastAPI ---------------- #
@@ -155,7 +214,7 @@ def chat(request: ChatRequest):
         }
     }
 
-    result = graph.invoke(
+    result = get_graph().invoke(
         {"messages": [HumanMessage(content=request.message)]}, config)
     reply = result["messages"][-1].content
 
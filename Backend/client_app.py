@@ -9,13 +9,14 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import time
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from mcp.types import CallToolResult, Content
 from pydantic import BaseModel
@@ -23,6 +24,15 @@ import uvicorn
 
 from dotenv import load_dotenv
 
+from analysis_jobs import JobManager, JobRejected
+from analysis_store import ANALYSIS_STORE_ENABLED, AnalysisStore
+from llm_provider import create_chat_model
+from metrics import LLMMetricsCallback, stage
+from period_summaries import PeriodSummarizer, SummaryStore, period_of, render_summary, validate_period
+from prompt_encoding import PROMPT_ROW_LIMIT, REFLECTION_ROW_LIMIT, TransactionPrompt, count_tokens
+from singleflight import SingleFlight, fingerprint
+from transaction_digest import render_digest
+
 load_dotenv()
 
 APP_TITLE = "소비 내역 분석 API (MCP Client)"
@@ -32,6 +42,8 @@ APP_DESCRIPTION = (
 )
 
 MCP_SERVER_ID = "transaction_db"
+MCP_FORWARD_ENV = ("DB_BACKEND", "SQLITE_DB_PATH", "DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME", "DB_PORT",
+                   "BUDGET_STORE_PATH", "BUDGET_TRACKING_ENABLED")
 MCP_TRANSPORT = os.getenv("MCP_CLIENT_TRANSPORT", "stdio")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_MCP_SERVER_PATH = os.path.join(BASE_DIR, "mcp_server.py")
@@ -57,6 +69,8 @@ else:
             "args": MCP_ARGS,
             "env": {
                 "PYTHONPATH": os.getenv("PYTHONPATH", ""),
+                # DB·예산 저장소 설정은 stdio 하위 프로세스에도 전달 (DB_BACKEND=sqlite, BUDGET_STORE_PATH 등)
+                **{name: os.environ[name] for name in MCP_FORWARD_ENV if name in os.environ},
             },
         }
     }
@@ -67,6 +81,14 @@ class ConsumptionAnalysisRequest(BaseModel):
     fintech_use_num: Optional[str] = None
 
 
+class AnalysisJobRequest(ConsumptionAnalysisRequest):
+    priority: str = "normal"  # high | normal | low
+
+
+class StoryRequest(ConsumptionAnalysisRequest):
+    period: Optional[str] = None  # 월: YYYYMM, 주: YYYYMM-Wn (없으면 최근 거래가 있는 월/주)
+
+
 class MCPToolInvoker:
     """
     Helper to call MCP server tools using a shared MultiServerMCPClient.
@@ -84,9 +106,10 @@ class MCPToolInvoker:
 
     async def call_tool(self, tool_name: str, **arguments) -> Any:
         async with self._lock:
-            async with self.session() as session:
-                result = await session.call_tool(tool_name, arguments=arguments)
-                return self._extract_content(result)
+            with stage("mcp"):
+                async with self.session() as session:
+                    result = await session.call_tool(tool_name, arguments=arguments)
+                    return self._extract_content(result)
 
     @staticmethod
     def _extract_content(result: CallToolResult) -> Any:
@@ -123,11 +146,11 @@ class MCPToolInvoker:
 mcp_client = MultiServerMCPClient(SERVER_CONNECTIONS)
 mcp_invoker = MCPToolInvoker(mcp_client, MCP_SERVER_ID)
 
-llm = ChatOpenAI(
-    model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-    temperature=0.3,
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
+llm = create_chat_model(temperature=0.3, callbacks=[LLMMetricsCallback()], lane="batch")
+# 리뷰 단계는 JSON 모드 (OpenAI response_format, 가짜 모델은 무시)
+reviewer = llm.bind(response_format={"type": "json_object"})
+analysis_flight = SingleFlight()
+analysis_store = AnalysisStore() if ANALYSIS_STORE_ENABLED else None
 
 app = FastAPI(
     title=APP_TITLE,
@@ -169,8 +192,29 @@ async def fetch_transactions(fintech_use_num: str, limit: int = 100) -> List[Dic
     return [records]
 
 
-async def get_basic_analysis(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not transactions:
+async def fetch_watermark(account_info: Dict[str, Any]) -> str:
+    """분석 입력이 바뀌었는지 판단하는 표식: 거래 수·최신 거래 일시·최대 id + 잔액"""
+    marks = await mcp_invoker.call_tool(
+        "get_transaction_watermark", fintech_use_num=account_info.get("fintech_use_num"))
+    if not isinstance(marks, dict):
+        marks = {}
+    return (
+        f"{marks.get('tx_count', 0)}|{marks.get('latest')}|{marks.get('max_id')}"
+        f"|{account_info.get('balance_amt')}"
+    )
+
+
+async def fetch_digest(fintech_use_num: str) -> Dict[str, Any]:
+    """전체 거래 이력의 고정 크기 요약 (MCP get_transaction_digest)"""
+    digest = await mcp_invoker.call_tool("get_transaction_digest", fintech_use_num=fintech_use_num)
+    if not isinstance(digest, dict):
+        raise HTTPException(status_code=502, detail="거래 요약을 가져오지 못했습니다.")
+    return digest
+
+
+def get_basic_analysis(digest: Dict[str, Any]) -> Dict[str, Any]:
+    totals = digest["totals"]
+    if not totals["transactions"]:
         return {
             "total_transactions": 0,
             "total_income": 0,
@@ -178,51 +222,20 @@ async def get_basic_analysis(transactions: List[Dict[str, Any]]) -> Dict[str, An
             "message": "거래 내역이 없습니다.",
         }
 
-    total_income = 0
-    total_expense = 0
-    income_count = 0
-    expense_count = 0
-
-    for t in transactions:
-        amt = t.get("tran_amt") or 0
-        inout_type = t.get("inout_type", "")
-
-        if inout_type == "입금":
-            total_income += amt
-            income_count += 1
-        elif inout_type == "출금":
-            total_expense += amt
-            expense_count += 1
-
     return {
-        "total_transactions": len(transactions),
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "net_balance": total_income - total_expense,
-        "income_count": income_count,
-        "expense_count": expense_count,
+        "total_transactions": totals["transactions"],
+        "total_income": totals["income"],
+        "total_expense": totals["expense"],
+        "net_balance": totals["net"],
+        "income_count": totals["income_count"],
+        "expense_count": totals["expense_count"],
+        "top_expense_categories": [
+            {"category": c["name"], "amount": c["amount"]} for c in digest["categories"][:5]
+        ],
     }
 
 
-def build_prompts(account_info: Dict[str, Any], transactions: List[Dict[str, Any]]) -> Dict[str, str]:
-    account_summary = (
-        "계좌 정보:\n"
-        f"- 은행: {account_info.get('bank_name', 'N/A')}\n"
-        f"- 상품명: {account_info.get('product_name', 'N/A')}\n"
-        f"- 잔액: {account_info.get('balance_amt', '0')}원\n"
-        f"- 출금가능액: {account_info.get('available_amt', '0')}원\n"
-        f"- 계좌유형: {account_info.get('account_type', 'N/A')}\n"
-    )
-
-    transaction_text = "\n".join(
-        [
-            f"- {t.get('tran_date', '')} {t.get('tran_time', '')}: "
-            f"{t.get('inout_type', '')} {t.get('tran_type', '')} "
-            f"{t.get('printed_content', '')} {t.get('tran_amt', 0)}원"
-            for t in transactions[:50]
-        ]
-    )
-
+def build_prompts(encoded: TransactionPrompt) -> Dict[str, str]:
     system_prompt = """당신은 금융 데이터 분석 전문가입니다.
 사용자의 계좌 잔액과 거래 내역을 분석하여 소비 패턴을 파악하고
 유용한 인사이트를 제공해야 합니다.
@@ -237,19 +250,60 @@ def build_prompts(account_info: Dict[str, Any], transactions: List[Dict[str, Any
 분석 결과를 자연스러운 문장으로 작성해주세요."""
 
     user_prompt = (
-        f"{account_summary}\n\n최근 거래 내역:\n{transaction_text}\n\n"
+        f"{encoded.section()}\n\n"
         "위 정보를 바탕으로 현재 소비 내역을 분석하고 인사이트를 제공해주세요."
     )
 
     return {"system": system_prompt, "user": user_prompt}
 
 
-async def run_reflexion_cycle(
-    account_info: Dict[str, Any],
-    transactions: List[Dict[str, Any]],
-    prompts: Dict[str, str],
-) -> Dict[str, str]:
-    """Run a single Reflexion-style refinement loop (draft -> reflect -> revise)."""
+REFLEXION_SKIP_SCORE = float(os.getenv("REFLEXION_SKIP_SCORE", "8"))
+# 기본 1 라운드: 최악 LLM 3회(초안·리뷰·수정)로 기존 고정 루프와 같다. N 라운드면 최악 1 + 2N 회이고 마지막 수정본은 다시 리뷰하지 않는다
+REFLEXION_MAX_ROUNDS = int(os.getenv("REFLEXION_MAX_ROUNDS", "1"))
+reflexion_stats = {"runs": 0, "rounds": 0, "revisions": 0, "early_exits": 0, "unparsed_verdicts": 0}
+
+REFLECTION_SYSTEM = (
+    "너는 엄격한 금융 데이터 리뷰어다. 아래 보고서를 기초 데이터와 대조해 누락된 통찰·틀린 숫자·근거 없는 주장을 찾아라. "
+    "반드시 다음 형식의 JSON 객체 하나로만 답하라: "
+    '{"score": 0~10 정수 (10 = 수정 불필요), '
+    '"issues": [{"severity": "high" | "medium" | "low", "detail": "문제와 고칠 방법"}], '
+    '"summary": "한 줄 총평"}'
+)
+REVISION_SYSTEM = (
+    "너는 금융 컨설턴트다. 아래 기초 데이터와 보고서, 그리고 리뷰어 피드백을 바탕으로 "
+    "최종 보고서를 다시 작성하라. 피드백의 개선 사항을 모두 반영하고, 필요한 숫자를 "
+    "거래 데이터에서 찾아 정리하라."
+)
+
+
+def parse_verdict(text: str) -> Dict[str, Any]:
+    """리뷰 JSON -> {score, issues, summary}. 파싱 실패 시 score 0 (수정 진행) 으로 취급"""
+    try:
+        raw = json.loads(text[text.index("{"): text.rindex("}") + 1])
+        score = min(10.0, max(0.0, float(raw.get("score", 0))))
+    except (ValueError, TypeError, AttributeError):
+        reflexion_stats["unparsed_verdicts"] += 1
+        return {"score": 0.0, "issues": [{"severity": "high", "detail": text}], "summary": "", "parsed": False}
+    issues = [
+        issue if isinstance(issue, dict) else {"severity": "medium", "detail": str(issue)}
+        for issue in raw.get("issues") or []
+    ]
+    return {"score": score, "issues": issues, "summary": raw.get("summary", ""), "parsed": True}
+
+
+def verdict_passes(verdict: Dict[str, Any]) -> bool:
+    """점수가 기준 이상이고 high 심각도 지적이 없으면 수정 생략"""
+    return verdict["score"] >= REFLEXION_SKIP_SCORE and not any(
+        str(issue.get("severity", "")).lower() == "high" for issue in verdict["issues"])
+
+
+async def run_reflexion_cycle(encoded: TransactionPrompt, prompts: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Reflexion loop with early exit: draft -> (reflect -> revise) x up to REFLEXION_MAX_ROUNDS.
+    리뷰는 JSON 모드 판정(score, issues)을 돌려주고, 통과하면 수정 없이 종료한다.
+    마지막 라운드의 수정본은 다시 리뷰하지 않는다 (early_exit=False 로 표시).
+    모든 호출이 같은 압축 인코딩(encoded)을 재사용한다.
+    """
     base_messages = [
         SystemMessage(content=prompts["system"]),
         HumanMessage(content=prompts["user"]),
@@ -258,82 +312,74 @@ async def run_reflexion_cycle(
     draft_response = await llm.ainvoke(base_messages)
     draft_text = getattr(draft_response, "content", str(draft_response))
 
-    reflection_system = (
-        "너는 엄격한 금융 데이터 리뷰어다. 아래 초안을 보고 잘된 점과 부족한 점을 "
-        "명시적으로 지적하고, 누락된 통찰·숫자·근거를 제안하라. 반드시 JSON으로 반환하라."
-    )
-    reflection_user = json.dumps(
-        {
-            "account_info": account_info,
-            "sample_transactions": transactions[:20],
-            "draft": draft_text,
-            "required_topics": [
-                "소비 패턴 품질",
-                "수입 패턴 품질",
-                "잔액 추이 분석",
-                "개선 제안 구체성",
-            ],
-        },
-        ensure_ascii=False,
-    )
-    reflection = await llm.ainvoke(
-        [
-            SystemMessage(content=reflection_system),
-            HumanMessage(content=reflection_user),
-        ]
-    )
-    reflection_text = getattr(reflection, "content", str(reflection))
+    report = draft_text
+    reflection_text = ""
+    verdicts: List[Dict[str, Any]] = []
+    revisions = 0
+    for _ in range(REFLEXION_MAX_ROUNDS):
+        reflection_user = (
+            f"{encoded.section(REFLECTION_ROW_LIMIT)}\n\n"
+            f"보고서:\n{report}\n\n"
+            "점검 항목: 소비 패턴 품질, 수입 패턴 품질, 잔액 추이 분석, 개선 제안 구체성"
+        )
+        reflection = await reviewer.ainvoke(
+            [
+                SystemMessage(content=REFLECTION_SYSTEM),
+                HumanMessage(content=reflection_user),
+            ]
+        )
+        reflection_text = getattr(reflection, "content", str(reflection))
+        verdict = parse_verdict(reflection_text)
+        verdicts.append(verdict)
+        if verdict_passes(verdict):
+            break
+
+        revision_user = (
+            f"{encoded.section()}\n\n"
+            f"보고서:\n{report}\n\n"
+            f"리뷰어 피드백:\n{reflection_text}"
+        )
+        revised = await llm.ainvoke(
+            [
+                SystemMessage(content=REVISION_SYSTEM),
+                HumanMessage(content=revision_user),
+            ]
+        )
+        report = getattr(revised, "content", str(revised))
+        revisions += 1
 
-    revision_system = (
-        "너는 금융 컨설턴트다. 아래 기초 데이터와 초안, 그리고 리뷰어 피드백을 바탕으로 "
-        "최종 보고서를 다시 작성하라. 피드백의 개선 사항을 모두 반영하고, 필요한 숫자를 "
-        "거래 데이터에서 찾아 정리하라."
-    )
-    revision_user = json.dumps(
-        {
-            "account_info": account_info,
-            "transactions": transactions[:50],
-            "draft": draft_text,
-            "reflection": reflection_text,
-        },
-        ensure_ascii=False,
-    )
-    revised = await llm.ainvoke(
-        [
-            SystemMessage(content=revision_system),
-            HumanMessage(content=revision_user),
-        ]
-    )
-    final_text = getattr(revised, "content", str(revised))
+    early_exit = verdict_passes(verdicts[-1]) if verdicts else True
+    reflexion_stats["runs"] += 1
+    reflexion_stats["rounds"] += len(verdicts)
+    reflexion_stats["revisions"] += revisions
+    reflexion_stats["early_exits"] += int(early_exit)
 
     return {
         "draft": draft_text,
         "reflection": reflection_text,
-        "final": final_text,
+        "final": report,
+        "reflexion": {
+            "rounds": len(verdicts),
+            "revisions": revisions,
+            "llm_calls": 1 + len(verdicts) + revisions,
+            "early_exit": early_exit,
+            "scores": [verdict["score"] for verdict in verdicts],
+            "issues": verdicts[-1]["issues"] if verdicts else [],
+        },
     }
 
 
-@app.post("/analyze")
-async def analyze_consumption(request: ConsumptionAnalysisRequest):
-    account_info = await fetch_account(request.account_id, request.fintech_use_num)
-    if not account_info:
-        raise HTTPException(status_code=404, detail="계좌를 찾을 수 없습니다.")
-
-    fintech_use_num = account_info.get("fintech_use_num")
-    transactions = await fetch_transactions(fintech_use_num, limit=100)
-
-    prompts = build_prompts(account_info, transactions)
+async def run_analysis(account_info: Dict[str, Any], digest: Dict[str, Any],
+                       transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    encoded = TransactionPrompt(account_info, transactions, digest=render_digest(digest))
+    prompts = build_prompts(encoded)
 
     try:
-        reflexion_outputs = await run_reflexion_cycle(
-            account_info, transactions, prompts
-        )
+        reflexion_outputs = await run_reflexion_cycle(encoded, prompts)
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail=f"LLM 분석 오류: {exc}") from exc
 
-    basic_stats = await get_basic_analysis(transactions)
-
     return {
         "account_info": {
             "bank_name": account_info.get("bank_name"),
@@ -341,17 +387,256 @@ async def analyze_consumption(request: ConsumptionAnalysisRequest):
             "balance_amt": account_info.get("balance_amt"),
             "available_amt": account_info.get("available_amt"),
         },
-        "transaction_count": len(transactions),
-        "basic_analysis": basic_stats,
+        "transaction_count": digest["totals"]["transactions"],
+        "basic_analysis": get_basic_analysis(digest),
+        "digest": digest,
         "llm_analysis": {
             "draft": reflexion_outputs["draft"],
             "reflection": reflexion_outputs["reflection"],
             "final": reflexion_outputs["final"],
         },
+        "reflexion": reflexion_outputs["reflexion"],
+        "prompt_tokens": count_tokens(prompts["system"]) + count_tokens(prompts["user"]),
         "methodology": "Reflexion loop inspired by LangChain reflection agents",
     }
 
 
+async def compute_analysis(account_info: Dict[str, Any], watermark: str,
+                           source: str = "live") -> Tuple[Dict[str, Any], bool]:
+    """실시간 분석 후 저장소에 기록. (결과, single-flight 공유 여부)"""
+    fintech_use_num = account_info.get("fintech_use_num")
+    # 전체 이력은 요약으로, 원본 행은 최근 PROMPT_ROW_LIMIT 건만 -> 프롬프트 크기 일정
+    digest = await fetch_digest(fintech_use_num)
+    transactions = await fetch_transactions(fintech_use_num, limit=PROMPT_ROW_LIMIT)
+
+    async def run_and_store() -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await run_analysis(account_info, digest, transactions)
+        if analysis_store is not None:
+            analysis_store.put(fintech_use_num, watermark, result, time.perf_counter() - started, source)
+        return result
+
+    # 같은 계좌·같은 거래 집합의 동시 요청은 Reflexion 실행 하나를 공유
+    key = (account_info.get("id"), fintech_use_num, fingerprint(account_info, digest, transactions))
+    return await analysis_flight.do(key, run_and_store)
+
+
+async def analyze_account(request: ConsumptionAnalysisRequest) -> Dict[str, Any]:
+    account_info = await fetch_account(request.account_id, request.fintech_use_num)
+    if not account_info:
+        raise HTTPException(status_code=404, detail="계좌를 찾을 수 없습니다.")
+
+    # 데이터가 그대로면 (야간 배치 또는 이전 요청이) 저장해 둔 결과를 바로 반환
+    watermark = await fetch_watermark(account_info)
+    if analysis_store is not None:
+        stored = analysis_store.get(account_info.get("fintech_use_num"), watermark)
+        if stored is not None:
+            return {**stored, "cached": True, "coalesced": False}
+
+    result, coalesced = await compute_analysis(account_info, watermark)
+    return {**result, "cached": False, "coalesced": coalesced}
+
+
+@app.post("/analyze")
+async def analyze_consumption(request: ConsumptionAnalysisRequest):
+    return await analyze_account(request)
+
+
+@app.get("/analyze/inflight/stats")
+async def analyze_inflight_stats():
+    return analysis_flight.summary()
+
+
+@app.get("/analyze/store/stats")
+async def analyze_store_stats():
+    if analysis_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **analysis_store.summary()}
+
+
+@app.get("/analyze/reflexion/stats")
+async def analyze_reflexion_stats():
+    runs = reflexion_stats["runs"]
+    return {
+        **reflexion_stats,
+        "avg_rounds": round(reflexion_stats["rounds"] / runs, 3) if runs else None,
+        "avg_llm_calls": round(1 + (reflexion_stats["rounds"] + reflexion_stats["revisions"]) / runs, 3) if runs else None,
+        "skip_rate": round(1 - reflexion_stats["revisions"] / reflexion_stats["rounds"], 3)
+        if reflexion_stats["rounds"] else None,
+        "skip_score": REFLEXION_SKIP_SCORE,
+        "max_rounds": REFLEXION_MAX_ROUNDS,
+    }
+
+
+async def run_analysis_job(request: Dict[str, Any]) -> Dict[str, Any]:
+    return await analyze_account(ConsumptionAnalysisRequest(**request))
+
+
+analysis_jobs = JobManager(run_analysis_job)
+
+
+@app.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(request: AnalysisJobRequest, x_tenant_id: Optional[str] = Header(None)):
+    """
+    비동기 분석 작업 등록. job_id 로 GET /analyze/jobs/{job_id} 폴링 또는
+    GET /analyze/jobs/{job_id}/events (SSE) 구독.
+    테넌트: X-Tenant-Id 헤더, 없으면 계좌 기준.
+    """
+    tenant = x_tenant_id or request.fintech_use_num or (
+        f"account:{request.account_id}" if request.account_id is not None else "anonymous")
+    try:
+        job = await analysis_jobs.submit(
+            request.dict(include={"account_id", "fintech_use_num"}), tenant, request.priority)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except JobRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    return {
+        **job,
+        "status_url": f"/analyze/jobs/{job['job_id']}",
+        "events_url": f"/analyze/jobs/{job['job_id']}/events",
+    }
+
+
+@app.get("/analyze/jobs/stats")
+async def analysis_job_stats():
+    return analysis_jobs.summary()
+
+
+@app.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다. (만료되었거나 없는 작업)")
+    return job
+
+
+@app.get("/analyze/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str):
+    """상태가 바뀔 때마다 `event: <status>` SSE, 완료/실패 이벤트(결과 포함) 후 종료"""
+    if analysis_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다. (만료되었거나 없는 작업)")
+
+    async def event_stream():
+        async for view in analysis_jobs.events(job_id):
+            if view is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {view['status']}\ndata: {json.dumps(view, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _rows(records: Any) -> List[Dict[str, Any]]:
+    if isinstance(records, list):
+        return records
+    if records is None:
+        return []
+    return [records]
+
+
+async def fetch_daily_watermarks(fintech_use_num: str, start: str, end: str) -> List[Dict[str, Any]]:
+    return _rows(await mcp_invoker.call_tool(
+        "get_daily_watermarks", fintech_use_num=fintech_use_num, start=start, end=end))
+
+
+async def fetch_daily_groups(fintech_use_num: str, start: str, end: str) -> List[Dict[str, Any]]:
+    return _rows(await mcp_invoker.call_tool(
+        "get_daily_transaction_groups", fintech_use_num=fintech_use_num, start=start, end=end))
+
+
+summarizer = PeriodSummarizer(SummaryStore(), fetch_daily_watermarks, fetch_daily_groups)
+story_flight = SingleFlight()
+story_stats = {"requests": 0, "cached": 0, "generated": 0, "empty": 0}
+
+STORY_SYSTEM = """당신은 사용자의 소비를 이야기처럼 풀어 주는 친근한 금융 코치입니다.
+주어진 기간 요약(합계, 카테고리, 상위 지출처, 가장 큰 지출, 하위 기간별 흐름)만 근거로
+그 기간의 소비 스토리를 한국어 4~6문장으로 작성하세요.
+흐름의 변화와 눈에 띄는 지출을 짚고, 마지막 문장에 다음 기간을 위한 제안 하나를 담으세요.
+요약에 없는 숫자는 만들지 마세요."""
+
+
+async def tell_story(request: StoryRequest, level: str) -> Dict[str, Any]:
+    """
+    주/월 소비 스토리. 일->주->월 요약을 증분 갱신한 뒤 기간 요약만으로 LLM 1회 호출,
+    결과는 요약과 함께 저장되어 그 기간에 새 거래가 생길 때까지 재사용된다.
+    """
+    account_info = await fetch_account(request.account_id, request.fintech_use_num)
+    if not account_info:
+        raise HTTPException(status_code=404, detail="계좌를 찾을 수 없습니다.")
+    fintech_use_num = account_info.get("fintech_use_num")
+
+    try:
+        if request.period:
+            period = validate_period(level, request.period)
+        else:
+            marks = await mcp_invoker.call_tool("get_transaction_watermark", fintech_use_num=fintech_use_num)
+            latest = "".join(ch for ch in str((marks or {}).get("latest") or "") if ch.isdigit())[:8]
+            if len(latest) < 8:
+                raise HTTPException(status_code=404, detail="거래 내역이 없습니다.")
+            period = period_of(level, latest)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    with stage("summaries"):
+        if level == "month":
+            built = await summarizer.month(fintech_use_num, period)
+        else:
+            built = await summarizer.week(fintech_use_num, period)
+    summary = built["summary"]
+    story_stats["requests"] += 1
+
+    response = {
+        "fintech_use_num": fintech_use_num,
+        "level": level,
+        "period": period,
+        "summary": summary,
+        "summary_work": built["work"],
+        "cached": built["story"] is not None,
+        "coalesced": False,
+        "llm_calls": 0,
+    }
+    if built["story"] is not None:
+        story_stats["cached"] += 1
+        return {**response, "story": built["story"]}
+    if not summary["transactions"]:
+        story_stats["empty"] += 1
+        return {**response, "story": "이 기간에는 거래 내역이 없습니다."}
+
+    async def generate() -> Dict[str, Any]:
+        user_prompt = f"{render_summary(summary)}\n\n위 요약으로 이 기간의 소비 스토리를 들려주세요."
+        try:
+            reply = await llm.ainvoke([SystemMessage(content=STORY_SYSTEM), HumanMessage(content=user_prompt)])
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=f"LLM 스토리 생성 오류: {exc}") from exc
+        story = getattr(reply, "content", str(reply))
+        summarizer.store.put_story(fintech_use_num, level, period, built["watermark"], story)
+        story_stats["generated"] += 1
+        return {"story": story, "prompt_tokens": count_tokens(STORY_SYSTEM) + count_tokens(user_prompt)}
+
+    generated, coalesced = await story_flight.do((fintech_use_num, level, period, built["watermark"]), generate)
+    return {**response, **generated, "coalesced": coalesced, "llm_calls": 0 if coalesced else 1}
+
+
+@app.post("/story/monthly")
+async def monthly_story(request: StoryRequest):
+    return await tell_story(request, "month")
+
+
+@app.post("/story/weekly")
+async def weekly_story(request: StoryRequest):
+    return await tell_story(request, "week")
+
+
+@app.get("/story/stats")
+async def story_summary_stats():
+    return {**story_stats, "summaries": summarizer.summary(), "inflight": story_flight.summary()}
+
+
 if __name__ == "__main__":
 
     uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "9600")))
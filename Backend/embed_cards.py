@@ -3,18 +3,38 @@
 """
 Generate embeddings for selected fields in card_data/cardgorilla_top100_detailed.json
 and store them locally as JSONL.
+
+Uses the same embedding function as card_benefit_api (embedding_backends), so
+with EMBEDDING_SERVER_URL set it talks to the shared embedding_server instead
+of loading its own model copy.
+
+Cards are embedded in chunks (parallel_embedding: EMBED_BATCH_SIZE texts per
+chunk, EMBED_WORKERS processes) and each finished chunk is appended to the
+output immediately. Re-running resumes: cards already in the output are
+skipped (use --restart to rebuild from scratch).
 """
 from __future__ import annotations
 
+import argparse
 import json
+import os
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Set, Tuple
 
-from pymilvus import model  # requires `pip install "pymilvus[model]"`
+from benefit_extractor import card_key
+from parallel_embedding import (
+    EMBED_BATCH_SIZE,
+    EMBED_THREADS_PER_WORKER,
+    EMBED_WORKERS,
+    Progress,
+    chunked,
+    iter_embedded_chunks,
+)
 
 
 CARD_JSON = Path("card_data/cardgorilla_top100_detailed.json")
 OUTPUT_JSONL = Path("card_data/card_embeddings.jsonl")
+FIELD_KEYS = ["benefits_text", "name", "event_text", "issuer"]
 
 
 def load_cards() -> List[dict]:
@@ -35,51 +55,99 @@ def extract_field_texts(card: dict) -> dict:
     }
 
 
+def load_done_keys(path: Path) -> Set[str]:
+    """
+    이미 기록된 card_id 목록. 중단으로 마지막 줄이 잘렸으면 그 줄을 잘라낸다.
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+
+    valid_bytes = 0
+    with path.open("rb") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            done.add(row["card_id"])
+            valid_bytes += len(line)
+    if valid_bytes != path.stat().st_size:
+        with path.open("r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+def card_chunks(cards: List[dict], cards_per_chunk: int) -> Iterator[Tuple[List[dict], List[str]]]:
+    """카드 묶음 -> (카드 목록, 카드별 FIELD_KEYS 순서로 펼친 텍스트)"""
+    for chunk in chunked(cards, cards_per_chunk):
+        texts = [extract_field_texts(card)[key] for card in chunk for key in FIELD_KEYS]
+        yield list(chunk), texts
+
+
+def build_row(card: dict, vectors) -> dict:
+    texts = extract_field_texts(card)
+    benefits_list = card.get("description_text", {}).get("benefits_text", []) or []
+    return {
+        "card_id": card_key(card),
+        "rank": card.get("rank"),
+        "name": texts["name"],
+        "issuer": texts["issuer"],
+        "event_text": texts["event_text"],
+        "benefits_text": benefits_list,
+        "benefits_text_joined": texts["benefits_text"],
+        "embeddings": {key: vector.tolist() for key, vector in zip(FIELD_KEYS, vectors)},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embed card fields to JSONL")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help="청크당 텍스트 수 (카드당 필드 4개)")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS)
+    parser.add_argument("--threads", type=int, default=EMBED_THREADS_PER_WORKER,
+                        help="워커당 연산 스레드 수 (0 = 코어 수 / 워커 수)")
+    parser.add_argument("--output", default=str(OUTPUT_JSONL))
+    parser.add_argument("--restart", action="store_true", help="기존 결과를 지우고 처음부터")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    output = Path(args.output)
     cards = load_cards()
-    embedding_model = model.DefaultEmbeddingFunction()
-
-    # Prepare flattened payload for batch embedding
-    field_keys = ["benefits_text", "name", "event_text", "issuer"]
-    flat_inputs = []
-    index_map = []  # (card_idx, field_key)
-    field_texts_per_card = []
-
-    for idx, card in enumerate(cards):
-        texts = extract_field_texts(card)
-        field_texts_per_card.append(texts)
-        for key in field_keys:
-            flat_inputs.append(texts[key])
-            index_map.append((idx, key))
-
-    embeddings = embedding_model.encode_documents(flat_inputs)
-
-    # Assign embeddings to each card/field
-    field_embeddings = [
-        {key: None for key in field_keys} for _ in range(len(cards))
-    ]
-    for (card_idx, key), vector in zip(index_map, embeddings):
-        field_embeddings[card_idx][key] = vector.tolist()
-
-    OUTPUT_JSONL.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_JSONL.open("w", encoding="utf-8") as f:
-        for card, texts, emb_map in zip(cards, field_texts_per_card, field_embeddings):
-            benefits_list = card.get("description_text", {}).get("benefits_text", []) or []
-            benefits_joined = "; ".join(benefits_list)
-            row = {
-                "rank": card.get("rank"),
-                "name": texts["name"],
-                "issuer": texts["issuer"],
-                "event_text": texts["event_text"],
-                "benefits_text": benefits_list,
-                "benefits_text_joined": benefits_joined,
-                "embeddings": emb_map,
-            }
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
-
-    print(f"✅ Generated {len(cards)} embeddings to {OUTPUT_JSONL}")
+
+    if args.restart and output.exists():
+        output.unlink()
+    done = load_done_keys(output)
+    pending = [card for card in cards if card_key(card) not in done]
+    if not pending:
+        print(f"✅ All {len(cards)} cards already embedded in {output}")
+        return
+    if done:
+        print(f"♻️ 재개: {len(done)}개 완료, {len(pending)}개 남음")
+
+    cards_per_chunk = max(1, args.batch_size // len(FIELD_KEYS))
+    progress = Progress(len(cards), "카드 임베딩", done=len(done))
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    with output.open("a", encoding="utf-8") as f:
+        for chunk, result in iter_embedded_chunks(
+            card_chunks(pending, cards_per_chunk), workers=args.workers, threads=args.threads
+        ):
+            dense = result["dense"]
+            for i, card in enumerate(chunk):
+                vectors = dense[i * len(FIELD_KEYS):(i + 1) * len(FIELD_KEYS)]
+                f.write(json.dumps(build_row(card, vectors), ensure_ascii=False) + "\n")
+            # 청크 단위로 디스크에 반영해 중단되어도 다음 실행에서 이어서 처리
+            f.flush()
+            os.fsync(f.fileno())
+            progress.update(len(chunk))
+
+    print(f"✅ Generated {len(cards)} embeddings to {output}")
 
 
 if __name__ == "__main__":
     main()
-
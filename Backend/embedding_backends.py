@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding backends for BGE-M3 (dense + sparse).
+
+- "bge-m3"    : pymilvus BGEM3EmbeddingFunction (PyTorch FP32, 기존 동작)
+- "onnx-int8" : ONNX Runtime + dynamic int8 quantised XLM-R encoder.
+                dense = normalised CLS vector, sparse = relu(sparse_linear(h))
+                per token (max per token id), same as BGEM3EmbeddingFunction.
+- remote      : RemoteEmbeddingFunction, a client of embedding_server.py.
+                Used whenever EMBEDDING_SERVER_URL is set, so every process
+                on the node shares one model.
+
+All expose dim / encode_queries / encode_documents returning
+{"dense": [np.ndarray], "sparse": scipy CSR (n x vocab)}.
+
+Export the ONNX model once:
+    python embedding_backends.py export --model BAAI/bge-m3 --output onnx/bge-m3-int8
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse as sp
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bge-m3").lower()
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "onnx/bge-m3-int8"))
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = ONNX Runtime 기본값
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", "8192"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "60"))
+
+ONNX_FP32_FILE = "model_fp32.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+SPARSE_LINEAR_FILE = "sparse_linear.npz"
+
+
+class OnnxBGEM3EmbeddingFunction:
+    """BGEM3EmbeddingFunction 과 같은 출력을 내는 ONNX Runtime int8 백엔드"""
+
+    def __init__(
+        self,
+        model_dir: Path = ONNX_MODEL_DIR,
+        intra_op_threads: int = ONNX_INTRA_OP_THREADS,
+        max_length: int = EMBEDDING_MAX_LENGTH,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        if not (model_dir / ONNX_INT8_FILE).exists():
+            raise FileNotFoundError(
+                f"{model_dir / ONNX_INT8_FILE} not found. "
+                f"Run: python embedding_backends.py export --output {model_dir}"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_INT8_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+        linear = np.load(model_dir / SPARSE_LINEAR_FILE)
+        self._sparse_weight = linear["weight"].astype(np.float32).reshape(-1)
+        self._sparse_bias = float(linear["bias"].reshape(-1)[0])
+        self._special_ids = np.array(sorted({
+            self.tokenizer.cls_token_id,
+            self.tokenizer.eos_token_id,
+            self.tokenizer.pad_token_id,
+            self.tokenizer.unk_token_id,
+        }), dtype=np.int64)
+        self.dim = {"dense": self._sparse_weight.shape[0], "sparse": len(self.tokenizer)}
+
+    def _encode(self, texts: List[str]) -> Dict[str, object]:
+        dense_vectors: List[np.ndarray] = []
+        rows, cols, values = [], [], []
+
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            tokens = self.tokenizer(
+                batch, padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np",
+            )
+            input_ids = tokens["input_ids"].astype(np.int64)
+            attention_mask = tokens["attention_mask"].astype(np.int64)
+            hidden = self.session.run(
+                None, {"input_ids": input_ids, "attention_mask": attention_mask}
+            )[0]
+
+            cls = hidden[:, 0]
+            norms = np.linalg.norm(cls, axis=1, keepdims=True)
+            dense_vectors.extend(cls / np.maximum(norms, 1e-12))
+
+            weights = np.maximum(hidden @ self._sparse_weight + self._sparse_bias, 0.0)
+            keep = (attention_mask > 0) & ~np.isin(input_ids, self._special_ids) & (weights > 0)
+            for i in range(len(batch)):
+                row_ids, row_weights = input_ids[i][keep[i]], weights[i][keep[i]]
+                # 같은 토큰이 여러 번 나오면 가장 큰 가중치만 사용
+                best: Dict[int, float] = {}
+                for token_id, weight in zip(row_ids.tolist(), row_weights.tolist()):
+                    if weight > best.get(token_id, 0.0):
+                        best[token_id] = weight
+                rows.extend([start + i] * len(best))
+                cols.extend(best.keys())
+                values.extend(best.values())
+
+        sparse_matrix = sp.csr_matrix(
+            (np.asarray(values, dtype=np.float32), (rows, cols)),
+            shape=(len(texts), self.dim["sparse"]),
+        )
+        return {"dense": [v.astype(np.float32) for v in dense_vectors], "sparse": sparse_matrix}
+
+    # BGE-M3 는 쿼리/문서에 별도 instruction 을 쓰지 않는다
+    def encode_queries(self, queries: List[str]) -> Dict[str, object]:
+        return self._encode(list(queries))
+
+    def encode_documents(self, documents: List[str]) -> Dict[str, object]:
+        return self._encode(list(documents))
+
+    def __call__(self, texts: List[str]) -> Dict[str, object]:
+        return self._encode(list(texts))
+
+
+class RemoteEmbeddingFunction:
+    """
+    embedding_server.py 클라이언트. url 은 http://host:port 또는 unix:///path/to.sock
+    """
+
+    def __init__(self, url: str = EMBEDDING_SERVER_URL, timeout: float = EMBEDDING_SERVER_TIMEOUT):
+        import httpx
+
+        if url.startswith("unix://"):
+            transport = httpx.HTTPTransport(uds=url[len("unix://"):])
+            self.client = httpx.Client(transport=transport, base_url="http://embedding", timeout=timeout)
+        else:
+            self.client = httpx.Client(base_url=url.rstrip("/"), timeout=timeout)
+        self.url = url
+        self._dim = None
+
+    @property
+    def dim(self) -> Dict[str, int]:
+        if self._dim is None:
+            response = self.client.get("/info")
+            response.raise_for_status()
+            self._dim = response.json()["dim"]
+        return self._dim
+
+    def _encode(self, texts: List[str], kind: str) -> Dict[str, object]:
+        if not texts:
+            return {"dense": [], "sparse": sp.csr_matrix((0, self.dim["sparse"]), dtype=np.float32)}
+        response = self.client.post("/embed", json={"texts": list(texts), "kind": kind})
+        response.raise_for_status()
+        payload = response.json()
+
+        dense = [np.frombuffer(base64.b64decode(row), dtype=np.float32) for row in payload["dense"]]
+        indptr, indices, values = [0], [], []
+        for row in payload["sparse"]:
+            indices.extend(row["indices"])
+            values.extend(row["values"])
+            indptr.append(len(indices))
+        sparse_matrix = sp.csr_matrix(
+            (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(dense), self.dim["sparse"]),
+        )
+        return {"dense": dense, "sparse": sparse_matrix}
+
+    def encode_queries(self, queries: List[str]) -> Dict[str, object]:
+        return self._encode(queries, "query")
+
+    def encode_documents(self, documents: List[str]) -> Dict[str, object]:
+        return self._encode(documents, "document")
+
+
+EMBEDDING_BACKENDS = ("bge-m3", "onnx-int8")
+
+
+def create_embedding_function(backend: str = EMBEDDING_BACKEND, server_url: str = EMBEDDING_SERVER_URL,
+                              intra_op_threads: Optional[int] = None):
+    """
+    임베딩 함수 생성. server_url(EMBEDDING_SERVER_URL)이 있으면 공유 임베딩 서버를 쓰고,
+    없으면 EMBEDDING_BACKEND 모델을 이 프로세스에 직접 로드한다.
+    intra_op_threads 를 주면 ONNX 세션 / PyTorch 연산 스레드 수를 그 값으로 고정한다
+    (None 이면 ONNX_INTRA_OP_THREADS, PyTorch 기본값).
+    """
+    if server_url:
+        return RemoteEmbeddingFunction(server_url)
+    if backend == "bge-m3":
+        from pymilvus.model.hybrid import BGEM3EmbeddingFunction
+
+        if intra_op_threads:
+            import torch
+
+            torch.set_num_threads(intra_op_threads)
+        return BGEM3EmbeddingFunction(use_fp16=False, device=os.getenv("BGE_DEVICE", "cpu"))
+    if backend == "onnx-int8":
+        if intra_op_threads is None:
+            return OnnxBGEM3EmbeddingFunction()
+        return OnnxBGEM3EmbeddingFunction(intra_op_threads=intra_op_threads)
+    raise ValueError(f"unknown EMBEDDING_BACKEND: {backend} (choose from {EMBEDDING_BACKENDS})")
+
+
+def export_onnx_int8(model_name: str, output_dir: Path, opset: int = 17):
+    """HF BGE-M3 -> ONNX(FP32) -> dynamic int8 양자화 + sparse_linear 가중치/토크나이저 저장"""
+    import torch
+    from huggingface_hub import hf_hub_download
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["카드 혜택 검색"], return_tensors="pt")
+    fp32_path = output_dir / ONNX_FP32_FILE
+    print(f"🔄 ONNX export: {model_name} -> {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+
+    int8_path = output_dir / ONNX_INT8_FILE
+    print(f"🔄 dynamic int8 quantisation -> {int8_path}")
+    quantize_dynamic(
+        str(fp32_path), str(int8_path),
+        weight_type=QuantType.QInt8, use_external_data_format=True,
+    )
+
+    state = torch.load(hf_hub_download(model_name, "sparse_linear.pt"), map_location="cpu")
+    np.savez(
+        output_dir / SPARSE_LINEAR_FILE,
+        weight=state["weight"].numpy(),
+        bias=state["bias"].numpy(),
+    )
+    tokenizer.save_pretrained(str(output_dir))
+    print(f"✅ ONNX int8 BGE-M3 saved to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BGE-M3 embedding backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="ONNX int8 모델 생성")
+    export.add_argument("--model", default="BAAI/bge-m3")
+    export.add_argument("--output", default=str(ONNX_MODEL_DIR))
+    export.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_int8(args.model, Path(args.output), args.opset)
+
+
+if __name__ == "__main__":
+    main()
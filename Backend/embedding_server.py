@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared local embedding server with dynamic micro-batching.
+
+Loads the BGE-M3 model once (EMBEDDING_BACKEND: bge-m3 | onnx-int8) and
+serves every process on the node over localhost HTTP or a Unix socket.
+Concurrent requests of the same kind (query / document) are merged into one
+model call of up to EMBED_SERVER_MAX_BATCH texts, waiting at most
+EMBED_SERVER_MAX_WAIT_MS for more requests to arrive.
+
+Clients use embedding_backends.RemoteEmbeddingFunction, selected by setting
+EMBEDDING_SERVER_URL (e.g. http://127.0.0.1:9700 or unix:///tmp/embedding.sock).
+
+Run:
+    python embedding_server.py                          # 127.0.0.1:9700
+    EMBED_SERVER_UDS=/tmp/embedding.sock python embedding_server.py
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from embedding_backends import EMBEDDING_BACKEND, create_embedding_function
+
+EMBED_SERVER_HOST = os.getenv("EMBED_SERVER_HOST", "127.0.0.1")
+EMBED_SERVER_PORT = int(os.getenv("EMBED_SERVER_PORT", "9700"))
+EMBED_SERVER_UDS = os.getenv("EMBED_SERVER_UDS", "")
+EMBED_SERVER_MAX_BATCH = int(os.getenv("EMBED_SERVER_MAX_BATCH", "32"))
+EMBED_SERVER_MAX_WAIT_MS = float(os.getenv("EMBED_SERVER_MAX_WAIT_MS", "5"))
+
+Kind = Literal["query", "document"]
+
+
+def encode_rows(result: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, list]]]:
+    """모델 출력 -> 행 단위 직렬화 (dense: base64 float32, sparse: indices/values)"""
+    dense = [base64.b64encode(np.asarray(v, dtype=np.float32).tobytes()).decode("ascii")
+             for v in result["dense"]]
+    csr = result["sparse"].tocsr()
+    sparse = [
+        {
+            "indices": csr.indices[csr.indptr[i]:csr.indptr[i + 1]].tolist(),
+            "values": csr.data[csr.indptr[i]:csr.indptr[i + 1]].tolist(),
+        }
+        for i in range(csr.shape[0])
+    ]
+    return dense, sparse
+
+
+class MicroBatcher:
+    """같은 종류의 요청을 모아 한 번의 모델 호출로 처리"""
+
+    def __init__(self, embedding_fn, max_batch: int = EMBED_SERVER_MAX_BATCH,
+                 max_wait_ms: float = EMBED_SERVER_MAX_WAIT_MS):
+        self.embedding_fn = embedding_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        # 모델 호출은 스레드 1개에서 직렬로 (모델 내부에서 이미 멀티스레드 연산)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "model_s": 0.0}
+
+    def start(self):
+        for kind in ("query", "document"):
+            self.queues[kind] = asyncio.Queue()
+            self.tasks.append(asyncio.create_task(self._run(kind)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, kind: str, texts: List[str]):
+        future = asyncio.get_running_loop().create_future()
+        await self.queues[kind].put((texts, future))
+        self.stats["requests"] += 1
+        return await future
+
+    def _encode(self, kind: str, texts: List[str]):
+        if kind == "query":
+            return self.embedding_fn.encode_queries(texts)
+        return self.embedding_fn.encode_documents(texts)
+
+    async def _run(self, kind: str):
+        queue = self.queues[kind]
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self.executor, self._encode, kind, texts)
+                dense, sparse = encode_rows(result)
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats["model_s"] += time.perf_counter() - started
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+
+            offset = 0
+            for item_texts, future in pending:
+                n = len(item_texts)
+                if not future.done():
+                    future.set_result((dense[offset:offset + n], sparse[offset:offset + n]))
+                offset += n
+
+
+embedding_fn = None
+batcher: MicroBatcher | None = None
+
+app = FastAPI(
+    title="Embedding Server",
+    description="노드당 1개의 BGE-M3 모델을 공유하는 마이크로 배칭 임베딩 서버",
+    version="1.0.0",
+)
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    kind: Kind = "query"
+
+
+@app.on_event("startup")
+async def _startup_event():
+    global embedding_fn, batcher
+    # 서버 자신은 항상 로컬 모델을 로드한다 (EMBEDDING_SERVER_URL 무시)
+    embedding_fn = create_embedding_function(EMBEDDING_BACKEND, server_url="")
+    batcher = MicroBatcher(embedding_fn)
+    batcher.start()
+    print(f"✅ 임베딩 모델 로드 완료 ({EMBEDDING_BACKEND}, dim={embedding_fn.dim})")
+
+
+@app.on_event("shutdown")
+async def _shutdown_event():
+    if batcher is not None:
+        await batcher.stop()
+
+
+@app.get("/info")
+def info():
+    return {
+        "backend": EMBEDDING_BACKEND,
+        "dim": {k: int(v) for k, v in embedding_fn.dim.items()},
+        "max_batch": batcher.max_batch,
+        "max_wait_ms": batcher.max_wait * 1000,
+        "stats": {
+            **batcher.stats,
+            "model_s": round(batcher.stats["model_s"], 3),
+            "avg_batch": round(batcher.stats["texts"] / max(batcher.stats["batches"], 1), 2),
+        },
+    }
+
+
+@app.post("/embed")
+async def embed(request: EmbedRequest):
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    dense, sparse = await batcher.submit(request.kind, request.texts)
+    return {"dense": dense, "sparse": sparse}
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok" if batcher is not None else "loading"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    if EMBED_SERVER_UDS:
+        uvicorn.run(app, uds=EMBED_SERVER_UDS)
+    else:
+        uvicorn.run(app, host=EMBED_SERVER_HOST, port=EMBED_SERVER_PORT)
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide LLM gateway: concurrency limit, rate limits, 429 backoff, lanes.
+
+Every chat model built by llm_provider.create_chat_model is wrapped in
+llm_provider.GovernedChatModel, so client_app, chatbot_api and sobi_analyze_test share
+one LLMGateway per process instead of calling the provider uncoordinated:
+
+- A global concurrency cap (LLM_MAX_CONCURRENCY in-flight calls).
+- Token buckets for requests (LLM_RPM) and tokens (LLM_TPM). A call
+  reserves its estimated prompt + LLM_EST_COMPLETION_TOKENS tokens up front
+  and is reconciled with the real usage afterwards.
+- Adaptive backoff: a 429 pauses all admissions for Retry-After (or an
+  exponential, jittered delay) and halves the bucket rates, which then
+  recover additively on each success. The gateway retries up to
+  LLM_MAX_RETRIES times itself; the provider client is built with
+  max_retries=0 so retries do not cascade.
+- Lanes: waiters are admitted strictly by (lane, arrival), so "interactive"
+  (chat) calls go ahead of queued "batch" (analysis) calls.
+
+Sync (LangGraph nodes) and async (FastAPI handlers) callers share the same
+queue; the state is guarded by a threading lock and async waiters are woken
+through their event loop. Limits are per process; with serve.py workers,
+divide the provider quota by the worker count.
+
+FakeProviderQuota / FakeRateLimitError emulate a provider's per-minute
+limits for the fake LLM (FAKE_LLM_RPM / FAKE_LLM_TPM) and
+bench_llm_gateway.py.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from metrics import LLM_RATE_LIMITED, record_stage
+
+T = TypeVar("T")
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+LLM_EST_COMPLETION_TOKENS = int(os.getenv("LLM_EST_COMPLETION_TOKENS", "500"))
+LLM_GATEWAY_ENABLED = os.getenv("LLM_GATEWAY_ENABLED", "1") not in ("0", "false", "False")
+
+LANES = {"interactive": 0, "batch": 1}
+MIN_RATE_SCALE = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+
+class TokenBucket:
+    """초당 rate 로 채워지는 용량 capacity 버킷. 음수 잔량(사후 정산 초과분) 허용"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.base_rate = per_minute / 60.0
+        self.rate = self.base_rate
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_in(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)  # 용량보다 큰 요청은 가득 찼을 때 허용
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= amount
+
+    def adjust(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def scale(self, factor: float, now: float):
+        self._refill(now)
+        self.rate = self.base_rate * factor
+
+
+def is_rate_limit(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class _Waiter:
+    def __init__(self, lane: str, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.lane = lane
+        self.tokens = tokens
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.enqueued = time.monotonic()
+        self.admitted = False
+        self.abandoned = False
+
+    def wake(self):
+        self.admitted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Ticket:
+    def __init__(self, lane: str, tokens: int):
+        self.lane = lane
+        self.reserved = tokens
+        self.used: Optional[int] = None
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.requests = TokenBucket(rpm, capacity=max(1.0, rpm / 60.0 * 5))  # 최대 5초치 burst
+        self.tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+        self._waiters: List[Any] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._consecutive_429 = 0
+        self._rate_scale = 1.0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_at = 0.0
+        self.stats: Dict[str, Any] = {
+            "admitted": {lane: 0 for lane in LANES},
+            "wait_s": {lane: 0.0 for lane in LANES},
+            "rate_limited": 0,
+            "retries": 0,
+            "gave_up": 0,
+        }
+
+    # ---- 스케줄링 (self._lock 보유 상태에서 호출) ----
+    def _dispatch(self):
+        now = time.monotonic()
+        while self._waiters:
+            waiter = self._waiters[0][2]
+            if waiter.abandoned:
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return  # release 가 다시 dispatch
+            delay = max(self._blocked_until - now, self.requests.ready_in(1, now),
+                        self.tokens.ready_in(waiter.tokens, now))
+            if delay > 0:
+                self._schedule(now + delay)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1, now)
+            self.tokens.take(waiter.tokens, now)
+            self._in_flight += 1
+            self.stats["admitted"][waiter.lane] += 1
+            self.stats["wait_s"][waiter.lane] += now - waiter.enqueued
+            waiter.wake()
+
+    def _schedule(self, at: float):
+        if self._timer is not None and self._timer_at <= at:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = at
+        self._timer = threading.Timer(max(0.0, at - time.monotonic()) + 0.001, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            heapq.heappush(self._waiters, (LANES[waiter.lane], next(self._seq), waiter))
+            self._dispatch()
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            self._in_flight -= 1
+            if ticket.used is not None:
+                self.tokens.adjust(ticket.reserved - ticket.used)
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter, ticket: Ticket):
+        """대기 중 취소된 async 호출: 이미 승인됐으면 슬롯 반납"""
+        with self._lock:
+            waiter.abandoned = True
+            admitted = waiter.admitted
+        if admitted:
+            self._release(ticket)
+
+    # ---- 429 적응 ----
+    def _on_rate_limited(self, exc: BaseException, lane: str):
+        LLM_RATE_LIMITED.inc(lane)
+        with self._lock:
+            self.stats["rate_limited"] += 1
+            delay = retry_after(exc)
+            if delay is None:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** self._consecutive_429)
+                delay *= 0.5 + random.random() / 2
+            self._consecutive_429 += 1
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + delay)
+            self._rate_scale = max(MIN_RATE_SCALE, self._rate_scale * 0.5)
+            self.requests.scale(self._rate_scale, now)
+            self.tokens.scale(self._rate_scale, now)
+
+    def _on_success(self):
+        with self._lock:
+            self._consecutive_429 = 0
+            if self._rate_scale < 1.0:
+                self._rate_scale = min(1.0, self._rate_scale + RATE_RECOVERY_STEP)
+                now = time.monotonic()
+                self.requests.scale(self._rate_scale, now)
+                self.tokens.scale(self._rate_scale, now)
+
+    # ---- 공개 API ----
+    @contextmanager
+    def slot(self, lane: str = "batch", tokens: int = 0):
+        """동기 호출용 슬롯 (LangGraph 노드 등)"""
+        waiter = _Waiter(lane, tokens)
+        started = time.perf_counter()
+        self._enqueue(waiter)
+        waiter.event.wait()
+        record_stage("llm_queue", time.perf_counter() - started)
+        ticket = Ticket(lane, tokens)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, lane: str = "batch", tokens: int = 0):
+        waiter = _Waiter(lane, tokens, asyncio.get_running_loop())
+        ticket = Ticket(lane, tokens)
+        started = time.perf_counter()
+        self._enqueue(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._abandon(waiter, ticket)
+            raise
+        record_stage("llm_queue", time.perf_counter() - started)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def _should_retry(self, exc: BaseException, attempt: int, lane: str) -> bool:
+        if not is_rate_limit(exc):
+            return False
+        self._on_rate_limited(exc, lane)
+        if attempt >= self.max_retries:
+            self.stats["gave_up"] += 1
+            return False
+        self.stats["retries"] += 1
+        return True
+
+    def call(self, fn: Callable[[], T], lane: str = "batch", tokens: int = 0,
+             usage: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        for attempt in itertools.count():
+            with self.slot(lane, tokens) as ticket:
+                try:
+                    result = fn()
+                except Exception as exc:
+                    if self._should_retry(exc, attempt, lane):
+                        continue
+                    raise
+                ticket.used = usage(result) if usage else None
+            self._on_success()
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], lane: str = "batch", tokens: int = 0,
+                    usage: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        for attempt in itertools.count():
+            async with self.aslot(lane, tokens) as ticket:
+                try:
+                    result = await fn()
+                except Exception as exc:
+                    if self._should_retry(exc, attempt, lane):
+                        continue
+                    raise
+                ticket.used = usage(result) if usage else None
+            self._on_success()
+            return result
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            queued = {lane: 0 for lane in LANES}
+            for _, _, waiter in self._waiters:
+                if not waiter.abandoned:
+                    queued[waiter.lane] += 1
+            return {
+                **self.stats,
+                "wait_s": {lane: round(value, 3) for lane, value in self.stats["wait_s"].items()},
+                "in_flight": self._in_flight,
+                "queued": queued,
+                "rate_scale": round(self._rate_scale, 3),
+                "blocked_for_s": round(max(0.0, self._blocked_until - now), 3),
+            }
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """프로세스 공용 게이트웨이 (fork 이후 각 워커에서 첫 호출 시 생성)"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+# ---- 시뮬레이션용 가짜 provider 한도 ----
+class FakeRateLimitError(Exception):
+    """openai.RateLimitError 대용 (status_code 429 + retry_after)"""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limit exceeded, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class FakeProviderQuota:
+    """최근 window 초 동안의 요청·토큰 수가 rpm / tpm 을 넘으면 FakeRateLimitError"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._calls: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def check(self, tokens: int):
+        if not self.rpm and not self.tpm:
+            return
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0][0] <= now - self.window:
+                self._tokens -= self._calls.popleft()[1]
+            over_rpm = self.rpm and len(self._calls) >= self.rpm
+            over_tpm = self.tpm and self._tokens + tokens > self.tpm
+            if over_rpm or over_tpm:
+                oldest = self._calls[0][0] if self._calls else now
+                raise FakeRateLimitError(max(0.05, oldest + self.window - now))
+            self._calls.append((now, tokens))
+            self._tokens += tokens
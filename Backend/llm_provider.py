@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chat model factory shared by client_app and chatbot_api.
+
+LLM_PROVIDER selects the model:
+- openai (default): ChatOpenAI with OPENAI_MODEL / OPENAI_API_KEY.
+- fake: FakeChatModel, a deterministic offline stand-in that sleeps
+  FAKE_LLM_LATENCY_MS (+ FAKE_LLM_MS_PER_TOKEN per output token) and returns
+  a reply derived from a hash of the prompt. Prompts that ask for JSON get a
+  JSON object back, shaped like the Reflexion review verdict (score,
+  issues). Used by bench_e2e.py so benchmarks need no API key and have
+  stable latency. FAKE_LLM_RPM / FAKE_LLM_TPM emulate provider limits
+  (429 FakeRateLimitError, shared by all fake models in the process).
+
+Unless LLM_GATEWAY_ENABLED=0, the model is wrapped in GovernedChatModel so
+every call goes through the process-wide llm_gateway (concurrency cap, rate
+limits, 429 backoff and the interactive/batch lane given by `lane`).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from llm_gateway import LLM_EST_COMPLETION_TOKENS, LLM_GATEWAY_ENABLED, FakeProviderQuota, get_gateway
+from prompt_encoding import count_tokens
+
+# 프로세스 안의 모든 FakeChatModel 이 공유하는 가짜 provider 한도
+FAKE_PROVIDER_QUOTA = FakeProviderQuota(
+    rpm=float(os.getenv("FAKE_LLM_RPM", "0")), tpm=float(os.getenv("FAKE_LLM_TPM", "0")))
+
+FAKE_WORDS = ["소비", "패턴", "카페", "편의점", "교통", "절약", "예산", "적립", "할인", "카드", "지출", "추천"]
+
+
+class FakeChatModel(BaseChatModel):
+    """입력 해시로 결정되는 응답을 고정 지연 후 반환하는 오프라인 채팅 모델"""
+
+    latency_ms: float = 200.0
+    ms_per_token: float = 0.0
+    reply_tokens: int = 120
+    model_name: str = "fake-deterministic"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-deterministic"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = [FAKE_WORDS[int(digest[i % 64], 16) % len(FAKE_WORDS)] for i in range(self.reply_tokens // 2)]
+        text = f"[fake:{digest[:8]}] " + " ".join(words)
+        if "JSON" in prompt or "json" in prompt:
+            # 리뷰 판정 형식 (score 4~10, 8 미만이면 지적 1건) - 해시로 결정
+            score = 4 + int(digest[8:10], 16) % 7
+            issues = [] if score >= 8 else [{"severity": "medium", "detail": f"[fake:{digest[:8]}] 근거 보강 필요"}]
+            return json.dumps({"score": score, "issues": issues, "summary": text, "digest": digest[:16]},
+                              ensure_ascii=False)
+        return text
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        prompt_tokens = sum(count_tokens(str(message.content)) for message in messages)
+        completion_tokens = count_tokens(text)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "model_name": self.model_name,
+                "token_usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+            },
+        )
+
+    def _delay(self, text: str) -> float:
+        return (self.latency_ms + self.ms_per_token * count_tokens(text)) / 1000
+
+    def _check_quota(self, messages: List[BaseMessage], text: str):
+        FAKE_PROVIDER_QUOTA.check(sum(count_tokens(str(m.content)) for m in messages) + count_tokens(text))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        self._check_quota(messages, text)
+        time.sleep(self._delay(text))
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        self._check_quota(messages, text)
+        await asyncio.sleep(self._delay(text))
+        return self._result(messages, text)
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(count_tokens(str(message.content)) for message in messages) + LLM_EST_COMPLETION_TOKENS
+
+
+def result_tokens(result: ChatResult) -> Optional[int]:
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return int(usage.get("prompt_tokens", 0)) + int(usage.get("completion_tokens", 0))
+    total = sum((getattr(g.message, "usage_metadata", None) or {}).get("total_tokens", 0)
+                for g in result.generations)
+    return total or None
+
+
+class GovernedChatModel(BaseChatModel):
+    """inner 모델 호출을 공용 llm_gateway 로 통과시키는 래퍼 (콜백은 래퍼에 등록)"""
+
+    inner: BaseChatModel
+    lane: str = "batch"
+
+    @property
+    def _llm_type(self) -> str:
+        return f"governed-{self.inner._llm_type}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return get_gateway().call(
+            lambda: self.inner._generate(messages, stop=stop, **kwargs),
+            self.lane, estimate_tokens(messages), usage=result_tokens,
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return await get_gateway().acall(
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+            self.lane, estimate_tokens(messages), usage=result_tokens,
+        )
+
+
+def _create_provider_model(provider: str, temperature: float, retries: int, callbacks: Optional[list] = None):
+    if provider == "fake":
+        return FakeChatModel(
+            callbacks=callbacks,
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "200")),
+            ms_per_token=float(os.getenv("FAKE_LLM_MS_PER_TOKEN", "0")),
+            reply_tokens=int(os.getenv("FAKE_LLM_REPLY_TOKENS", "120")),
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=os.getenv("OPENAI_MODEL", "gpt-4o"),
+            temperature=temperature,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=retries,
+            callbacks=callbacks,
+        )
+    raise ValueError(f"unknown LLM_PROVIDER: {provider} (openai | fake)")
+
+
+def create_chat_model(temperature: float = 0.3, callbacks: Optional[list] = None, provider: Optional[str] = None,
+                      lane: str = "batch"):
+    """
+    환경 변수는 호출 시점에 읽는다 (호출 측 load_dotenv 이후).
+    lane: interactive (챗봇) | batch (분석) - llm_gateway 우선순위
+    """
+    provider = (provider or os.getenv("LLM_PROVIDER", "openai")).lower()
+    if not LLM_GATEWAY_ENABLED:
+        return _create_provider_model(provider, temperature, retries=2, callbacks=callbacks)
+    # 재시도는 게이트웨이가 담당 (클라이언트 자체 재시도는 끔)
+    inner = _create_provider_model(provider, temperature, retries=0)
+    return GovernedChatModel(inner=inner, lane=lane, callbacks=callbacks)
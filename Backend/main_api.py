@@ -7,6 +7,9 @@ It aggregates:
 - client_app (소비 내역 분석)
 - card_benefit_api (카드 혜택 하이브리드 검색)
 - chatbot_api (LangGraph 메모리 챗봇)
+- benefit_simulator (카드 변경 시 연간 혜택 시뮬레이션)
+- benefit_alerts (놓친 혜택 알림 스트림)
+- category_budgets (카테고리별 목표 금액·지출 카운터)
 """
 from __future__ import annotations
 
@@ -20,6 +23,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from client_app import app as consumption_app
 from card_benefit_api import app as card_benefit_app
 from chatbot_api import app as chatbot_app
+from benefit_simulator import app as simulator_app
+from benefit_alerts import app as alerts_app
+from category_budgets import app as budgets_app
+from llm_gateway import get_gateway
+from metrics import install_metrics
 
 
 def create_app() -> FastAPI:
@@ -57,11 +65,30 @@ def create_app() -> FastAPI:
         chatbot_app.router,
         tags=["chatbot"],
     )
+    app.include_router(
+        simulator_app.router,
+        tags=["benefit-simulator"],
+    )
+    app.include_router(
+        alerts_app.router,
+        tags=["benefit-alerts"],
+    )
+    app.include_router(
+        budgets_app.router,
+        tags=["category-budgets"],
+    )
+
+    # Per-route / per-stage latency histograms, Server-Timing header, GET /metrics
+    install_metrics(app)
 
     @app.get("/healthz", tags=["meta"])
     def healthz() -> Dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/llm/gateway/stats", tags=["meta"])
+    def llm_gateway_stats():
+        return get_gateway().summary()
+
     return app
 
 
@@ -6,12 +6,16 @@ MCP server exposing transaction DB tables as queryable tools.
 from __future__ import annotations
 
 import os
+import sqlite3
 from typing import Any, Dict, List, Optional, Sequence
 
 import pymysql
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+from period_summaries import daily_group_query, daily_mark_query
+from transaction_digest import build_digest, digest_queries, months_before
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -25,14 +29,36 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", "3306")),
 }
 
+# mysql (기본) | sqlite: 벤치마크/오프라인용 (synthetic_db.py 로 생성한 파일, 같은 쿼리 인터페이스)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "transaction_mockup.sqlite")
+
 mcp = FastMCP("TransactionDB")
 
 
 def get_db_connection():
+    if DB_BACKEND == "sqlite":
+        conn = sqlite3.connect(SQLITE_DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
     return pymysql.connect(**DB_CONFIG)
 
 
+def _run_sqlite_query(sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+    conn = get_db_connection()
+    try:
+        # pymysql 의 %s 플레이스홀더 -> sqlite3 의 ?
+        rows = conn.execute(sql.replace("%s", "?"), tuple(params)).fetchall()
+        return [normalize_row(dict(row)) for row in rows]
+    finally:
+        conn.close()
+
+
 def run_query(sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+    # 구간 계측 없음: 도구로 불릴 때는 stdio 하위 프로세스라 API 의 /metrics 에 닿지 않는다.
+    # 쿼리 시간은 클라이언트 쪽 "mcp" 구간(도구 호출 왕복)에 포함된다.
+    if DB_BACKEND == "sqlite":
+        return _run_sqlite_query(sql, params)
     conn = get_db_connection()
     try:
         with conn.cursor(pymysql.cursors.DictCursor) as cur:
@@ -126,6 +152,117 @@ async def get_transaction_records(
     return run_query(sql, params)
 
 
+@mcp.tool()
+async def list_accounts(
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Page through the distinct fintech_use_num values in account_balance
+    (for batch jobs such as precompute_analyses.py).
+    """
+    if offset < 0:
+        raise ValueError("offset must be zero or positive")
+    sql = """
+        SELECT DISTINCT fintech_use_num
+        FROM account_balance
+        WHERE fintech_use_num IS NOT NULL
+        ORDER BY fintech_use_num
+        LIMIT %s OFFSET %s
+    """
+    return run_query(sql, [build_limit_clause(limit, default=500), offset])
+
+
+@mcp.tool()
+async def get_transaction_watermark(fintech_use_num: str) -> Dict[str, Any]:
+    """
+    Cheap change marker for an account's transactions: row count, latest
+    tran_datetime and max id (answered from the (fintech_use_num, tran_datetime) index).
+    """
+    sql = """
+        SELECT COUNT(*) AS tx_count, MAX(tran_datetime) AS latest, MAX(id) AS max_id
+        FROM transactions
+        WHERE fintech_use_num = %s
+    """
+    rows = run_query(sql, [fintech_use_num])
+    return rows[0] if rows else {"tx_count": 0, "latest": None, "max_id": None}
+
+
+@mcp.tool()
+async def get_transaction_digest(
+    fintech_use_num: str,
+    months: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Aggregate the account's whole transaction history (or the last `months`
+    months) into a fixed-size digest: totals, category totals, monthly trend,
+    recurring payments, top merchants / income sources and balance extremes.
+    """
+    since = None
+    if months is not None:
+        if months <= 0:
+            raise ValueError("months must be a positive integer")
+        latest = run_query(
+            "SELECT MAX(tran_date) AS latest FROM transactions WHERE fintech_use_num = %s",
+            [fintech_use_num],
+        )
+        if latest and latest[0].get("latest"):
+            since = months_before(latest[0]["latest"], months)
+
+    (group_sql, group_params), (balance_sql, balance_params) = digest_queries(fintech_use_num, since)
+    groups = run_query(group_sql, group_params)
+    balance_rows = run_query(balance_sql, balance_params)
+    return build_digest(groups, balance_rows)
+
+
+def _check_day_range(start: str, end: str):
+    if not (len(start) == len(end) == 8 and start.isdigit() and end.isdigit()) or start > end:
+        raise ValueError("start/end must be YYYYMMDD with start <= end")
+
+
+@mcp.tool()
+async def get_daily_watermarks(fintech_use_num: str, start: str, end: str) -> List[Dict[str, Any]]:
+    """
+    Per-day change markers (count, max id, amount sum) for tran_date in
+    [start, end] (YYYYMMDD); days without transactions are omitted.
+    """
+    _check_day_range(start, end)
+    return run_query(*daily_mark_query(fintech_use_num, start, end))
+
+
+@mcp.tool()
+async def get_daily_transaction_groups(fintech_use_num: str, start: str, end: str) -> List[Dict[str, Any]]:
+    """
+    Transactions in [start, end] (YYYYMMDD) grouped by day x in/out x
+    printed_content - the input of the daily summaries in period_summaries.
+    """
+    _check_day_range(start, end)
+    return run_query(*daily_group_query(fintech_use_num, start, end))
+
+
+@mcp.tool()
+async def get_budget_status(
+    fintech_use_num: str,
+    category: Optional[str] = None,
+    month: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Category budget status from the running counters (category_budgets):
+    target, spent, remaining and over_budget for one category, or for every
+    category with a target when category is omitted. month: YYYYMM (default: current).
+    """
+    # 지연 import: category_budgets 는 benefit_simulator·numpy·fastapi 를 끌어오는데,
+    # 도구 호출마다 새로 뜨는 stdio 하위 프로세스에서 다른 도구까지 그 비용을 치르지 않도록
+    from category_budgets import CATEGORIES as BUDGET_CATEGORIES, get_budget_store
+
+    store = get_budget_store()
+    if category is None:
+        return store.status(fintech_use_num, month)
+    if category not in BUDGET_CATEGORIES:
+        raise ValueError(f"unknown category: {category} (가능: {', '.join(BUDGET_CATEGORIES)})")
+    return store.remaining(fintech_use_num, category, month)
+
+
 @mcp.tool()
 async def get_card_basic_info(
     fintech_use_num: Optional[str] = None,
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lightweight request / stage instrumentation for the unified API.
+
+- Per-route latency histograms and in-flight gauges (HTTP middleware).
+- Per-stage latency histograms via `stage("mcp")`-style timers around the
+  expensive calls: MCP tool calls (which include the DB queries the MCP
+  subprocess runs), embedding, vector search and LLM calls. Timers also append to a per-request contextvar so every
+  response carries a `Server-Timing` header with the stage breakdown.
+- LLM call latency and token counts via a LangChain callback handler
+  (`LLMMetricsCallback`, pass it as `callbacks=[...]` to the chat model).
+- `GET /metrics` renders everything in the Prometheus text format.
+
+Metrics live in process memory; with serve.py every worker exposes its own
+counters.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:  # langchain 없이 쓰는 모듈(임베딩/검색 서버 등)
+    BaseCallbackHandler = object
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 요청별 (stage, 초) 기록. 미들웨어가 요청마다 새 리스트를 넣는다.
+_stage_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("stage_timings", default=None)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_text(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{key}="{_escape(value)}"' for key, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(values)} {value:g}" for values, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *values: str, amount: float = 1.0):
+        self.inc(*values, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}  # [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *values: str):
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((values, list(series)) for values, series in self._series.items())
+        lines = []
+        for values, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative:g}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {cumulative:g}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route",
+                            ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served", ("route",))
+STAGE_LATENCY = Histogram("stage_duration_seconds", "Latency of instrumented stages (db, mcp, embedding, search, llm)",
+                          ("stage",))
+STAGE_ERRORS = Counter("stage_errors_total", "Instrumented stages that raised", ("stage",))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by direction", ("model", "kind"))
+LLM_RATE_LIMITED = Counter("llm_rate_limited_total", "LLM calls rejected with 429 (llm_gateway)", ("lane",))
+REGISTRY: List[_Metric] = [REQUEST_LATENCY, REQUESTS_IN_FLIGHT, STAGE_LATENCY, STAGE_ERRORS, LLM_TOKENS,
+                           LLM_RATE_LIMITED]
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_LATENCY.observe(seconds, name)
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """with stage("embedding"): ... -> stage 히스토그램 + Server-Timing 에 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """[(stage, 초)] -> Server-Timing 헤더 (같은 stage 는 합산, ms 단위)"""
+    merged: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        entry = merged.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [
+        f'{name};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for name, (seconds, count) in merged.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LangChain 콜백: LLM 호출마다 stage("llm") 지연과 prompt/completion 토큰 수를 기록"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[object, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            record_stage("llm", time.perf_counter() - started)
+
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name") or "unknown"
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+        if prompt_tokens:
+            LLM_TOKENS.inc(model, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.inc(model, "completion", amount=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            record_stage("llm", time.perf_counter() - started)
+        STAGE_ERRORS.inc("llm")
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _route_template(app: FastAPI, request: Request) -> str:
+    """라벨 폭증을 막기 위해 실제 경로 대신 라우트 템플릿(/alerts/{fintech_use_num})을 사용"""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+def install_metrics(app: FastAPI, path: str = "/metrics"):
+    """app 에 계측 미들웨어와 /metrics 엔드포인트를 붙인다"""
+
+    @app.middleware("http")
+    async def _metrics_middleware(request: Request, call_next):
+        route = _route_template(app, request)
+        timings: List[Tuple[str, float]] = []
+        token = _stage_timings.set(timings)
+        REQUESTS_IN_FLIGHT.inc(route)
+        started = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            response.headers["Server-Timing"] = server_timing(timings, time.perf_counter() - started)
+            return response
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route, status)
+            REQUESTS_IN_FLIGHT.dec(route)
+            _stage_timings.reset(token)
+
+    @app.get(path, include_in_schema=False)
+    def metrics_endpoint():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
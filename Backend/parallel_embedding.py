@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chunked, process-pool-parallel document embedding.
+
+Texts are embedded in chunks of EMBED_BATCH_SIZE. With EMBED_WORKERS > 1 the
+chunks are spread over a ProcessPoolExecutor whose workers each load the
+embedding function once (or talk to embedding_server when
+EMBEDDING_SERVER_URL is set) with a pinned intra-op thread count, so N
+workers never oversubscribe the CPU. The pool uses the spawn start method:
+the workers import embedding_backends afresh instead of inheriting the
+parent's import-time settings, and the thread count is also passed
+explicitly into the ONNX session / PyTorch. Every worker holds its own model
+copy; set EMBEDDING_SERVER_URL to share one model instead. At most 2 x workers chunks are in
+flight, keeping memory bounded regardless of catalogue size. Results are
+yielded as chunks finish so callers can stream them to disk / Milvus and
+resume after an interruption.
+
+Used by embed_cards.py and card_benefit_api.ingest_if_empty.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from metrics import stage
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_THREADS_PER_WORKER = int(os.getenv("EMBED_THREADS_PER_WORKER", "0"))  # 0 = 코어 수 / 워커 수
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "ONNX_INTRA_OP_THREADS")
+
+_worker_embedding_fn = None
+
+
+def threads_per_worker(workers: int, threads: int = EMBED_THREADS_PER_WORKER) -> int:
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+def pin_threads(threads: int):
+    """BLAS/OpenMP/ONNX Runtime/PyTorch 스레드 수 고정 (모델 로드 전에 호출)"""
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(threads: int):
+    global _worker_embedding_fn
+    pin_threads(threads)
+    from embedding_backends import create_embedding_function
+
+    _worker_embedding_fn = create_embedding_function(intra_op_threads=threads)
+
+
+def _worker_threads(_: Any = None) -> Dict[str, Any]:
+    """이 워커에 실제로 적용된 스레드 설정 (ONNX 세션 옵션, PyTorch, 환경 변수)"""
+    settings: Dict[str, Any] = {"pid": os.getpid(), "env": {name: os.environ.get(name) for name in THREAD_ENV_VARS}}
+    session = getattr(_worker_embedding_fn, "session", None)
+    if session is not None:
+        settings["onnx_intra_op_threads"] = session.get_session_options().intra_op_num_threads
+    try:
+        import torch
+
+        settings["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return settings
+
+
+def _pool(workers: int, threads: int) -> ProcessPoolExecutor:
+    # spawn: fork 하면 부모가 import 시점에 읽은 스레드 설정과 이미 떠 있는 스레드 풀을 물려받는다
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads_per_worker(workers, threads),),
+    )
+
+
+def probe_worker_threads(workers: int = EMBED_WORKERS, threads: int = EMBED_THREADS_PER_WORKER) -> List[Dict[str, Any]]:
+    """iter_embedded_chunks 와 같은 풀을 띄워 워커들의 스레드 설정을 모아 온다 (검증용)"""
+    with _pool(workers, threads) as pool:
+        return list(pool.map(_worker_threads, range(workers * 2)))
+
+
+def _embed(embedding_fn, texts: List[str]) -> Dict[str, Any]:
+    with stage("embedding"):
+        result = embedding_fn.encode_documents(texts)
+    return {
+        "dense": np.vstack(result["dense"]).astype(np.float32),
+        "sparse": result["sparse"].tocsr(),
+    }
+
+
+def _embed_chunk(texts: List[str]) -> Dict[str, Any]:
+    return _embed(_worker_embedding_fn, texts)
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def iter_embedded_chunks(
+    chunks: Iterable[Tuple[Any, List[str]]],
+    workers: int = EMBED_WORKERS,
+    threads: int = EMBED_THREADS_PER_WORKER,
+    embedding_fn=None,
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    (payload, texts) 청크들을 임베딩해 끝나는 순서대로 (payload, {"dense", "sparse"}) 를 내보낸다.
+
+    workers <= 1 이면 현재 프로세스에서 embedding_fn(없으면 새로 생성)으로 순차 처리한다.
+    """
+    if workers <= 1:
+        if embedding_fn is None:
+            from embedding_backends import create_embedding_function
+
+            embedding_fn = create_embedding_function()
+        for payload, texts in chunks:
+            yield payload, _embed(embedding_fn, texts)
+        return
+
+    max_in_flight = workers * 2
+    in_flight: Dict[Future, Any] = {}
+    iterator = iter(chunks)
+    with _pool(workers, threads) as pool:
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                try:
+                    payload, texts = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[pool.submit(_embed_chunk, texts)] = payload
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                payload = in_flight.pop(future)
+                yield payload, future.result()
+
+
+class Progress:
+    """처리 건수/속도 출력"""
+
+    def __init__(self, total: int, label: str, done: int = 0):
+        self.total = total
+        self.label = label
+        self.done = done
+        self._start_done = done
+        self.started = time.perf_counter()
+
+    def update(self, n: int):
+        self.done += n
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rate = (self.done - self._start_done) / elapsed
+        remaining = (self.total - self.done) / rate if rate else float("inf")
+        print(f"🔄 {self.label}: {self.done}/{self.total} ({rate:.1f}/s, 남은 시간 ~{remaining:.0f}s)")
+
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hierarchical, incrementally maintained spending summaries (day -> week -> month).
+
+The weekly / monthly spending story (소비 스토리텔링) must not resend a whole
+period's transactions to the LLM. Instead:
+
+1. Each day is summarised once from grouped SQL rows (daily_group_query:
+   day x in/out x merchant, same %s SQL on MySQL and SQLite) into a small
+   structured summary: totals, category amounts, top merchants, largest
+   expense. The categories come from benefit_extractor.spend_category, the
+   same categoriser as the category budgets, so a story and the budget
+   screen report the same per-category amounts.
+2. A week (the Monday-Sunday span clipped to its month, key YYYYMM-Wn) is
+   merged from its daily summaries and a month from its weekly ones, so
+   every level keeps the same fixed-size shape.
+3. Every stored summary carries a watermark. For a day that is the day's
+   (count, max id, amount sum) from daily_mark_query, prefixed with
+   SUMMARY_FORMAT so summaries built with an older categoriser are rebuilt;
+   for a week or month it
+   is the fingerprint of its children's watermarks. A summary is rebuilt
+   only when new transactions land in its period, and only the changed days
+   are re-read from the DB.
+
+SummaryStore persists the summaries, together with the story generated from
+each one, in SQLite (WAL, SUMMARY_STORE_PATH). Writing a summary with a new
+watermark drops its story. A monthly story therefore costs one small LLM
+call over render_summary(month) and nothing at all while the month is
+unchanged.
+"""
+from __future__ import annotations
+
+import calendar
+import json
+import os
+import sqlite3
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from singleflight import fingerprint
+from benefit_extractor import spend_category
+
+SUMMARY_STORE_PATH = os.getenv("SUMMARY_STORE_PATH", "period_summaries.sqlite")
+SUMMARY_TOP_N = int(os.getenv("SUMMARY_TOP_N", "5"))
+LEVELS = ("day", "week", "month")
+# 요약 모양이나 카테고리 분류가 바뀌면 올림 -> 저장된 요약의 watermark 가 모두 달라져 다시 만든다
+SUMMARY_FORMAT = "2"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS period_summaries (
+    fintech_use_num TEXT NOT NULL,
+    level TEXT NOT NULL,
+    period TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    story TEXT,
+    computed_at REAL NOT NULL,
+    PRIMARY KEY (fintech_use_num, level, period)
+);
+"""
+
+
+# ---------------------------------------------------------------------------
+# 기간 계산 (tran_date = YYYYMMDD)
+# ---------------------------------------------------------------------------
+def _parse(yyyymmdd: str) -> date:
+    return date(int(yyyymmdd[:4]), int(yyyymmdd[4:6]), int(yyyymmdd[6:8]))
+
+
+def month_days(month: str) -> List[str]:
+    """YYYYMM -> 그 달의 YYYYMMDD 목록"""
+    year, mon = int(month[:4]), int(month[4:6])
+    return [f"{year:04d}{mon:02d}{day:02d}" for day in range(1, calendar.monthrange(year, mon)[1] + 1)]
+
+
+def month_weeks(month: str) -> List[Tuple[str, List[str]]]:
+    """월 안의 주 구간 [(YYYYMM-Wn, [일자...])] - 월요일 시작, 월 경계에서 자름"""
+    weeks: List[Tuple[str, List[str]]] = []
+    for day in month_days(month):
+        if not weeks or _parse(day).weekday() == 0:
+            weeks.append((f"{month}-W{len(weeks) + 1}", []))
+        weeks[-1][1].append(day)
+    return weeks
+
+
+def week_days(week: str) -> List[str]:
+    """YYYYMM-Wn -> 그 주 구간의 일자 목록"""
+    for key, days in month_weeks(week[:6]):
+        if key == week:
+            return days
+    raise ValueError(f"unknown week: {week}")
+
+
+def period_of(level: str, yyyymmdd: str) -> str:
+    """일자가 속한 월(YYYYMM) 또는 주(YYYYMM-Wn)"""
+    if level == "month":
+        return yyyymmdd[:6]
+    for week, days in month_weeks(yyyymmdd[:6]):
+        if yyyymmdd in days:
+            return week
+    raise ValueError(f"invalid date: {yyyymmdd}")
+
+
+def validate_period(level: str, period: str) -> str:
+    try:
+        if level == "month" and len(period) == 6:
+            month_days(period)
+            return period
+        if level == "week" and len(period) >= 9 and period[6:8] == "-W":
+            week_days(period)
+            return period
+        if level == "day" and len(period) == 8:
+            _parse(period)
+            return period
+    except ValueError:
+        pass
+    raise ValueError(f"invalid {level} period: {period} (day=YYYYMMDD, week=YYYYMM-Wn, month=YYYYMM)")
+
+
+# ---------------------------------------------------------------------------
+# SQL (mcp_server 의 get_daily_watermarks / get_daily_transaction_groups)
+# ---------------------------------------------------------------------------
+def daily_mark_query(fintech_use_num: str, start: str, end: str) -> Tuple[str, List[Any]]:
+    """일자별 변경 표식 (건수, 최대 id, 금액 합) - 인덱스 범위 스캔"""
+    sql = """
+        SELECT tran_date, COUNT(*) AS cnt, MAX(id) AS max_id, SUM(tran_amt) AS total
+        FROM transactions
+        WHERE fintech_use_num = %s AND tran_date BETWEEN %s AND %s
+        GROUP BY tran_date
+    """
+    return sql, [fintech_use_num, start, end]
+
+
+def daily_group_query(fintech_use_num: str, start: str, end: str) -> Tuple[str, List[Any]]:
+    """일자 x 입출금 x 가맹점 집계 - 일별 요약의 입력"""
+    sql = """
+        SELECT tran_date, inout_type, printed_content,
+               COUNT(*) AS cnt, SUM(tran_amt) AS total, MAX(tran_amt) AS max_amt
+        FROM transactions
+        WHERE fintech_use_num = %s AND tran_date BETWEEN %s AND %s
+        GROUP BY tran_date, inout_type, printed_content
+    """
+    return sql, [fintech_use_num, start, end]
+
+
+def week_watermark(days: Sequence[str], marks: Dict[str, str]) -> str:
+    """주 표식 = 그 주 일별 표식들의 지문 (월 표식은 다시 주 표식들의 지문)"""
+    return fingerprint([(day, marks[day]) for day in days if day in marks])
+
+
+def day_watermarks(rows: Sequence[Dict[str, Any]]) -> Dict[str, str]:
+    """daily_mark_query 결과 -> {YYYYMMDD: 'format|cnt|max_id|total'} (거래 없는 날은 없음)"""
+    return {
+        row["tran_date"]: f"{SUMMARY_FORMAT}|{row.get('cnt') or 0}|{row.get('max_id')}|{row.get('total') or 0}"
+        for row in rows if row.get("tran_date")
+    }
+
+
+# ---------------------------------------------------------------------------
+# 요약 (모든 단계가 같은 모양, 목록은 상한이 있어 크기 고정)
+# ---------------------------------------------------------------------------
+def _empty(level: str, period: str) -> Dict[str, Any]:
+    return {
+        "level": level,
+        "period": period,
+        "transactions": 0,
+        "income": 0,
+        "expense": 0,
+        "active_days": 0,
+        "categories": {},
+        "merchants": {},
+        "largest": None,
+        "breakdown": [],
+    }
+
+
+def _cap_merchants(merchants: Dict[str, Dict[str, int]], top_n: int) -> Dict[str, Dict[str, int]]:
+    ranked = sorted(merchants.items(), key=lambda item: item[1]["amount"], reverse=True)[:top_n]
+    return dict(ranked)
+
+
+def summarize_day(day: str, groups: Sequence[Dict[str, Any]], top_n: int = SUMMARY_TOP_N) -> Dict[str, Any]:
+    """하루치 daily_group_query 행 -> 일별 요약"""
+    summary = _empty("day", day)
+    merchants: Dict[str, Dict[str, int]] = {}
+    for row in groups:
+        name = (row.get("printed_content") or "").strip() or "(내용 없음)"
+        count = int(row.get("cnt") or 0)
+        amount = int(row.get("total") or 0)
+        summary["transactions"] += count
+        if row.get("inout_type") == "입금":
+            summary["income"] += amount
+        elif row.get("inout_type") == "출금":
+            summary["expense"] += amount
+            category = spend_category(name)
+            summary["categories"][category] = summary["categories"].get(category, 0) + amount
+            merchant = merchants.setdefault(name, {"amount": 0, "count": 0})
+            merchant["amount"] += amount
+            merchant["count"] += count
+            biggest = int(row.get("max_amt") or 0)
+            if summary["largest"] is None or biggest > summary["largest"]["amount"]:
+                summary["largest"] = {"name": name, "amount": biggest, "date": day}
+    summary["active_days"] = int(summary["transactions"] > 0)
+    summary["merchants"] = _cap_merchants(merchants, top_n)
+    return summary
+
+
+def merge_summaries(level: str, period: str, children: Sequence[Dict[str, Any]],
+                    top_n: int = SUMMARY_TOP_N) -> Dict[str, Any]:
+    """하위 요약들(일->주, 주->월)을 합쳐 상위 요약 생성"""
+    summary = _empty(level, period)
+    merchants: Dict[str, Dict[str, int]] = {}
+    for child in children:
+        for key in ("transactions", "income", "expense", "active_days"):
+            summary[key] += child[key]
+        for name, amount in child["categories"].items():
+            summary["categories"][name] = summary["categories"].get(name, 0) + amount
+        for name, stats in child["merchants"].items():
+            merchant = merchants.setdefault(name, {"amount": 0, "count": 0})
+            merchant["amount"] += stats["amount"]
+            merchant["count"] += stats["count"]
+        largest = child["largest"]
+        if largest and (summary["largest"] is None or largest["amount"] > summary["largest"]["amount"]):
+            summary["largest"] = largest
+        if child["transactions"]:
+            summary["breakdown"].append({
+                "period": child["period"],
+                "income": child["income"],
+                "expense": child["expense"],
+                "transactions": child["transactions"],
+            })
+    # 하위 요약이 이미 상위 top_n 만 들고 있으므로 가맹점 순위는 근사치
+    summary["merchants"] = _cap_merchants(merchants, top_n)
+    return summary
+
+
+def _won(value: int) -> str:
+    return f"{value:,}"
+
+
+def render_summary(summary: Dict[str, Any]) -> str:
+    """스토리 프롬프트용 요약 텍스트 (표는 헤더 1줄 + 항목당 1줄)"""
+    labels = {"day": "일", "week": "주", "month": "월"}
+    child_label = {"week": "일", "month": "주"}.get(summary["level"], "")
+    categories = sorted(summary["categories"].items(), key=lambda item: item[1], reverse=True)
+    lines = [
+        f"기간({labels[summary['level']]}) {summary['period']}: 거래 {summary['transactions']}건, "
+        f"거래일 {summary['active_days']}일",
+        f"입금 {_won(summary['income'])}원, 출금 {_won(summary['expense'])}원, "
+        f"순 {_won(summary['income'] - summary['expense'])}원",
+        "",
+        "카테고리별 지출 (카테고리|금액|비중):",
+        *(f"{name}|{_won(amount)}|{amount / summary['expense']:.0%}"
+          for name, amount in categories if summary["expense"]),
+        "",
+        "상위 지출처 (가맹점|금액|건수):",
+        *(f"{name}|{_won(stats['amount'])}|{stats['count']}" for name, stats in summary["merchants"].items()),
+    ]
+    if summary["largest"]:
+        largest = summary["largest"]
+        lines += ["", f"가장 큰 지출: {largest['name']} {_won(largest['amount'])}원 ({largest['date']})"]
+    if summary["breakdown"]:
+        lines += [
+            "",
+            f"{child_label}별 흐름 ({child_label}|입금|출금|건수):",
+            *(f"{b['period']}|{_won(b['income'])}|{_won(b['expense'])}|{b['transactions']}"
+              for b in summary["breakdown"]),
+        ]
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# 저장소
+# ---------------------------------------------------------------------------
+class SummaryStore:
+    def __init__(self, path: str = SUMMARY_STORE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, fintech_use_num: str, level: str,
+                 periods: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """{period: {"watermark", "summary", "story"}} - 저장된 것만"""
+        if not periods:
+            return {}
+        placeholders = ", ".join("?" for _ in periods)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT period, watermark, summary, story FROM period_summaries"
+                f" WHERE fintech_use_num = ? AND level = ? AND period IN ({placeholders})",
+                (fintech_use_num, level, *periods),
+            ).fetchall()
+        return {
+            period: {"watermark": watermark, "summary": json.loads(summary), "story": story}
+            for period, watermark, summary, story in rows
+        }
+
+    def put_many(self, fintech_use_num: str, level: str, items: Sequence[Tuple[str, str, Dict[str, Any]]]):
+        """[(period, watermark, summary)] upsert - watermark 가 바뀐 행은 스토리도 무효화"""
+        if not items:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO period_summaries (fintech_use_num, level, period, watermark, summary, story, computed_at)"
+                " VALUES (?, ?, ?, ?, ?, NULL, ?)"
+                " ON CONFLICT(fintech_use_num, level, period) DO UPDATE SET"
+                " story = CASE WHEN period_summaries.watermark = excluded.watermark"
+                " THEN period_summaries.story ELSE NULL END,"
+                " watermark = excluded.watermark, summary = excluded.summary, computed_at = excluded.computed_at",
+                [(fintech_use_num, level, period, watermark, json.dumps(summary, ensure_ascii=False), now)
+                 for period, watermark, summary in items],
+            )
+
+    def put_story(self, fintech_use_num: str, level: str, period: str, watermark: str, story: str) -> bool:
+        """요약이 그 사이 바뀌지 않았을 때만 스토리 저장"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE period_summaries SET story = ?"
+                " WHERE fintech_use_num = ? AND level = ? AND period = ? AND watermark = ?",
+                (story, fintech_use_num, level, period, watermark),
+            )
+        return cursor.rowcount > 0
+
+    def counts(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT level, COUNT(*), COUNT(story) FROM period_summaries GROUP BY level").fetchall()
+        return {level: {"stored": stored, "stories": stories} for level, stored, stories in rows}
+
+
+# ---------------------------------------------------------------------------
+# 증분 갱신
+# ---------------------------------------------------------------------------
+FetchRows = Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]]
+
+
+class PeriodSummarizer:
+    """
+    저장된 요약을 재사용하며 일->주->월 요약을 갱신.
+
+    fetch_marks / fetch_groups 는 (fintech_use_num, start, end) -> 행 목록 인 async 함수
+    (client_app 은 MCP 도구, 벤치마크는 SQLite 직접 조회).
+    """
+
+    def __init__(self, store: SummaryStore, fetch_marks: FetchRows, fetch_groups: FetchRows):
+        self.store = store
+        self.fetch_marks = fetch_marks
+        self.fetch_groups = fetch_groups
+        self.stats = {f"{level}s_{kind}": 0 for level in LEVELS for kind in ("built", "reused")}
+
+    async def _weeks(self, fintech_use_num: str, weeks: Sequence[Tuple[str, List[str]]],
+                     marks: Dict[str, str], work: Dict[str, int]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """{week: (watermark, summary)} - 바뀐 주만 일별 요약에서 다시 합침"""
+        week_marks = {week: week_watermark(days, marks) for week, days in weeks}
+        stored = self.store.get_many(fintech_use_num, "week", [week for week, _ in weeks])
+        result: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        stale = []
+        for week, days in weeks:
+            row = stored.get(week)
+            if row and row["watermark"] == week_marks[week]:
+                result[week] = (row["watermark"], row["summary"])
+                work["weeks_reused"] += 1
+            else:
+                stale.append((week, days))
+        if not stale:
+            return result
+
+        # 바뀐 주의 일자들: 저장된 일별 요약 재사용, 표식이 다른 날만 DB 에서 다시 읽음
+        days = [day for _, week_days_ in stale for day in week_days_ if day in marks]
+        day_rows = self.store.get_many(fintech_use_num, "day", days)
+        changed = [day for day in days if day_rows.get(day, {}).get("watermark") != marks[day]]
+        daily = {day: row["summary"] for day, row in day_rows.items()}
+        work["days_reused"] += len(days) - len(changed)
+        if changed:
+            groups = await self.fetch_groups(fintech_use_num, min(changed), max(changed))
+            by_day: Dict[str, List[Dict[str, Any]]] = {}
+            for row in groups:
+                by_day.setdefault(row.get("tran_date"), []).append(row)
+            fresh = [(day, marks[day], summarize_day(day, by_day.get(day, []))) for day in changed]
+            self.store.put_many(fintech_use_num, "day", fresh)
+            daily.update({day: summary for day, _, summary in fresh})
+            work["days_built"] += len(fresh)
+
+        built = []
+        for week, week_days_ in stale:
+            summary = merge_summaries("week", week, [daily[day] for day in week_days_ if day in marks])
+            built.append((week, week_marks[week], summary))
+            result[week] = (week_marks[week], summary)
+        self.store.put_many(fintech_use_num, "week", built)
+        work["weeks_built"] += len(built)
+        return result
+
+    async def _marks(self, fintech_use_num: str, days: Sequence[str]) -> Dict[str, str]:
+        return day_watermarks(await self.fetch_marks(fintech_use_num, days[0], days[-1]))
+
+    def _record(self, work: Dict[str, int]) -> Dict[str, int]:
+        for key, value in work.items():
+            self.stats[key] += value
+        return work
+
+    async def week(self, fintech_use_num: str, week: str) -> Dict[str, Any]:
+        """주 요약 {"watermark", "summary", "story", "work"}"""
+        days = week_days(validate_period("week", week))
+        work = {key: 0 for key in self.stats}
+        marks = await self._marks(fintech_use_num, days)
+        watermark, summary = (await self._weeks(fintech_use_num, [(week, days)], marks, work))[week]
+        story = self.store.get_many(fintech_use_num, "week", [week])[week]["story"]
+        return {"watermark": watermark, "summary": summary, "story": story, "work": self._record(work)}
+
+    async def month(self, fintech_use_num: str, month: str) -> Dict[str, Any]:
+        """월 요약 {"watermark", "summary", "story", "work"} - 표식 조회 1회, 바뀐 날만 재집계"""
+        weeks = month_weeks(validate_period("month", month))
+        work = {key: 0 for key in self.stats}
+        marks = await self._marks(fintech_use_num, month_days(month))
+        watermark = fingerprint([(week, week_watermark(days, marks)) for week, days in weeks])
+
+        stored = self.store.get_many(fintech_use_num, "month", [month]).get(month)
+        if stored and stored["watermark"] == watermark:
+            work["months_reused"] += 1
+            return {"watermark": watermark, "summary": stored["summary"], "story": stored["story"],
+                    "work": self._record(work)}
+
+        week_summaries = await self._weeks(fintech_use_num, weeks, marks, work)
+        summary = merge_summaries("month", month, [week_summaries[week][1] for week, _ in weeks])
+        self.store.put_many(fintech_use_num, "month", [(month, watermark, summary)])
+        work["months_built"] += 1
+        return {"watermark": watermark, "summary": summary, "story": None, "work": self._record(work)}
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, "stored": self.store.counts()}
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nightly batch: precompute /analyze results for every account.
+
+Run after the nightly data load (cron, e.g. `0 5 * * *`). Pages through the
+accounts in account_balance (MCP list_accounts) and, for each account whose
+current data watermark differs from the stored one, runs the same analysis
+path as /analyze (client_app.compute_analysis: digest, build_prompts,
+run_reflexion_cycle) and stores the result with that watermark in
+analysis_store. Accounts are processed --concurrency at a time; LLM calls
+go through llm_gateway in the batch lane, so interactive traffic on the same
+host keeps priority. /analyze then answers unchanged accounts from the store.
+
+Usage:
+    python precompute_analyses.py --concurrency 8
+    python precompute_analyses.py --limit 100 --force
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from client_app import (
+    analysis_store,
+    compute_analysis,
+    fetch_account,
+    fetch_watermark,
+    mcp_invoker,
+)
+
+PAGE_SIZE = 500
+
+
+async def list_all_accounts(limit: int = 0) -> List[str]:
+    accounts: List[str] = []
+    offset = 0
+    while True:
+        page = await mcp_invoker.call_tool("list_accounts", limit=PAGE_SIZE, offset=offset)
+        if isinstance(page, dict):
+            page = [page]
+        page = page or []
+        accounts += [row["fintech_use_num"] for row in page]
+        if len(page) < PAGE_SIZE or (limit and len(accounts) >= limit):
+            break
+        offset += PAGE_SIZE
+    return accounts[:limit] if limit else accounts
+
+
+async def precompute(concurrency: int, limit: int = 0, force: bool = False) -> Dict[str, Any]:
+    if analysis_store is None:
+        raise SystemExit("ANALYSIS_STORE_ENABLED=0 이면 저장할 곳이 없습니다.")
+
+    started = time.perf_counter()
+    accounts = await list_all_accounts(limit)
+    semaphore = asyncio.Semaphore(concurrency)
+    report = {"accounts": len(accounts), "computed": 0, "unchanged": 0, "failed": 0, "errors": []}
+
+    async def one(fintech_use_num: str):
+        async with semaphore:
+            try:
+                account_info = await fetch_account(None, fintech_use_num)
+                if not account_info:
+                    raise LookupError("account not found")
+                watermark = await fetch_watermark(account_info)
+                if not force and analysis_store.watermark(fintech_use_num) == watermark:
+                    report["unchanged"] += 1
+                    return
+                await compute_analysis(account_info, watermark, source="batch")
+                report["computed"] += 1
+            except Exception as exc:
+                report["failed"] += 1
+                if len(report["errors"]) < 20:
+                    report["errors"].append({"fintech_use_num": fintech_use_num, "error": str(exc)})
+                print(f"⚠️ {fintech_use_num} 분석 실패: {exc}")
+            done = report["computed"] + report["unchanged"] + report["failed"]
+            if done % 100 == 0:
+                print(f"... {done}/{len(accounts)}")
+
+    await asyncio.gather(*(one(fin) for fin in accounts))
+    report["elapsed_s"] = round(time.perf_counter() - started, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute /analyze results for all accounts")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 분석할 계좌 수")
+    parser.add_argument("--limit", type=int, default=0, help="처리할 최대 계좌 수 (0 = 전체)")
+    parser.add_argument("--force", action="store_true", help="watermark 가 같아도 다시 계산")
+    args = parser.parse_args()
+
+    report = asyncio.run(precompute(args.concurrency, args.limit, args.force))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact prompt encoding for account / transaction rows.
+
+`SELECT *` rows carry bookkeeping columns (id, api_inquiry_log_id,
+created_at, tran_datetime duplicating tran_date + tran_time, ...) that cost
+tokens on every LLM call without helping the analysis. TransactionPrompt
+projects only the columns the analysis needs and encodes them once as a
+pipe-separated table (header once, one short line per row); the draft,
+reflection and revision calls in client_app all reuse that encoding.
+
+count_tokens uses tiktoken when available (falls back to a chars/2
+estimate for Korean text); token_report compares
+the old JSON/bullet encoding with the compact one (see
+bench_prompt_encoding.py).
+"""
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (컬럼, 표 헤더)
+TRANSACTION_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("tran_date", "일자"),
+    ("tran_time", "시각"),
+    ("inout_type", "구분"),
+    ("tran_type", "유형"),
+    ("printed_content", "내용"),
+    ("tran_amt", "금액"),
+    ("after_balance_amt", "잔액"),
+)
+ACCOUNT_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("bank_name", "은행"),
+    ("product_name", "상품명"),
+    ("balance_amt", "잔액"),
+    ("available_amt", "출금가능액"),
+    ("account_type", "계좌유형"),
+)
+# 전체 기간은 transaction_digest 요약이 담당하므로 원본 행은 최근 일부만
+PROMPT_ROW_LIMIT = int(os.getenv("PROMPT_ROW_LIMIT", "20"))
+REFLECTION_ROW_LIMIT = int(os.getenv("REFLECTION_ROW_LIMIT", "10"))
+# 이전 인코딩의 행 수 (legacy_payloads 비교 기준)
+LEGACY_ROW_LIMIT = 50
+LEGACY_REFLECTION_ROW_LIMIT = 20
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(os.getenv("OPENAI_MODEL", "gpt-4o"))
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # 인코딩 파일 다운로드 실패 (오프라인) 등
+        print(f"⚠️ tiktoken 로드 실패, 토큰 수를 추정치로 계산합니다: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken 토큰 수 (미설치 시 한글 기준 약 2자 = 1토큰 추정)"""
+    tokenizer = _tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return max(1, len(text) // 2)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().replace("|", "/").replace("\n", " ")
+
+
+def encode_account(account_info: Dict[str, Any]) -> str:
+    return ", ".join(f"{label} {_cell(account_info.get(key)) or 'N/A'}" for key, label in ACCOUNT_COLUMNS)
+
+
+class TransactionPrompt:
+    """
+    계좌/거래 행을 한 번만 인코딩해 초안·리뷰·수정 세 번의 LLM 호출에서 재사용.
+    digest: 전체 이력 요약 텍스트 (transaction_digest.render_digest)
+    """
+
+    def __init__(self, account_info: Dict[str, Any], transactions: Sequence[Dict[str, Any]],
+                 limit: int = PROMPT_ROW_LIMIT, columns: Sequence[Tuple[str, str]] = TRANSACTION_COLUMNS,
+                 digest: Optional[str] = None):
+        self.account = encode_account(account_info)
+        self.digest = digest
+        self.header = "|".join(label for _, label in columns)
+        self.lines: List[str] = [
+            "|".join(_cell(row.get(key)) for key, _ in columns)
+            for row in transactions[:limit]
+        ]
+
+    def table(self, limit: Optional[int] = None) -> str:
+        lines = self.lines if limit is None else self.lines[:limit]
+        return "\n".join([self.header, *lines])
+
+    def section(self, limit: Optional[int] = None) -> str:
+        """계좌 요약 + (전체 이력 요약) + 최근 거래 표 (금액 단위 원, 최신순)"""
+        n = len(self.lines) if limit is None else min(limit, len(self.lines))
+        digest = f"전체 거래 요약:\n{self.digest}\n\n" if self.digest else ""
+        return (
+            f"계좌: {self.account}\n\n{digest}"
+            f"최근 거래 {n}건 (최신순, 금액·잔액 단위 원):\n{self.table(limit)}"
+        )
+
+
+def legacy_payloads(account_info: Dict[str, Any], transactions: Sequence[Dict[str, Any]]) -> Dict[str, str]:
+    """이전 인코딩 (불릿 목록 + SELECT * 행 json.dumps) 의 데이터 부분 - 비교용"""
+    account_summary = (
+        "계좌 정보:\n"
+        f"- 은행: {account_info.get('bank_name', 'N/A')}\n"
+        f"- 상품명: {account_info.get('product_name', 'N/A')}\n"
+        f"- 잔액: {account_info.get('balance_amt', '0')}원\n"
+        f"- 출금가능액: {account_info.get('available_amt', '0')}원\n"
+        f"- 계좌유형: {account_info.get('account_type', 'N/A')}\n"
+    )
+    transaction_text = "\n".join(
+        f"- {t.get('tran_date', '')} {t.get('tran_time', '')}: "
+        f"{t.get('inout_type', '')} {t.get('tran_type', '')} "
+        f"{t.get('printed_content', '')} {t.get('tran_amt', 0)}원"
+        for t in transactions[:LEGACY_ROW_LIMIT]
+    )
+    return {
+        "draft": f"{account_summary}\n\n최근 거래 내역:\n{transaction_text}",
+        "reflection": json.dumps(
+            {"account_info": account_info, "sample_transactions": list(transactions[:LEGACY_REFLECTION_ROW_LIMIT])},
+            ensure_ascii=False,
+        ),
+        "revision": json.dumps(
+            {"account_info": account_info, "transactions": list(transactions[:LEGACY_ROW_LIMIT])},
+            ensure_ascii=False,
+        ),
+    }
+
+
+def compact_payloads(encoded: TransactionPrompt) -> Dict[str, str]:
+    return {
+        "draft": encoded.section(),
+        "reflection": encoded.section(REFLECTION_ROW_LIMIT),
+        "revision": encoded.section(),
+    }
+
+
+def token_report(account_info: Dict[str, Any], transactions: Sequence[Dict[str, Any]],
+                 digest: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """세 호출의 데이터 부분 토큰 수: before(이전 인코딩) / after(압축 표 + 요약)"""
+    report = {}
+    for name, payloads in (
+        ("before", legacy_payloads(account_info, transactions)),
+        ("after", compact_payloads(TransactionPrompt(account_info, transactions, digest=digest))),
+    ):
+        counts = {call: count_tokens(text) for call, text in payloads.items()}
+        counts["total"] = sum(counts.values())
+        report[name] = counts
+    return report
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-owner search process for multi-worker deployments.
+
+Milvus Lite keeps card_benefits.db open from exactly one process, so when
+main_api runs with several workers (serve.py) only this process connects to
+Milvus, ingests the catalogue and runs hybrid searches. Workers embed the
+query themselves and send the vectors here through
+card_benefit_api.RemoteSearchBackend (SEARCH_BACKEND=remote,
+SEARCH_SERVER_URL). Every response carries the catalogue version (a hash of
+the served content, stable across restarts) and workers poll GET /version
+on cache hits, so their /search response caches are invalidated after a
+re-ingestion.
+
+Run:
+    python search_server.py                                   # unix:///tmp/card_search.sock
+    SEARCH_SERVER_PORT=9601 python search_server.py           # 127.0.0.1:9601
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+import card_benefit_api
+from card_benefit_api import SearchFilters, create_search_backend, decode_query_vectors, resolve_weights
+
+SEARCH_SERVER_BACKEND = os.getenv("SEARCH_SERVER_BACKEND", "milvus")
+SEARCH_SERVER_UDS = os.getenv("SEARCH_SERVER_UDS", "/tmp/card_search.sock")
+SEARCH_SERVER_HOST = os.getenv("SEARCH_SERVER_HOST", "127.0.0.1")
+SEARCH_SERVER_PORT = int(os.getenv("SEARCH_SERVER_PORT", "0"))  # 0 이면 UDS 사용
+
+backend = None
+
+app = FastAPI(
+    title="Card Search Owner",
+    description="Milvus Lite 를 단독으로 여는 검색 전용 프로세스 (serve.py 워커들이 공유)",
+    version="1.0.0",
+)
+
+
+class VectorSearchRequest(BaseModel):
+    dense: str
+    sparse: Dict[str, Any]
+    top_k: int = 5
+    filters: Optional[SearchFilters] = None
+    weights: Optional[Dict[str, float]] = None
+
+
+@app.on_event("startup")
+def _startup_event():
+    global backend
+    if SEARCH_SERVER_BACKEND == "remote":
+        raise RuntimeError("SEARCH_SERVER_BACKEND must be a local backend (milvus | memory)")
+    backend = create_search_backend(SEARCH_SERVER_BACKEND)
+    print(f"✅ search owner ready: backend={backend.name}, pid={os.getpid()}")
+
+
+@app.post("/search")
+def search(request: VectorSearchRequest):
+    try:
+        weights = resolve_weights(request.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    dense, sparse_matrix = decode_query_vectors(request.dict())
+    results = backend.search(dense, sparse_matrix, request.top_k, request.filters, weights)
+    return {"catalogue_version": card_benefit_api.search_cache.version, "results": results}
+
+
+@app.get("/version")
+def version():
+    return {"catalogue_version": card_benefit_api.search_cache.version}
+
+
+@app.get("/healthz")
+def healthz():
+    return {
+        "status": "ok",
+        "backend": backend.name if backend else None,
+        "catalogue_version": card_benefit_api.search_cache.version,
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    if SEARCH_SERVER_PORT:
+        uvicorn.run(app, host=SEARCH_SERVER_HOST, port=SEARCH_SERVER_PORT)
+    else:
+        if os.path.exists(SEARCH_SERVER_UDS):
+            os.unlink(SEARCH_SERVER_UDS)
+        uvicorn.run(app, uds=SEARCH_SERVER_UDS)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-process serving for main_api (gunicorn + UvicornWorker).
+
+`python main_api.py` runs a single uvicorn process. This launcher runs
+WEB_WORKERS worker processes behind one gunicorn master instead:
+
+- The app is imported in the master before fork (preload_app), so read-only
+  state (BGE-M3 / ONNX embedding model, benefit index, benefit simulator
+  matrices and, with SEARCH_BACKEND=memory, the in-memory search matrices) is
+  loaded once and shared copy-on-write. Intra-op threads are pinned to
+  cores / workers before the model loads so workers don't oversubscribe.
+- Milvus Lite is opened by exactly one process: with SEARCH_BACKEND=milvus
+  (default) a search_server.py owner is started first and the workers use
+  SEARCH_BACKEND=remote.
+- Chat short-term memory defaults to the SQLite checkpointer
+  (CHAT_CHECKPOINTER=sqlite) so a thread_id works on any worker; long-term
+  memory is file-locked in chatbot_api.
+
+Run:
+    python serve.py --workers 4 --port 9600
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from parallel_embedding import pin_threads, threads_per_worker
+
+HERE = Path(__file__).resolve().parent
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "120"))
+SEARCH_SERVER_STARTUP_TIMEOUT = float(os.getenv("SEARCH_SERVER_STARTUP_TIMEOUT", "900"))
+
+
+def start_search_owner() -> subprocess.Popen:
+    """search_server.py 를 띄우고 /healthz 가 응답할 때까지 대기 (최초 실행 시 Milvus 적재 포함)"""
+    import httpx
+
+    url = os.getenv("SEARCH_SERVER_URL", "unix:///tmp/card_search.sock")
+    env = dict(os.environ)
+    if url.startswith("unix://"):
+        env["SEARCH_SERVER_UDS"] = url[len("unix://"):]
+        client = httpx.Client(transport=httpx.HTTPTransport(uds=env["SEARCH_SERVER_UDS"]),
+                              base_url="http://search", timeout=5)
+    else:
+        env["SEARCH_SERVER_PORT"] = str(httpx.URL(url).port)
+        client = httpx.Client(base_url=url.rstrip("/"), timeout=5)
+    env["SEARCH_BACKEND"] = "milvus"
+
+    proc = subprocess.Popen([sys.executable, str(HERE / "search_server.py")], cwd=os.getcwd(), env=env)
+    deadline = time.monotonic() + SEARCH_SERVER_STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"search_server.py exited with code {proc.returncode}")
+        try:
+            if client.get("/healthz").json().get("backend"):
+                print(f"✅ search owner pid={proc.pid} at {url}")
+                return proc
+        except Exception:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("search_server.py did not become ready in time")
+
+
+def preload(workers: int):
+    """fork 전에 읽기 전용 상태를 모두 로드 (워커들이 copy-on-write 로 공유)"""
+    pin_threads(threads_per_worker(workers))
+
+    import main_api
+    import benefit_simulator
+    import card_benefit_api
+
+    card_benefit_api.get_benefit_index()
+    benefit_simulator.get_simulator()
+    if card_benefit_api.SEARCH_BACKEND == "memory":
+        card_benefit_api.get_search_backend()
+    print(f"✅ preloaded main_api in master pid={os.getpid()} (workers={workers})")
+    return main_api.app
+
+
+def run(workers: int, host: str, port: int):
+    from gunicorn.app.base import BaseApplication
+
+    owner = None
+    if os.getenv("SEARCH_BACKEND", "milvus").lower() == "milvus":
+        owner = start_search_owner()
+        os.environ["SEARCH_BACKEND"] = "remote"
+    if workers > 1:
+        os.environ.setdefault("CHAT_CHECKPOINTER", "sqlite")
+
+    def on_exit(server):
+        if owner is not None:
+            owner.terminate()
+            owner.wait(timeout=30)
+
+    class MainApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "timeout": WEB_TIMEOUT,
+                "on_exit": on_exit,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload(workers)
+
+    MainApplication().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run main_api with multiple worker processes")
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "9600")))
+    args = parser.parse_args()
+    run(args.workers, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
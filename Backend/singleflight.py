@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process single-flight: concurrent identical calls share one computation.
+
+The first caller for a key (the leader) starts the work as its own task;
+callers arriving with the same key while it runs await that task instead of
+starting another. The task is shielded, so a leader whose client disconnects
+does not cancel the result the others are waiting for. The key is dropped
+as soon as the task finishes, so nothing is cached; this only removes
+duplicate *concurrent* work (e.g. a double-fired /analyze that would run
+the three-call Reflexion loop twice).
+
+State is per process: with several serve.py workers, identical requests
+landing on different workers still run separately.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def fingerprint(*parts: Any) -> str:
+    """JSON 직렬화 가능한 값들의 sha256 (키 순서 무관)"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "errors": 0}
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """(결과, 다른 호출의 결과를 공유했는지)"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+            self.stats["executions"] += 1
+        return await asyncio.shield(task), shared
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, "inflight": len(self._inflight)}
@@ -9,12 +9,13 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import pymysql
 from datetime import datetime
-import os
 import json
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from llm_provider import create_chat_model
+from transaction_digest import build_digest, digest_queries, render_digest
+
 load_dotenv()
 
 # DB 설정
@@ -43,12 +44,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# LangChain LLM 초기화 - GPT-4o 모델 사용
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.3,
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+# LangChain LLM 초기화 - GPT-4o 모델 사용 (공용 llm_gateway 경유, batch 레인)
+llm = create_chat_model(temperature=0.3, lane="batch")
 print("✅ LangChain LLM 초기화 완료 (GPT-4o)")
 
 # Pydantic 모델
@@ -145,6 +142,22 @@ def get_transactions(fintech_use_num: Optional[str] = None, limit: int = 50):
         conn.close()
 
 
+# 전체 거래 이력 요약 (DB 에서 그룹 집계 후 고정 크기 digest)
+def get_transaction_digest(fintech_use_num: str) -> Dict[str, Any]:
+    """거래 건수와 무관하게 크기가 일정한 요약 (transaction_digest.py)"""
+    (group_sql, group_params), (balance_sql, balance_params) = digest_queries(fintech_use_num)
+    conn = get_db_connection()
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cur:
+            cur.execute(group_sql, group_params)
+            groups = cur.fetchall()
+            cur.execute(balance_sql, balance_params)
+            balance_rows = cur.fetchall()
+    finally:
+        conn.close()
+    return build_digest(groups, balance_rows)
+
+
 # 기본 분석 (LLM 없이)
 def get_basic_analysis(account_info: Dict, transactions: List[Dict]) -> Dict[str, Any]:
     """기본 통계 분석"""
@@ -248,7 +261,8 @@ async def analyze_consumption(
 
     # 거래내역 조회
     fintech_use_num = account_info.get('fintech_use_num')
-    transactions = get_transactions(fintech_use_num=fintech_use_num, limit=100)
+    digest = get_transaction_digest(fintech_use_num)
+    transactions = get_transactions(fintech_use_num=fintech_use_num, limit=20)
 
     # GPT-4o로 소비 패턴 분석
     if not llm:
@@ -259,7 +273,7 @@ async def analyze_consumption(
         f"- {t.get('tran_date', '')} {t.get('tran_time', '')}: "
         f"{t.get('inout_type', '')} {t.get('tran_type', '')} "
         f"{t.get('printed_content', '')} {t.get('tran_amt', 0):,}원"
-        for t in transactions[:50]  # 최근 50건 분석
+        for t in transactions  # 최근 20건 (전체 기간은 요약으로)
     ])
 
     # 계좌 정보 요약
@@ -289,6 +303,9 @@ async def analyze_consumption(
     user_prompt = f"""
 {account_summary}
 
+전체 거래 요약:
+{render_digest(digest)}
+
 최근 거래 내역:
 {transaction_text}
 
@@ -315,7 +332,7 @@ async def analyze_consumption(
                 "balance_amt": account_info.get('balance_amt'),
                 "available_amt": account_info.get('available_amt'),
             },
-            "transaction_count": len(transactions),
+            "transaction_count": digest["totals"]["transactions"],
             "analysis": analysis_text
         }
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite stand-in for the transaction_mockup MariaDB, seeded with synthetic data.
+
+Creates the same tables mcp_server queries (account_balance, transactions,
+card_list, card_basic_info; schema follows sql_scripts/create.sql and
+load_transaction_mock.py) and fills them with deterministic synthetic
+accounts, cards and transactions. Point mcp_server at it with
+DB_BACKEND=sqlite SQLITE_DB_PATH=<file>.
+
+Usage:
+    python synthetic_db.py --output bench_transactions.sqlite --users 200 --tx-per-user 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account_balance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_tran_id TEXT, api_tran_dtm TEXT, rsp_code TEXT, rsp_message TEXT,
+    bank_tran_id TEXT, bank_tran_date TEXT, bank_code_tran TEXT,
+    bank_rsp_code TEXT, bank_rsp_message TEXT, bank_name TEXT,
+    savings_bank_name TEXT, fintech_use_num TEXT, balance_amt TEXT,
+    available_amt TEXT, account_type TEXT, product_name TEXT,
+    account_issue_date TEXT, maturity_date TEXT, last_tran_date TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_inquiry_log_id INTEGER, fintech_use_num TEXT, tran_date TEXT, tran_time TEXT,
+    tran_datetime TEXT, inout_type TEXT, tran_type TEXT, printed_content TEXT,
+    tran_amt INTEGER, after_balance_amt INTEGER, branch_name TEXT
+);
+CREATE TABLE IF NOT EXISTS card_basic_info (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_tran_id TEXT, api_tran_dtm TEXT, rsp_code TEXT, rsp_message TEXT,
+    bank_tran_id TEXT, bank_tran_date TEXT, bank_code_tran TEXT,
+    bank_rsp_code TEXT, bank_rsp_message TEXT, fintech_use_num TEXT,
+    card_num TEXT, card_name TEXT, card_member_type TEXT, card_type TEXT,
+    card_status TEXT, card_issue_date TEXT, card_exp_date TEXT,
+    card_brand TEXT, card_corp_name TEXT, corp_code TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS card_list (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    api_tran_id TEXT, api_tran_dtm TEXT, rsp_code TEXT, rsp_message TEXT,
+    bank_tran_id TEXT, bank_tran_date TEXT, bank_code_tran TEXT,
+    bank_rsp_code TEXT, bank_rsp_message TEXT, card_cnt TEXT,
+    fintech_use_num TEXT, card_num TEXT, card_name TEXT,
+    card_member_type TEXT, card_type TEXT, card_status TEXT,
+    card_issue_date TEXT, card_exp_date TEXT, card_brand TEXT,
+    card_corp_name TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_tx_user_time ON transactions (fintech_use_num, tran_datetime);
+CREATE INDEX IF NOT EXISTS idx_balance_user ON account_balance (fintech_use_num);
+CREATE INDEX IF NOT EXISTS idx_card_list_user ON card_list (fintech_use_num);
+"""
+
+MERCHANTS = [
+    ("스타벅스 강남점", 4500, 12000), ("GS25 역삼점", 1500, 15000), ("CU 선릉점", 1200, 12000),
+    ("SK에너지 주유소", 40000, 90000), ("쿠팡", 9000, 120000), ("배달의민족", 15000, 45000),
+    ("이마트 성수점", 30000, 180000), ("넷플릭스", 13500, 17000), ("티머니 버스", 1400, 1500),
+    ("카카오T 택시", 4800, 25000), ("CGV 용산", 14000, 30000), ("올리브영", 8000, 60000),
+    ("SKT 통신요금", 55000, 89000), ("대한항공", 150000, 900000), ("한국전력 공과금", 30000, 120000),
+]
+INCOME = [("급여", 2500000, 4500000), ("이자", 100, 5000), ("환급", 10000, 200000)]
+BANKS = ["국민은행", "신한은행", "우리은행", "하나은행", "카카오뱅크"]
+CARD_NAMES = ["신한카드 Deep Dream", "삼성카드 taptap O", "KB국민 My WE:SH", "현대카드 ZERO Edition3", "롯데카드 LOCA 365"]
+
+
+def fintech_use_num(i: int) -> str:
+    return f"1{i:023d}"
+
+
+def seed(path: str, users: int = 200, tx_per_user: int = 300, seed_value: int = 42) -> List[str]:
+    """DB 파일을 새로 만들고 합성 데이터 적재. 생성된 fintech_use_num 목록 반환"""
+    db_path = Path(path)
+    if db_path.exists():
+        db_path.unlink()
+    rng = random.Random(seed_value)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    start = datetime(2025, 1, 1)
+    user_ids = []
+
+    for u in range(users):
+        fin = fintech_use_num(u)
+        user_ids.append(fin)
+        balance = rng.randint(500_000, 20_000_000)
+        conn.execute(
+            "INSERT INTO account_balance (api_tran_id, rsp_code, rsp_message, bank_name, fintech_use_num,"
+            " balance_amt, available_amt, account_type, product_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (f"SYN{u:08d}", "A0000", "", rng.choice(BANKS), fin, str(balance), str(balance), "1", "자유입출금 통장"),
+        )
+        for c, card_name in enumerate(rng.sample(CARD_NAMES, k=rng.randint(1, 2))):
+            row = (fin, f"9400-****-****-{u % 10000:04d}", card_name, "1", "01", "01", card_name.split()[0])
+            conn.execute(
+                "INSERT INTO card_list (fintech_use_num, card_num, card_name, card_member_type, card_type,"
+                " card_status, card_corp_name) VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            conn.execute(
+                "INSERT INTO card_basic_info (fintech_use_num, card_num, card_name, card_member_type, card_type,"
+                " card_status, card_corp_name) VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+        rows = []
+        for _ in range(tx_per_user):
+            when = start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            if rng.random() < 0.08:
+                content, low, high = rng.choice(INCOME)
+                inout = "입금"
+            else:
+                content, low, high = rng.choice(MERCHANTS)
+                inout = "출금"
+            amount = rng.randint(low, high) // 100 * 100
+            balance += amount if inout == "입금" else -amount
+            rows.append((fin, when.strftime("%Y%m%d"), when.strftime("%H%M%S"), when.isoformat(sep=" "),
+                         inout, "카드" if inout == "출금" else "이체", content, amount, balance, "본점"))
+        rows.sort(key=lambda r: r[3])
+        conn.executemany(
+            "INSERT INTO transactions (fintech_use_num, tran_date, tran_time, tran_datetime, inout_type,"
+            " tran_type, printed_content, tran_amt, after_balance_amt, branch_name)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    conn.commit()
+    conn.close()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic transaction SQLite DB")
+    parser.add_argument("--output", default="bench_transactions.sqlite")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tx-per-user", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    users = seed(args.output, args.users, args.tx_per_user, args.seed)
+    print(f"✅ {args.output}: {len(users)} users x {args.tx_per_user} transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker thread pinning in parallel_embedding.
+
+The pool workers must build the ONNX session with the pinned intra-op thread
+count (the session options, not only the environment variables), otherwise N
+workers each run a full-width thread pool.
+
+Needs onnxruntime and an exported model (ONNX_MODEL_DIR); skipped otherwise.
+    python -m pytest -q test_parallel_embedding.py
+"""
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from embedding_backends import ONNX_INT8_FILE, ONNX_MODEL_DIR  # noqa: E402
+from parallel_embedding import probe_worker_threads, threads_per_worker  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not (ONNX_MODEL_DIR / ONNX_INT8_FILE).exists(), reason=f"{ONNX_MODEL_DIR / ONNX_INT8_FILE} not exported")
+
+
+@pytest.fixture
+def onnx_backend(monkeypatch):
+    # spawn 워커는 환경 변수를 새로 읽는다
+    monkeypatch.setenv("EMBEDDING_BACKEND", "onnx-int8")
+    monkeypatch.delenv("EMBEDDING_SERVER_URL", raising=False)
+    # 부모의 설정이 워커 세션에 새지 않는지 보려고 일부러 다른 값을 둔다
+    monkeypatch.setenv("ONNX_INTRA_OP_THREADS", "7")
+
+
+def test_worker_session_uses_pinned_threads(onnx_backend):
+    settings = probe_worker_threads(workers=2, threads=1)
+    assert settings
+    for worker in settings:
+        assert worker["onnx_intra_op_threads"] == 1
+        assert worker["env"]["ONNX_INTRA_OP_THREADS"] == "1"
+
+
+def test_default_threads_split_cores(onnx_backend):
+    workers = 2
+    expected = threads_per_worker(workers, 0)
+    for worker in probe_worker_threads(workers=workers, threads=0):
+        assert worker["onnx_intra_op_threads"] == expected
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fixed-size statistical digest of an account's full transaction history.
+
+The analysis prompts used to carry at most 50 raw rows, so a month of
+spending never fit. Instead the history is pre-aggregated:
+
+1. SQL (digest_queries) groups the rows by month x in/out x merchant and
+   picks the balance extremes, so the DB returns O(months x merchants) rows
+   rather than every transaction. The same statements run on MySQL and
+   SQLite (%s placeholders, as everywhere else in mcp_server).
+2. build_digest folds those rows into category totals, a monthly trend,
+   recurring payments, top merchants / income sources and balance extremes.
+   Every list is capped, so the digest (and render_digest's text) has the
+   same size for 100 or 100,000 transactions.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DIGEST_MONTHS = int(os.getenv("DIGEST_MONTHS", "12"))
+DIGEST_TOP_N = int(os.getenv("DIGEST_TOP_N", "5"))
+RECURRING_MIN_MONTHS = 3
+RECURRING_MAX_PER_MONTH = 1.5   # 월 평균 건수 상한
+RECURRING_AMOUNT_SPREAD = 1.3   # 최대/최소 금액 비율 상한
+
+# 위에서부터 먼저 일치하는 카테고리 (소문자 비교)
+CATEGORY_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("주거비", ("월세", "전세", "임대료", "관리비")),
+    ("통신비", ("통신", "skt", "lg u+", "전화", "인터넷")),
+    ("공과금", ("공과금", "전력", "전기", "가스", "수도")),
+    ("보험", ("보험",)),
+    ("구독", ("넷플릭스", "유튜브", "멜론", "디즈니", "왓챠", "티빙", "구독")),
+    ("카페", ("스타벅스", "커피", "카페", "이디야", "투썸", "메가mgc")),
+    ("편의점", ("gs25", "cu ", "세븐일레븐", "이마트24", "편의점")),
+    ("배달", ("배달", "요기요", "쿠팡이츠")),
+    ("온라인쇼핑", ("쿠팡", "11번가", "g마켓", "지마켓", "옥션", "무신사", "네이버페이")),
+    ("마트", ("이마트", "홈플러스", "롯데마트", "코스트코")),
+    ("교통", ("티머니", "버스", "지하철", "택시", "카카오t", "코레일", "srt")),
+    ("주유", ("주유", "에너지", "오일")),
+    ("여행", ("항공", "호텔", "여행")),
+    ("문화", ("cgv", "메가박스", "롯데시네마", "영화")),
+    ("뷰티", ("올리브영", "화장품")),
+    ("카드결제", ("카드대금", "신용카드")),
+    ("이체", ("이체", "송금")),
+    ("현금출금", ("atm", "현금")),
+)
+
+_BALANCE_ORDER = {
+    "min": "after_balance_amt ASC, tran_datetime DESC",
+    "max": "after_balance_amt DESC, tran_datetime DESC",
+    "first": "tran_datetime ASC",
+    "latest": "tran_datetime DESC",
+}
+
+
+def categorize(content: Optional[str]) -> str:
+    text = (content or "").lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(word in text for word in keywords):
+            return category
+    return "기타"
+
+
+def months_before(yyyymmdd: str, months: int) -> str:
+    """yyyymmdd 기준 months 개월 전 달의 1일 (YYYYMM01)"""
+    index = int(yyyymmdd[:4]) * 12 + int(yyyymmdd[4:6]) - 1 - (months - 1)
+    return f"{index // 12:04d}{index % 12 + 1:02d}01"
+
+
+def digest_queries(fintech_use_num: str, since: Optional[str] = None) -> List[Tuple[str, List[Any]]]:
+    """(그룹 집계 SQL, 잔액 극값 SQL) - since(YYYYMMDD) 이후 거래만"""
+    where = "fintech_use_num = %s" + (" AND tran_date >= %s" if since else "")
+    params: List[Any] = [fintech_use_num] + ([since] if since else [])
+
+    group_sql = f"""
+        SELECT SUBSTR(tran_date, 1, 6) AS month, inout_type, printed_content,
+               COUNT(*) AS cnt, SUM(tran_amt) AS total, MIN(tran_amt) AS min_amt, MAX(tran_amt) AS max_amt
+        FROM transactions
+        WHERE {where}
+        GROUP BY SUBSTR(tran_date, 1, 6), inout_type, printed_content
+    """
+    balance_sql = "\nUNION ALL\n".join(
+        f"""SELECT * FROM (
+            SELECT '{kind}' AS kind, tran_date, after_balance_amt
+            FROM transactions
+            WHERE {where} AND after_balance_amt IS NOT NULL
+            ORDER BY {order}
+            LIMIT 1
+        ) AS b_{kind}"""
+        for kind, order in _BALANCE_ORDER.items()
+    )
+    return [(group_sql, params), (balance_sql, params * len(_BALANCE_ORDER))]
+
+
+def _top(items: Iterable[Tuple[str, Dict[str, int]]], n: int, key: str = "amount") -> List[Dict[str, Any]]:
+    ranked = sorted(items, key=lambda item: item[1][key], reverse=True)[:n]
+    return [{"name": name, **stats} for name, stats in ranked]
+
+
+def build_digest(groups: Sequence[Dict[str, Any]], balance_rows: Sequence[Dict[str, Any]],
+                 months: int = DIGEST_MONTHS, top_n: int = DIGEST_TOP_N) -> Dict[str, Any]:
+    """digest_queries 결과 행들 -> 고정 크기 요약 dict"""
+    totals = {"transactions": 0, "income": 0, "expense": 0, "income_count": 0, "expense_count": 0}
+    categories: Dict[str, Dict[str, int]] = {}
+    monthly: Dict[str, Dict[str, int]] = {}
+    merchants: Dict[str, Dict[str, Any]] = {}
+    income_sources: Dict[str, Dict[str, int]] = {}
+
+    for row in groups:
+        month = row.get("month") or ""
+        name = (row.get("printed_content") or "").strip() or "(내용 없음)"
+        count = int(row.get("cnt") or 0)
+        amount = int(row.get("total") or 0)
+        trend = monthly.setdefault(month, {"income": 0, "expense": 0, "count": 0})
+        trend["count"] += count
+        totals["transactions"] += count
+
+        if row.get("inout_type") == "입금":
+            totals["income"] += amount
+            totals["income_count"] += count
+            trend["income"] += amount
+            source = income_sources.setdefault(name, {"amount": 0, "count": 0})
+            source["amount"] += amount
+            source["count"] += count
+        elif row.get("inout_type") == "출금":
+            totals["expense"] += amount
+            totals["expense_count"] += count
+            trend["expense"] += amount
+            category = categories.setdefault(categorize(name), {"amount": 0, "count": 0})
+            category["amount"] += amount
+            category["count"] += count
+            merchant = merchants.setdefault(
+                name, {"amount": 0, "count": 0, "months": set(), "min_amt": None, "max_amt": 0})
+            merchant["amount"] += amount
+            merchant["count"] += count
+            merchant["months"].add(month)
+            low = int(row.get("min_amt") or 0)
+            merchant["min_amt"] = low if merchant["min_amt"] is None else min(merchant["min_amt"], low)
+            merchant["max_amt"] = max(merchant["max_amt"], int(row.get("max_amt") or 0))
+
+    totals["net"] = totals["income"] - totals["expense"]
+
+    category_list = _top(categories.items(), len(categories))
+    for item in category_list:
+        item["share"] = round(item["amount"] / totals["expense"], 3) if totals["expense"] else 0.0
+
+    recurring = []
+    for name, stats in merchants.items():
+        n_months = len(stats["months"])
+        if (
+            n_months >= RECURRING_MIN_MONTHS
+            and stats["count"] / n_months <= RECURRING_MAX_PER_MONTH
+            and stats["min_amt"] > 0
+            and stats["max_amt"] / stats["min_amt"] <= RECURRING_AMOUNT_SPREAD
+        ):
+            recurring.append({"name": name, "months": n_months, "avg_amount": stats["amount"] // stats["count"]})
+    recurring.sort(key=lambda item: (item["months"], item["avg_amount"]), reverse=True)
+
+    month_keys = sorted(monthly)
+    balance = {
+        row["kind"]: {"date": row.get("tran_date"), "amount": int(row.get("after_balance_amt") or 0)}
+        for row in balance_rows
+    }
+    return {
+        "period": {
+            "from": balance.get("first", {}).get("date"),
+            "to": balance.get("latest", {}).get("date"),
+            "months": len(month_keys),
+        },
+        "totals": totals,
+        "categories": category_list,
+        "monthly": [{"month": m, **monthly[m]} for m in month_keys[-months:]],
+        "recurring": recurring[:top_n],
+        "top_merchants": _top(
+            ((name, {"amount": s["amount"], "count": s["count"]}) for name, s in merchants.items()), top_n),
+        "income_sources": _top(income_sources.items(), top_n),
+        "balance": balance,
+    }
+
+
+def _won(value: int) -> str:
+    return f"{value:,}"
+
+
+def render_digest(digest: Dict[str, Any]) -> str:
+    """프롬프트용 요약 텍스트 (표는 헤더 1줄 + 항목당 1줄)"""
+    period = digest["period"]
+    totals = digest["totals"]
+    lines = [
+        f"전체 기간 {period['from'] or '-'}~{period['to'] or '-'} ({period['months']}개월), "
+        f"거래 {totals['transactions']}건",
+        f"합계: 입금 {totals['income_count']}건 {_won(totals['income'])}원, "
+        f"출금 {totals['expense_count']}건 {_won(totals['expense'])}원, 순 {_won(totals['net'])}원",
+        "",
+        "카테고리별 지출 (카테고리|금액|건수|비중):",
+        *(f"{c['name']}|{_won(c['amount'])}|{c['count']}|{c['share']:.0%}" for c in digest["categories"]),
+        "",
+        f"월별 추이 최근 {len(digest['monthly'])}개월 (월|입금|출금|건수):",
+        *(f"{m['month']}|{_won(m['income'])}|{_won(m['expense'])}|{m['count']}" for m in digest["monthly"]),
+        "",
+        "상위 지출처 (가맹점|금액|건수):",
+        *(f"{m['name']}|{_won(m['amount'])}|{m['count']}" for m in digest["top_merchants"]),
+        "",
+        "주요 수입원 (내용|금액|건수):",
+        *(f"{s['name']}|{_won(s['amount'])}|{s['count']}" for s in digest["income_sources"]),
+        "",
+        "정기 결제 추정 (가맹점|개월수|평균금액): "
+        + ("없음" if not digest["recurring"] else ""),
+        *(f"{r['name']}|{r['months']}|{_won(r['avg_amount'])}" for r in digest["recurring"]),
+    ]
+    balance = digest["balance"]
+    if balance:
+        labels = (("min", "최저"), ("max", "최고"), ("latest", "최근"))
+        lines += ["", "잔액: " + ", ".join(
+            f"{label} {_won(balance[kind]['amount'])}원({balance[kind]['date']})"
+            for kind, label in labels if kind in balance
+        )]
+    return "\n".join(lines)